@@ -0,0 +1,326 @@
+-- ============================================================
+-- Esquema tipado de las tablas derivadas del ETL
+-- Generado con: python etl/esquema.py > database/ddl_schema.sql
+-- Las dimensiones (dim_*) están en database/dim_data.sql
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS datos_limpios_temperas_vinilos (
+    `registro_id` INT NULL,
+    `fecha` DATE NULL,
+    `mes` VARCHAR(20) NULL,
+    `año` SMALLINT NULL,
+    `maquina` VARCHAR(100) NULL,
+    `maquina_id` SMALLINT NULL,
+    `operario` VARCHAR(150) NULL,
+    `operario_id` SMALLINT NULL,
+    `referencia` VARCHAR(128) NULL,
+    `pacas_producidas` DECIMAL(10,2) NULL,
+    `horas_trabajadas` DECIMAL(10,2) NULL,
+    `horas_no_trabajadas` DECIMAL(10,2) NULL,
+    `tiempo_de_paro` DECIMAL(10,2) NULL,
+    `turno_inicio` VARCHAR(64) NULL,
+    `turno_final` VARCHAR(64) NULL,
+    `Codigo_1_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_1` VARCHAR(255) NULL,
+    `Codigo_2_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_2` VARCHAR(255) NULL,
+    `Codigo_3_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_3` VARCHAR(255) NULL,
+    `Codigo_4_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_4` VARCHAR(255) NULL,
+    `Codigo_5_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_5` VARCHAR(255) NULL,
+    `Codigo_6_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_6` VARCHAR(255) NULL,
+    `Codigo_7_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_7` VARCHAR(255) NULL,
+    `Codigo_8_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_8` VARCHAR(255) NULL,
+    `Codigo_9_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_9` VARCHAR(255) NULL,
+    `Codigo_10_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_10` VARCHAR(255) NULL,
+    `Codigo_11_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_11` VARCHAR(255) NULL,
+    `Codigo_12_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_12` VARCHAR(255) NULL,
+    `Codigo_13_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_13` VARCHAR(255) NULL,
+    `Codigo_14_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_14` VARCHAR(255) NULL,
+    `Codigo_15_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_15` VARCHAR(255) NULL,
+    `Codigo_16_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_16` VARCHAR(255) NULL,
+    `Codigo_17_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_17` VARCHAR(255) NULL,
+    `Codigo_18_en_horas` VARCHAR(64) NULL,
+    `Codigo_de_paro_18` VARCHAR(255) NULL,
+    `sub_codigo_de_paro_1` VARCHAR(255) NULL,
+    `subcodigo_3` VARCHAR(255) NULL,
+    `subcodigo_5` VARCHAR(255) NULL,
+    `area_involucrada_en_subcodigo_5` VARCHAR(255) NULL,
+    `personal_involucrado` VARCHAR(255) NULL,
+    `observaciones` TEXT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE INDEX idx_datos_limpios_temperas_vinilos_maquina_fecha ON datos_limpios_temperas_vinilos (maquina, fecha);
+CREATE INDEX idx_datos_limpios_temperas_vinilos_maquina_id_fecha ON datos_limpios_temperas_vinilos (maquina_id, fecha);
+CREATE INDEX idx_datos_limpios_temperas_vinilos_operario_id_fecha ON datos_limpios_temperas_vinilos (operario_id, fecha);
+
+CREATE TABLE IF NOT EXISTS datos_paros_procesados (
+    `registro_id` INT NULL,
+    `fecha` DATE NULL,
+    `mes` VARCHAR(20) NULL,
+    `año` SMALLINT NULL,
+    `maquina` VARCHAR(100) NULL,
+    `maquina_id` SMALLINT NULL,
+    `operario` VARCHAR(150) NULL,
+    `operario_id` SMALLINT NULL,
+    `referencia` VARCHAR(128) NULL,
+    `pacas_producidas` DECIMAL(10,2) NULL,
+    `horas_trabajadas` DECIMAL(10,2) NULL,
+    `horas_no_trabajadas` DECIMAL(10,2) NULL,
+    `tiempo_de_paro` DECIMAL(10,2) NULL,
+    `turno_inicio` VARCHAR(64) NULL,
+    `turno_final` VARCHAR(64) NULL,
+    `codigo_paro_1` SMALLINT NULL,
+    `minutos_paro_1` DECIMAL(10,2) NULL,
+    `codigo_paro_2` SMALLINT NULL,
+    `minutos_paro_2` DECIMAL(10,2) NULL,
+    `codigo_paro_3` SMALLINT NULL,
+    `minutos_paro_3` DECIMAL(10,2) NULL,
+    `codigo_paro_4` SMALLINT NULL,
+    `minutos_paro_4` DECIMAL(10,2) NULL,
+    `codigo_paro_5` SMALLINT NULL,
+    `minutos_paro_5` DECIMAL(10,2) NULL,
+    `codigo_paro_6` SMALLINT NULL,
+    `minutos_paro_6` DECIMAL(10,2) NULL,
+    `codigo_paro_7` SMALLINT NULL,
+    `minutos_paro_7` DECIMAL(10,2) NULL,
+    `codigo_paro_8` SMALLINT NULL,
+    `minutos_paro_8` DECIMAL(10,2) NULL,
+    `codigo_paro_9` SMALLINT NULL,
+    `minutos_paro_9` DECIMAL(10,2) NULL,
+    `codigo_paro_10` SMALLINT NULL,
+    `minutos_paro_10` DECIMAL(10,2) NULL,
+    `codigo_paro_11` SMALLINT NULL,
+    `minutos_paro_11` DECIMAL(10,2) NULL,
+    `codigo_paro_12` SMALLINT NULL,
+    `minutos_paro_12` DECIMAL(10,2) NULL,
+    `codigo_paro_13` SMALLINT NULL,
+    `minutos_paro_13` DECIMAL(10,2) NULL,
+    `codigo_paro_14` SMALLINT NULL,
+    `minutos_paro_14` DECIMAL(10,2) NULL,
+    `codigo_paro_15` SMALLINT NULL,
+    `minutos_paro_15` DECIMAL(10,2) NULL,
+    `codigo_paro_16` SMALLINT NULL,
+    `minutos_paro_16` DECIMAL(10,2) NULL,
+    `codigo_paro_17` SMALLINT NULL,
+    `minutos_paro_17` DECIMAL(10,2) NULL,
+    `codigo_paro_18` SMALLINT NULL,
+    `minutos_paro_18` DECIMAL(10,2) NULL,
+    `sub_codigo_de_paro_1` VARCHAR(255) NULL,
+    `subcodigo_3` VARCHAR(255) NULL,
+    `subcodigo_5` VARCHAR(255) NULL,
+    `area_involucrada_en_subcodigo_5` VARCHAR(255) NULL,
+    `personal_involucrado` VARCHAR(255) NULL,
+    `observaciones` TEXT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE INDEX idx_datos_paros_procesados_maquina_fecha ON datos_paros_procesados (maquina, fecha);
+CREATE INDEX idx_datos_paros_procesados_maquina_id_fecha ON datos_paros_procesados (maquina_id, fecha);
+
+CREATE TABLE IF NOT EXISTS produccion_maquina (
+    `registro_id` INT NULL,
+    `fecha` DATE NULL,
+    `mes` VARCHAR(20) NULL,
+    `maquina` VARCHAR(100) NULL,
+    `maquina_id` SMALLINT NULL,
+    `pacas_producidas` DECIMAL(10,2) NULL,
+    `horas_trabajadas` DECIMAL(10,2) NULL,
+    `tiempo_de_paro` DECIMAL(10,2) NULL,
+    `turno_inicio` VARCHAR(64) NULL,
+    `turno_final` VARCHAR(64) NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE INDEX idx_produccion_maquina_maquina_fecha ON produccion_maquina (maquina, fecha);
+CREATE INDEX idx_produccion_maquina_maquina_id_fecha ON produccion_maquina (maquina_id, fecha);
+CREATE INDEX idx_produccion_maquina_fecha ON produccion_maquina (fecha);
+
+CREATE TABLE IF NOT EXISTS produccion_operario (
+    `registro_id` INT NULL,
+    `fecha` DATE NULL,
+    `mes` VARCHAR(20) NULL,
+    `maquina` VARCHAR(100) NULL,
+    `maquina_id` SMALLINT NULL,
+    `operario` VARCHAR(150) NULL,
+    `operario_id` SMALLINT NULL,
+    `referencia` VARCHAR(128) NULL,
+    `pacas_producidas` DECIMAL(10,2) NULL,
+    `horas_trabajadas` DECIMAL(10,2) NULL,
+    `turno_inicio` VARCHAR(64) NULL,
+    `turno_final` VARCHAR(64) NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE INDEX idx_produccion_operario_operario_fecha ON produccion_operario (operario, fecha);
+CREATE INDEX idx_produccion_operario_operario_id_fecha ON produccion_operario (operario_id, fecha);
+CREATE INDEX idx_produccion_operario_maquina_fecha ON produccion_operario (maquina, fecha);
+
+CREATE TABLE IF NOT EXISTS analisis_paros (
+    `registro_id` INT NULL,
+    `fecha` DATE NULL,
+    `mes` VARCHAR(20) NULL,
+    `maquina` VARCHAR(100) NULL,
+    `maquina_id` SMALLINT NULL,
+    `operario` VARCHAR(150) NULL,
+    `operario_id` SMALLINT NULL,
+    `codigo_paro_1` SMALLINT NULL,
+    `minutos_paro_1` DECIMAL(10,2) NULL,
+    `codigo_paro_2` SMALLINT NULL,
+    `minutos_paro_2` DECIMAL(10,2) NULL,
+    `codigo_paro_3` SMALLINT NULL,
+    `minutos_paro_3` DECIMAL(10,2) NULL,
+    `codigo_paro_4` SMALLINT NULL,
+    `minutos_paro_4` DECIMAL(10,2) NULL,
+    `codigo_paro_5` SMALLINT NULL,
+    `minutos_paro_5` DECIMAL(10,2) NULL,
+    `codigo_paro_6` SMALLINT NULL,
+    `minutos_paro_6` DECIMAL(10,2) NULL,
+    `codigo_paro_7` SMALLINT NULL,
+    `minutos_paro_7` DECIMAL(10,2) NULL,
+    `codigo_paro_8` SMALLINT NULL,
+    `minutos_paro_8` DECIMAL(10,2) NULL,
+    `codigo_paro_9` SMALLINT NULL,
+    `minutos_paro_9` DECIMAL(10,2) NULL,
+    `codigo_paro_10` SMALLINT NULL,
+    `minutos_paro_10` DECIMAL(10,2) NULL,
+    `codigo_paro_11` SMALLINT NULL,
+    `minutos_paro_11` DECIMAL(10,2) NULL,
+    `codigo_paro_12` SMALLINT NULL,
+    `minutos_paro_12` DECIMAL(10,2) NULL,
+    `codigo_paro_13` SMALLINT NULL,
+    `minutos_paro_13` DECIMAL(10,2) NULL,
+    `codigo_paro_14` SMALLINT NULL,
+    `minutos_paro_14` DECIMAL(10,2) NULL,
+    `codigo_paro_15` SMALLINT NULL,
+    `minutos_paro_15` DECIMAL(10,2) NULL,
+    `codigo_paro_16` SMALLINT NULL,
+    `minutos_paro_16` DECIMAL(10,2) NULL,
+    `codigo_paro_17` SMALLINT NULL,
+    `minutos_paro_17` DECIMAL(10,2) NULL,
+    `codigo_paro_18` SMALLINT NULL,
+    `minutos_paro_18` DECIMAL(10,2) NULL,
+    `total_minutos_paro` DECIMAL(12,2) NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE INDEX idx_analisis_paros_maquina_fecha ON analisis_paros (maquina, fecha);
+CREATE INDEX idx_analisis_paros_operario_id_fecha ON analisis_paros (operario_id, fecha);
+
+CREATE TABLE IF NOT EXISTS fact_paros (
+    `registro_id` INT NULL,
+    `fecha` DATE NULL,
+    `maquina` VARCHAR(100) NULL,
+    `maquina_id` SMALLINT NULL,
+    `operario` VARCHAR(150) NULL,
+    `operario_id` SMALLINT NULL,
+    `slot` SMALLINT NULL,
+    `codigo` VARCHAR(255) NULL,
+    `subcodigo` VARCHAR(255) NULL,
+    `minutos` DECIMAL(10,2) NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE INDEX idx_fact_paros_maquina_fecha ON fact_paros (maquina, fecha);
+CREATE INDEX idx_fact_paros_maquina_id_fecha ON fact_paros (maquina_id, fecha);
+CREATE INDEX idx_fact_paros_codigo ON fact_paros (codigo);
+CREATE INDEX idx_fact_paros_registro_id ON fact_paros (registro_id);
+
+CREATE TABLE IF NOT EXISTS fact_registro_produccion (
+    `registro_id` INT NOT NULL,
+    `fecha` DATE NULL,
+    `maquina_id` SMALLINT NULL,
+    `operario_id` SMALLINT NULL,
+    `producto_id` SMALLINT NULL,
+    `hora_inicio` TIME NULL,
+    `hora_fin` TIME NULL,
+    `cantidad_producida` DECIMAL(10,2) NULL,
+    `cantidad_defectuosa` DECIMAL(10,2) NULL,
+    `horas_trabajadas` DECIMAL(10,2) NULL,
+    `tiempo_de_paro` DECIMAL(10,2) NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE INDEX idx_fact_registro_produccion_maquina_id_fecha ON fact_registro_produccion (maquina_id, fecha);
+CREATE INDEX idx_fact_registro_produccion_operario_id_fecha ON fact_registro_produccion (operario_id, fecha);
+CREATE INDEX idx_fact_registro_produccion_producto_id_fecha ON fact_registro_produccion (producto_id, fecha);
+CREATE INDEX idx_fact_registro_produccion_registro_id ON fact_registro_produccion (registro_id);
+
+CREATE TABLE IF NOT EXISTS fact_detalle_paros (
+    `registro_id` INT NOT NULL,
+    `slot` SMALLINT NOT NULL,
+    `codigo_paro_id` INT NULL,
+    `subcodigo_paro_id` INT NULL,
+    `duracion_minutos` DECIMAL(10,2) NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE INDEX idx_fact_detalle_paros_registro_id ON fact_detalle_paros (registro_id);
+CREATE INDEX idx_fact_detalle_paros_codigo_paro_id ON fact_detalle_paros (codigo_paro_id);
+
+CREATE TABLE IF NOT EXISTS resumen_oee_maquina (
+    `grano` VARCHAR(6) NOT NULL,
+    `periodo` DATE NOT NULL,
+    `maquina` VARCHAR(100) NULL,
+    `registros` INT NOT NULL,
+    `pacas` DECIMAL(14,2) NOT NULL,
+    `horas_trabajadas` DECIMAL(14,2) NOT NULL,
+    `horas_paro` DECIMAL(14,2) NOT NULL,
+    `disponibilidad` DECIMAL(10,6) NULL,
+    `rendimiento_pacas_hora` DECIMAL(14,6) NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE INDEX idx_resumen_oee_maquina_grano_maquina_periodo ON resumen_oee_maquina (grano, maquina, periodo);
+CREATE INDEX idx_resumen_oee_maquina_grano_periodo ON resumen_oee_maquina (grano, periodo);
+
+CREATE TABLE IF NOT EXISTS resumen_oee_operario (
+    `grano` VARCHAR(6) NOT NULL,
+    `periodo` DATE NOT NULL,
+    `operario` VARCHAR(150) NULL,
+    `registros` INT NOT NULL,
+    `pacas` DECIMAL(14,2) NOT NULL,
+    `horas_trabajadas` DECIMAL(14,2) NOT NULL,
+    `horas_paro` DECIMAL(14,2) NOT NULL,
+    `disponibilidad` DECIMAL(10,6) NULL,
+    `rendimiento_pacas_hora` DECIMAL(14,6) NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE INDEX idx_resumen_oee_operario_grano_operario_periodo ON resumen_oee_operario (grano, operario, periodo);
+CREATE INDEX idx_resumen_oee_operario_grano_periodo ON resumen_oee_operario (grano, periodo);
+
+CREATE TABLE IF NOT EXISTS resultados_oee (
+    `agrupacion` VARCHAR(64) NOT NULL,
+    `grano` VARCHAR(6) NULL,
+    `periodo` DATE NULL,
+    `maquina` VARCHAR(100) NULL,
+    `operario` VARCHAR(150) NULL,
+    `referencia` VARCHAR(128) NULL,
+    `turno` VARCHAR(64) NULL,
+    `registros` INT NOT NULL,
+    `horas_planificadas` DECIMAL(14,2) NULL,
+    `horas_paro` DECIMAL(14,2) NULL,
+    `paros` INT NULL,
+    `horas_operativas` DECIMAL(14,2) NULL,
+    `pacas` DECIMAL(14,2) NULL,
+    `pacas_ideales` DECIMAL(14,2) NULL,
+    `disponibilidad` DECIMAL(10,6) NULL,
+    `rendimiento` DECIMAL(10,6) NULL,
+    `calidad` DECIMAL(10,6) NULL,
+    `oee` DECIMAL(10,6) NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE INDEX idx_resultados_oee_agrupacion_grano_periodo ON resultados_oee (agrupacion, grano, periodo);
+CREATE INDEX idx_resultados_oee_maquina_periodo ON resultados_oee (maquina, periodo);
+
+CREATE TABLE IF NOT EXISTS metricas_etl (
+    `ejecucion` VARCHAR(32) NOT NULL,
+    `instante` DATETIME NOT NULL,
+    `tipo` VARCHAR(8) NOT NULL,
+    `etapa` VARCHAR(64) NULL,
+    `operacion` VARCHAR(16) NULL,
+    `tabla` VARCHAR(128) NULL,
+    `sentencias` INT NULL,
+    `segundos` DECIMAL(14,6) NULL,
+    `segundos_servidor` DECIMAL(14,6) NULL,
+    `filas` BIGINT NULL,
+    `bytes` BIGINT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE INDEX idx_metricas_etl_instante ON metricas_etl (instante);
+CREATE INDEX idx_metricas_etl_etapa_instante ON metricas_etl (etapa, instante);
+
@@ -0,0 +1,35 @@
+-- ============================================================
+-- Dimensiones con claves sustitutas (mantenidas por el ETL)
+-- Generado con: python etl/dimensiones.py > database/dim_data.sql
+-- ============================================================
+-- ciclo_teorico_segundos y objetivo_produccion_hora de dim_producto
+-- no vienen en el libro y se completan a mano, por ejemplo:
+--   UPDATE dim_producto SET ciclo_teorico_segundos = 45
+--   WHERE nombre_producto = 'VINILO BLANCO';
+
+CREATE TABLE IF NOT EXISTS dim_maquina (
+    maquina_id SMALLINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    nombre_maquina VARCHAR(100) NOT NULL,
+    CONSTRAINT uk_dim_maquina_nombre_maquina UNIQUE (nombre_maquina)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS dim_operario (
+    operario_id SMALLINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    nombre_operario VARCHAR(150) NOT NULL,
+    CONSTRAINT uk_dim_operario_nombre_operario UNIQUE (nombre_operario)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS dim_producto (
+    producto_id SMALLINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    nombre_producto VARCHAR(128) NOT NULL,
+    ciclo_teorico_segundos DECIMAL(10,2) NULL,
+    objetivo_produccion_hora DECIMAL(10,2) NULL,
+    CONSTRAINT uk_dim_producto_nombre_producto UNIQUE (nombre_producto)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS dim_codigo_paro (
+    codigo_paro_id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    descripcion VARCHAR(255) NOT NULL,
+    CONSTRAINT uk_dim_codigo_paro_descripcion UNIQUE (descripcion)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
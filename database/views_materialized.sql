@@ -0,0 +1,39 @@
+-- ============================================================
+-- Resúmenes OEE materializados (mantenidos por etl/etl_structured.py)
+-- ============================================================
+-- El ETL reconstruye estas tablas en una tabla sombra y las intercambia con
+-- RENAME TABLE en cada carga completa. En modo --incremental solo se
+-- recalculan los periodos afectados (DELETE + INSERT ... SELECT).
+--
+-- grano:   'dia' | 'semana' (semana ISO, inicia lunes) | 'mes'
+-- periodo: primer día del periodo
+-- disponibilidad         = (horas_trabajadas - horas_paro) / horas_trabajadas
+-- rendimiento_pacas_hora = pacas / (horas_trabajadas - horas_paro)
+
+CREATE TABLE IF NOT EXISTS resumen_oee_maquina (
+    grano VARCHAR(6) NOT NULL,
+    periodo DATE NOT NULL,
+    maquina VARCHAR(100) NULL,
+    registros INT NOT NULL,
+    pacas DECIMAL(14,2) NOT NULL,
+    horas_trabajadas DECIMAL(14,2) NOT NULL,
+    horas_paro DECIMAL(14,2) NOT NULL,
+    disponibilidad DECIMAL(10,6) NULL,
+    rendimiento_pacas_hora DECIMAL(14,6) NULL,
+    INDEX idx_resumen_oee_maquina_grano_maquina_periodo (grano, maquina, periodo),
+    INDEX idx_resumen_oee_maquina_grano_periodo (grano, periodo)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS resumen_oee_operario (
+    grano VARCHAR(6) NOT NULL,
+    periodo DATE NOT NULL,
+    operario VARCHAR(150) NULL,
+    registros INT NOT NULL,
+    pacas DECIMAL(14,2) NOT NULL,
+    horas_trabajadas DECIMAL(14,2) NOT NULL,
+    horas_paro DECIMAL(14,2) NOT NULL,
+    disponibilidad DECIMAL(10,6) NULL,
+    rendimiento_pacas_hora DECIMAL(14,6) NULL,
+    INDEX idx_resumen_oee_operario_grano_operario_periodo (grano, operario, periodo),
+    INDEX idx_resumen_oee_operario_grano_periodo (grano, periodo)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
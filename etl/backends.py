@@ -0,0 +1,369 @@
+# backends.py
+"""Backends de base de datos: MySQL (servidor) y motores embebidos (DuckDB / SQLite).
+
+Cada dialecto genera el SQL de las construcciones propias de MySQL que usa el
+ETL (REGEXP_REPLACE, SUBSTRING_INDEX, DATE_SUB/WEEKDAY, AUTO_INCREMENT,
+INSERT IGNORE, RENAME TABLE múltiple, comillas invertidas, ENGINE=InnoDB),
+de modo que el mismo pipeline corre en proceso sin servidor MySQL.
+"""
+import logging
+import re
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.pool import StaticPool
+
+logger = logging.getLogger(__name__)
+
+try:
+    import duckdb_engine  # noqa: F401  (registra el dialecto duckdb:// en SQLAlchemy)
+except ImportError:
+    duckdb_engine = None
+
+# Pool de conexiones compartido por los ETL concurrentes y la carga de lectura de Grafana
+OPCIONES_POOL = {
+    'pool_size': 5,          # conexiones abiertas que se reutilizan entre etapas
+    'max_overflow': 5,       # conexiones extra en picos; se cierran al devolverse
+    'pool_timeout': 30,      # segundos de espera por una conexión libre
+    'pool_recycle': 1800,    # renovar antes de que el servidor la corte por wait_timeout
+    'pool_pre_ping': True,   # descartar conexiones caídas antes de entregarlas
+}
+
+# Patrón de extracción de números: MySQL convierte el prefijo numérico ('1.2.3' -> 1.2)
+PREFIJO_NUMERICO = r'^[0-9]*\.?[0-9]*'
+
+
+class DialectoMySQL:
+    """Dialecto de referencia: el SQL original del ETL"""
+
+    nombre = 'mysql'
+    # Carga masiva local disponible (LOAD DATA LOCAL INFILE / DataFrame registrado en DuckDB)
+    carga_local = True
+    sufijo_tabla = " ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+
+    def url(self, db_config):
+        return (f"mysql+mysqlconnector://{db_config['user']}:{db_config['password']}"
+                f"@{db_config['host']}/{db_config['database']}")
+
+    def en_memoria(self, db_config):
+        """La base vive en una sola conexión compartida (sin archivo): no admite hilos concurrentes"""
+        return False
+
+    def crear_motor(self, db_config, modo_carga='lotes', pool=None):
+        """Motor con pool dimensionado; pool sobrescribe claves de OPCIONES_POOL"""
+        connect_args = {'allow_local_infile': True} if modo_carga == 'infile' else {}
+        return create_engine(self.url(db_config), connect_args=connect_args, **opciones_pool(pool))
+
+    def citar(self, nombre):
+        """Identificador entre comillas"""
+        return f"`{nombre}`"
+
+    def numero(self, expresion):
+        """Número contenido en un texto ('20 mnts' -> 20.00)"""
+        return f"CAST(REGEXP_REPLACE({expresion}, '[^0-9.]', '') AS DECIMAL(10,2))"
+
+    def texto_numero(self, expresion):
+        """Texto de un número como lo imprime MySQL (DOUBLE 3.0 -> '3')"""
+        return f"CAST({expresion} AS CHAR)"
+
+    def subcadena(self, expresion, separador, ocurrencia):
+        """SUBSTRING_INDEX(expresion, separador, ocurrencia) con ocurrencia 1 o -1"""
+        return f"SUBSTRING_INDEX({expresion}, '{separador}', {ocurrencia})"
+
+    def con_contenido(self, expresion):
+        """Celda no vacía (MySQL compara '' también contra columnas numéricas)"""
+        return f"{expresion} IS NOT NULL AND {expresion} != ''"
+
+    def fecha(self, expresion):
+        """Fecha sin hora"""
+        return f"DATE({expresion})"
+
+    def fecha_hora(self, expresion):
+        """Fecha con hora comparable con un parámetro datetime"""
+        return expresion
+
+    def inicio_periodo(self, grano, expresion):
+        """Inicio del día, la semana ISO (lunes) o el mes de la fecha"""
+        if grano == 'semana':
+            return f"DATE_SUB(DATE({expresion}), INTERVAL WEEKDAY({expresion}) DAY)"
+        if grano == 'mes':
+            return f"DATE_SUB(DATE({expresion}), INTERVAL DAYOFMONTH({expresion}) - 1 DAY)"
+        return f"DATE({expresion})"
+
+    def clave_texto(self, expresion):
+        """Clave de las dimensiones: sin espacios finales y en minúsculas (limpieza_vectorizada.clave_lookup)"""
+        return f"LOWER(RTRIM({expresion}))"
+
+    def igual_texto(self, izquierda, derecha):
+        """Igualdad de claves de dimensión con la misma regla que el cache en Python.
+
+        Se compara en binario: la collation por defecto (utf8mb4_0900_ai_ci) también
+        ignora acentos y no quita espacios finales (NO PAD), a diferencia de clave_lookup.
+        """
+        return f"{self.clave_texto(izquierda)} = {self.clave_texto(derecha)} COLLATE utf8mb4_bin"
+
+    def columna_autoincremental(self, tabla, columna, tipo):
+        """(sentencias previas, definición) de una clave sustituta autoincremental"""
+        return [], f"{columna} {tipo} NOT NULL AUTO_INCREMENT PRIMARY KEY"
+
+    def insertar_ignorando(self, tabla):
+        """INSERT que descarta filas con clave única duplicada"""
+        return f"INSERT IGNORE INTO {tabla}"
+
+    def columnas(self, conn, tabla):
+        """[(nombre, tipo)] de una tabla, como SHOW COLUMNS"""
+        return [(c['name'], str(c['type'])) for c in inspect(conn).get_columns(tabla)]
+
+    def tiempo_servidor(self, conexion_dbapi, segundos):
+        """Segundos que el servidor dedicó a la última sentencia de la conexión.
+
+        Lee performance_schema.events_statements_history (habilitado por
+        defecto desde MySQL 5.7); None si no está disponible.
+        """
+        try:
+            cursor = conexion_dbapi.cursor()
+            try:
+                cursor.execute(
+                    "SELECT TIMER_WAIT FROM performance_schema.events_statements_history "
+                    "WHERE THREAD_ID = PS_CURRENT_THREAD_ID() ORDER BY EVENT_ID DESC LIMIT 1")
+                fila = cursor.fetchone()
+            finally:
+                cursor.close()
+        except Exception:
+            return None
+        # TIMER_WAIT está en picosegundos
+        return fila[0] / 1e12 if fila and fila[0] is not None else None
+
+    def intercambiar(self, conn, nombre, sombra, indices):
+        """Crea los índices de la sombra y la pone en lugar de la tabla con un RENAME atómico.
+
+        indices(tabla_fisica) devuelve los CREATE INDEX; en MySQL los nombres
+        de índice son locales a la tabla y viajan con ella en el RENAME.
+        """
+        crear_indices(conn, nombre, indices(sombra))
+        vieja = f"{nombre}__vieja"
+        if inspect(conn).has_table(nombre):
+            conn.execute(text(f"RENAME TABLE {nombre} TO {vieja}, {sombra} TO {nombre}"))
+            conn.execute(text(f"DROP TABLE {vieja}"))
+        else:
+            conn.execute(text(f"RENAME TABLE {sombra} TO {nombre}"))
+
+    def intercambiar_varias(self, conn, pares, indices):
+        """Pone todas las sombras [(nombre, sombra)] en lugar de sus tablas con un solo RENAME.
+
+        En MySQL cada sentencia DDL confirma la transacción en curso, así que una
+        etapa no puede deshacer un intercambio ya hecho; un único RENAME TABLE de
+        varias tablas es atómico y deja todas las tablas vigentes o ninguna.
+        indices(nombre, tabla_fisica) devuelve los CREATE INDEX de cada tabla.
+        """
+        if not pares:
+            return
+        for nombre, sombra in pares:
+            crear_indices(conn, nombre, indices(nombre, sombra))
+        renombres, viejas = [], []
+        for nombre, sombra in pares:
+            if inspect(conn).has_table(nombre):
+                renombres.append(f"{nombre} TO {nombre}__vieja")
+                viejas.append(f"{nombre}__vieja")
+            renombres.append(f"{sombra} TO {nombre}")
+        conn.execute(text(f"RENAME TABLE {', '.join(renombres)}"))
+        for vieja in viejas:
+            conn.execute(text(f"DROP TABLE {vieja}"))
+
+
+class DialectoSQLite(DialectoMySQL):
+    """SQLite embebido: REGEXP_REPLACE y SUBSTRING_INDEX se registran como funciones Python"""
+
+    nombre = 'sqlite'
+    carga_local = False
+    sufijo_tabla = ""
+
+    def url(self, db_config):
+        return f"sqlite:///{db_config.get('path') or ':memory:'}"
+
+    def en_memoria(self, db_config):
+        return (db_config.get('path') or ':memory:') == ':memory:'
+
+    def crear_motor(self, db_config, modo_carga='lotes', pool=None):
+        opciones = opciones_pool(pool)
+        if self.en_memoria(db_config):
+            # Una sola conexión compartida: cada conexión nueva sería otra base vacía
+            opciones = {'poolclass': StaticPool, 'connect_args': {'check_same_thread': False}}
+        motor = create_engine(self.url(db_config), **opciones)
+        event.listen(motor, 'connect', registrar_funciones_sqlite)
+        return motor
+
+    def numero(self, expresion):
+        # CAST a REAL toma el prefijo numérico como MySQL ('' -> 0)
+        return f"ROUND(CAST(REGEXP_REPLACE({expresion}, '[^0-9.]', '') AS REAL), 2)"
+
+    def texto_numero(self, expresion):
+        # CAST de REAL (o DOUBLE en DuckDB) a TEXT deja '.0' en los enteros
+        return f"REGEXP_REPLACE(CAST({expresion} AS TEXT), '\\.0$', '')"
+
+    def fecha_hora(self, expresion):
+        # Texto ISO normalizado: '2024-05-01' y '2024-05-01 00:00:00.000' comparan como el parámetro
+        return f"DATETIME({expresion})"
+
+    def inicio_periodo(self, grano, expresion):
+        if grano == 'semana':
+            # Siguiente domingo (o el mismo) menos 6 días: el lunes de la semana
+            return f"DATE({expresion}, 'weekday 0', '-6 days')"
+        if grano == 'mes':
+            return f"DATE({expresion}, 'start of month')"
+        return f"DATE({expresion})"
+
+    def clave_texto(self, expresion):
+        # LOWER y NOCASE de SQLite solo pasan a minúsculas ASCII ('Ñ' queda igual)
+        return f"CLAVE_LOOKUP({expresion})"
+
+    def igual_texto(self, izquierda, derecha):
+        return f"{self.clave_texto(izquierda)} = {self.clave_texto(derecha)}"
+
+    def columna_autoincremental(self, tabla, columna, tipo):
+        # Solo INTEGER PRIMARY KEY es alias del rowid autoincremental
+        return [], f"{columna} INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    def insertar_ignorando(self, tabla):
+        return f"INSERT OR IGNORE INTO {tabla}"
+
+    def tiempo_servidor(self, conexion_dbapi, segundos):
+        # Motor en proceso: el tiempo del servidor es el de la llamada
+        return segundos
+
+    def intercambiar(self, conn, nombre, sombra, indices):
+        # DDL transaccional: DROP + RENAME dentro de la transacción es atómico.
+        # Los nombres de índice son globales, así que se crean tras el RENAME.
+        conn.execute(text(f"DROP TABLE IF EXISTS {nombre}"))
+        conn.execute(text(f"ALTER TABLE {sombra} RENAME TO {nombre}"))
+        crear_indices(conn, nombre, indices(nombre))
+
+    def intercambiar_varias(self, conn, pares, indices):
+        # Todo queda en la misma transacción: el commit de la etapa los publica juntos
+        for nombre, sombra in pares:
+            self.intercambiar(conn, nombre, sombra, lambda fisica, nombre=nombre: indices(nombre, fisica))
+
+
+class DialectoDuckDB(DialectoSQLite):
+    """DuckDB embebido (columnar); requiere el paquete duckdb_engine"""
+
+    nombre = 'duckdb'
+    carga_local = True
+
+    def url(self, db_config):
+        return f"duckdb:///{db_config.get('path') or ':memory:'}"
+
+    def crear_motor(self, db_config, modo_carga='lotes', pool=None):
+        if duckdb_engine is None:
+            raise ImportError("El backend duckdb requiere 'pip install duckdb duckdb_engine'")
+        opciones = {'poolclass': StaticPool} if self.en_memoria(db_config) else opciones_pool(pool)
+        return create_engine(self.url(db_config), **opciones)
+
+    def citar(self, nombre):
+        return f'"{nombre}"'
+
+    def numero(self, expresion):
+        limpio = f"REGEXP_REPLACE(CAST({expresion} AS VARCHAR), '[^0-9.]', '', 'g')"
+        valor = f"TRY_CAST(REGEXP_EXTRACT({limpio}, '{PREFIJO_NUMERICO}') AS DECIMAL(10,2))"
+        return f"CASE WHEN {expresion} IS NULL THEN NULL ELSE COALESCE({valor}, 0) END"
+
+    def con_contenido(self, expresion):
+        return f"{expresion} IS NOT NULL AND CAST({expresion} AS VARCHAR) != ''"
+
+    def subcadena(self, expresion, separador, ocurrencia):
+        partes = f"STRING_SPLIT(CAST({expresion} AS VARCHAR), '{separador}')"
+        return f"{partes}[{1 if ocurrencia > 0 else -1}]"
+
+    def fecha(self, expresion):
+        return f"CAST(TRY_CAST({expresion} AS TIMESTAMP) AS DATE)"
+
+    def fecha_hora(self, expresion):
+        return f"TRY_CAST({expresion} AS TIMESTAMP)"
+
+    def inicio_periodo(self, grano, expresion):
+        if grano in ('semana', 'mes'):
+            unidad = 'week' if grano == 'semana' else 'month'
+            return f"CAST(DATE_TRUNC('{unidad}', {self.fecha(expresion)}) AS DATE)"
+        return self.fecha(expresion)
+
+    def clave_texto(self, expresion):
+        # LOWER de DuckDB ya es Unicode
+        return f"LOWER(RTRIM({expresion}))"
+
+    def columnas(self, conn, tabla):
+        # El inspector de duckdb_engine consulta catálogos de PostgreSQL que DuckDB no tiene
+        result = conn.execute(text(
+            "SELECT column_name, data_type FROM information_schema.columns "
+            "WHERE table_name = :tabla ORDER BY ordinal_position"), {'tabla': tabla})
+        return [(nombre, tipo) for nombre, tipo in result.fetchall()]
+
+    def columna_autoincremental(self, tabla, columna, tipo):
+        secuencia = f"seq_{tabla}_{columna}"
+        return ([f"CREATE SEQUENCE IF NOT EXISTS {secuencia}"],
+                f"{columna} {tipo} DEFAULT nextval('{secuencia}') PRIMARY KEY")
+
+
+DIALECTOS = {
+    'mysql': DialectoMySQL(),
+    'sqlite': DialectoSQLite(),
+    'duckdb': DialectoDuckDB(),
+}
+
+MYSQL = DIALECTOS['mysql']
+
+
+def obtener(nombre):
+    """Dialecto por nombre ('mysql', 'sqlite' o 'duckdb')"""
+    try:
+        return DIALECTOS[nombre]
+    except KeyError:
+        raise ValueError(f"Backend desconocido: {nombre} (opciones: {', '.join(DIALECTOS)})")
+
+
+def embebido_por_defecto():
+    """DuckDB si está instalado; si no, SQLite (biblioteca estándar)"""
+    return 'duckdb' if duckdb_engine is not None else 'sqlite'
+
+
+def opciones_pool(pool=None):
+    """Argumentos de create_engine para el pool: OPCIONES_POOL con las claves de pool sobrescritas"""
+    return {**OPCIONES_POOL, **{k: v for k, v in (pool or {}).items() if v is not None}}
+
+
+def crear_indices(conn, nombre, sentencias):
+    for indice in sentencias:
+        try:
+            conn.execute(text(indice))
+        except Exception as e:
+            logger.warning(f"⚠️  No se pudo crear el índice de {nombre}: {e}")
+
+
+def _regexp_replace(valor, patron, reemplazo):
+    if valor is None:
+        return None
+    return re.sub(patron, reemplazo, str(valor))
+
+
+def _substring_index(valor, separador, ocurrencia):
+    """SUBSTRING_INDEX de MySQL: texto antes de la n-ésima aparición (o después, si n < 0)"""
+    if valor is None or separador is None or ocurrencia is None:
+        return None
+    partes = str(valor).split(separador)
+    if ocurrencia == 0:
+        return ''
+    if ocurrencia > 0:
+        return separador.join(partes[:ocurrencia])
+    return separador.join(partes[ocurrencia:])
+
+
+def _clave_lookup(valor):
+    """limpieza_vectorizada.clave_lookup para SQLite (NULL se conserva)"""
+    if valor is None:
+        return None
+    return str(valor).rstrip(' ').lower()
+
+
+def registrar_funciones_sqlite(conexion_dbapi, _registro):
+    """Funciones de MySQL que SQLite no trae"""
+    conexion_dbapi.create_function('CLAVE_LOOKUP', 1, _clave_lookup, deterministic=True)
+    conexion_dbapi.create_function('REGEXP_REPLACE', 3, _regexp_replace, deterministic=True)
+    conexion_dbapi.create_function('SUBSTRING_INDEX', 3, _substring_index, deterministic=True)
@@ -0,0 +1,347 @@
+# benchmark.py
+"""Benchmark reproducible de las etapas del ETL con los extractos CSV de database/.
+
+Une PRODUCCION_OPERARIOS, el tiempo de paro de PRODUCCION_MAQUINA y los
+códigos de PORCENTAJE_CODIGOS_PARO en un libro sintético, lo escala
+replicando máquinas y fechas (10×, 100×, 1000×) y ejecuta el ETL real
+(TemperasVinilosETL.ejecutar_etl) sobre él. Los tiempos salen de las etapas
+que el propio ETL mide con medir_etapa: lectura (detección de encabezado y
+limpieza de columnas), carga cruda, dimensiones, tabla limpia, códigos de
+paro, tablas específicas, fact_paros, hechos dimensionales, resúmenes, OEE
+y huellas.
+
+El reporte JSON guarda filas/s y latencia p50/p95 por etapa y escala, la
+memoria asignada en cada etapa (tracemalloc, en una corrida aparte que no
+entra en los tiempos) y el pico RSS del proceso al terminarla; con
+--baseline se compara contra una corrida guardada.
+
+    python etl/benchmark.py --backend embebido --escalas 1 10 --repeticiones 3
+    python etl/benchmark.py --baseline benchmark_baseline.json
+"""
+import argparse
+from contextlib import contextmanager
+import json
+import logging
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import backends
+from etl_structured import TemperasVinilosETL
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_DATOS = Path(__file__).resolve().parent.parent / 'database'
+
+# Las fechas se replican a lo sumo 10 veces (desplazadas de a 4 años para
+# conservar el mes); el resto del factor se obtiene replicando máquinas
+MAX_REPLICAS_FECHA = 10
+ANOS_POR_REPLICA = 4
+
+FORMATO_FECHA = '%Y-%m-%d %H:%M:%S.000'
+
+
+def cargar_libro_base(directorio=DIRECTORIO_DATOS):
+    """Libro sintético con el formato de la hoja 'Base De Datos' a partir de los CSV"""
+    directorio = Path(directorio)
+    operarios = pd.read_csv(directorio / 'PRODUCCION_OPERARIOS.csv')
+    maquina = pd.read_csv(directorio / 'PRODUCCION_MAQUINA.csv')
+    paros = pd.read_csv(directorio / 'PORCENTAJE_CODIGOS_PARO.csv')
+
+    filas = min(len(operarios), len(maquina), len(paros))
+    libro = operarios.iloc[:filas].reset_index(drop=True)
+    libro['Tiempo de Paro'] = maquina['Tiempo de Paro'].iloc[:filas].to_numpy()
+    codigos = paros.iloc[:filas].drop(columns=['Tiempo de Paro']).reset_index(drop=True)
+    return pd.concat([libro, codigos], axis=1)
+
+
+def escalar(libro, factor):
+    """Replica el libro factor veces con máquinas y fechas nuevas"""
+    if factor <= 1:
+        return libro.copy()
+    replicas_fecha = min(factor, MAX_REPLICAS_FECHA)
+    replicas_maquina = -(-factor // replicas_fecha)
+    fecha = pd.to_datetime(libro['Fecha'], errors='coerce')
+
+    partes = []
+    for i in range(factor):
+        parte = libro.copy()
+        desplazamiento, copia_maquina = divmod(i, replicas_maquina)
+        if desplazamiento:
+            nueva = fecha + pd.DateOffset(years=ANOS_POR_REPLICA * desplazamiento)
+            parte['Fecha'] = nueva.dt.strftime(FORMATO_FECHA).where(fecha.notna(), libro['Fecha'])
+        if copia_maquina:
+            parte['Maquina'] = libro['Maquina'].astype(object) + f"_{copia_maquina}"
+        partes.append(parte)
+    return pd.concat(partes, ignore_index=True)
+
+
+def filas_libro(libro):
+    """Filas como las entrega openpyxl: título, fila vacía, encabezado y datos"""
+    datos = libro.astype(object).where(libro.notna(), None)
+    return ([('SEGUIMIENTO TEMPERAS Y VINILOS',), (), tuple(libro.columns)]
+            + list(datos.itertuples(index=False, name=None)))
+
+
+def percentil(valores, q):
+    return float(np.percentile(valores, q)) if valores else None
+
+
+class ETLMedido(TemperasVinilosETL):
+    """ETL que lee el libro sintético desde memoria y mide la memoria asignada por etapa.
+
+    Con tracemalloc activo cada etapa anota 'memoria_mb': el pico de memoria
+    asignada por Python (incluye los buffers de pandas/NumPy, no la memoria
+    nativa del motor de base de datos) por encima de la que había al empezar.
+    """
+
+    def __init__(self, filas, **kwargs):
+        super().__init__(**kwargs)
+        self.filas = filas
+        # [memoria al empezar, pico visto] de cada etapa abierta
+        self.pila_memoria = []
+
+    def validate_file_path(self):
+        # El libro no está en disco: lo entrega read_excel_raw
+        return True
+
+    def read_excel_raw(self):
+        """Construye el DataFrame a partir de las filas en memoria, como leer_excel_streaming"""
+        with self.medir_etapa('deteccion_encabezado'):
+            primeras_filas = self.filas[:10]
+            inicio = self.find_data_start_row(pd.DataFrame(primeras_filas))
+            self.encabezado_detectado = True
+            df = self.construir_dataframe(primeras_filas[inicio], self.filas[inicio + 1:])
+        with self.medir_etapa('limpieza_columnas'):
+            self.dataframe = self.limpiar_columnas(df)
+        return True
+
+    @contextmanager
+    def medir_etapa(self, nombre):
+        with super().medir_etapa(nombre) as metrica:
+            if not tracemalloc.is_tracing():
+                yield metrica
+                return
+            actual, pico = tracemalloc.get_traced_memory()
+            # reset_peak borra el pico de la etapa contenedora: se guarda antes
+            if self.pila_memoria:
+                self.pila_memoria[-1][1] = max(self.pila_memoria[-1][1], pico)
+            tracemalloc.reset_peak()
+            self.pila_memoria.append([actual, actual])
+            try:
+                yield metrica
+            finally:
+                base, visto = self.pila_memoria.pop()
+                pico = max(visto, tracemalloc.get_traced_memory()[1])
+                metrica['memoria_mb'] = (pico - base) / (1024 * 1024)
+                if self.pila_memoria:
+                    self.pila_memoria[-1][1] = max(self.pila_memoria[-1][1], pico)
+
+
+class Benchmark:
+    """Mide las etapas del ETL sobre libros escalados contra un backend"""
+
+    def __init__(self, backend='sqlite', db_config=None, motor_limpieza='sql',
+                 modo_carga='infile', tamano_lote=5000, medir_memoria=True):
+        self.backend = backend
+        self.db_config = db_config or {}
+        self.motor_limpieza = motor_limpieza
+        self.modo_carga = modo_carga
+        self.tamano_lote = tamano_lote
+        self.medir_memoria = medir_memoria
+
+    def ejecutar(self, libro, memoria=False):
+        """Una corrida completa del ETL: las métricas de medir_etapa en orden de ejecución"""
+        etl = ETLMedido(filas_libro(libro), db_config=self.db_config, modo_carga=self.modo_carga,
+                        tamano_lote=self.tamano_lote, motor_limpieza=self.motor_limpieza,
+                        backend=self.backend, verbosidad='silencioso')
+        if memoria:
+            tracemalloc.start()
+        try:
+            if not etl.run_etl():
+                raise RuntimeError(f"Falló el ETL contra el backend {self.backend}")
+        finally:
+            if memoria:
+                tracemalloc.stop()
+            if etl.engine is not None:
+                etl.engine.dispose()
+        return etl.metricas_etapas
+
+    def medir_escala(self, libro_base, factor, repeticiones):
+        """p50/p95, filas/s y memoria de cada etapa para un factor de escala"""
+        libro = escalar(libro_base, factor)
+        filas = len(libro)
+        print(f"\n📏 Escala {factor}×: {filas} filas, {repeticiones} repeticiones")
+
+        corridas = []
+        for repeticion in range(1, repeticiones + 1):
+            metricas = self.ejecutar(libro)
+            corridas.append(metricas)
+            total = sum(m['segundos'] for m in metricas if m['nivel'] == 0)
+            print(f"   #{repeticion}: {total:.2f}s ({filas / total:,.0f} filas/s)")
+
+        memoria = {}
+        if self.medir_memoria:
+            # Corrida aparte: tracemalloc hace más lento el código Python y no debe entrar en los tiempos
+            for metrica in self.ejecutar(libro, memoria=True):
+                memoria[metrica['etapa']] = max(memoria.get(metrica['etapa'], 0.0), metrica['memoria_mb'])
+            print(f"   memoria: {max(memoria.values(), default=0.0):.1f} MB asignados como máximo en una etapa")
+
+        # Una etapa puede ejecutarse más de una vez por corrida: se suman sus tiempos
+        etapas = {}
+        for metricas in corridas:
+            vistas = {}
+            for metrica in metricas:
+                etapa = etapas.setdefault(metrica['etapa'], {'nivel': metrica['nivel'], 'segundos': [], 'picos': []})
+                vistas[metrica['etapa']] = vistas.get(metrica['etapa'], 0.0) + metrica['segundos']
+                if metrica['pico_mb'] is not None:
+                    etapa['picos'].append(metrica['pico_mb'])
+            for nombre, segundos in vistas.items():
+                etapas[nombre]['segundos'].append(segundos)
+
+        resultado = {}
+        for nombre, etapa in etapas.items():
+            p50 = percentil(etapa['segundos'], 50)
+            resultado[nombre] = {
+                'nivel': etapa['nivel'],
+                'p50_s': p50,
+                'p95_s': percentil(etapa['segundos'], 95),
+                'filas_por_s': filas / p50 if p50 else None,
+                'memoria_etapa_mb': memoria.get(nombre),
+                'pico_rss_proceso_mb': max(etapa['picos']) if etapa['picos'] else None,
+            }
+        totales = [sum(m['segundos'] for m in metricas if m['nivel'] == 0) for metricas in corridas]
+        return {
+            'factor': factor,
+            'filas': filas,
+            'repeticiones': repeticiones,
+            'etapas': resultado,
+            'total': {
+                'p50_s': percentil(totales, 50),
+                'p95_s': percentil(totales, 95),
+                'filas_por_s': filas / percentil(totales, 50),
+            },
+        }
+
+    def reporte(self, libro_base, escalas, repeticiones):
+        return {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'entorno': {
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'plataforma': platform.platform(),
+                'backend': self.backend,
+                'motor_limpieza': self.motor_limpieza,
+                'modo_carga': self.modo_carga,
+            },
+            'escalas': {str(factor): self.medir_escala(libro_base, factor, repeticiones)
+                        for factor in escalas},
+        }
+
+
+def comparar(reporte, baseline, tolerancia=0.10):
+    """Etapas cuyo p50 empeoró más que la tolerancia: [(escala, etapa, antes, ahora, cambio)]"""
+    regresiones = []
+    print(f"\n📊 COMPARACIÓN CONTRA BASELINE ({baseline.get('fecha', 's/f')}):")
+    for escala, actual in reporte['escalas'].items():
+        previa = baseline.get('escalas', {}).get(escala)
+        if previa is None:
+            print(f"   ⚠️  Escala {escala}× no está en el baseline")
+            continue
+        for etapa in (*actual['etapas'], 'total'):
+            antes = (previa['total'] if etapa == 'total' else previa['etapas'].get(etapa, {})).get('p50_s')
+            ahora = (actual['total'] if etapa == 'total' else actual['etapas'][etapa])['p50_s']
+            if not antes or ahora is None:
+                continue
+            cambio = ahora / antes - 1
+            marca = '❌' if cambio > tolerancia else ('🚀' if cambio < -tolerancia else '✅')
+            print(f"   {marca} {escala + '×':>6} {etapa:<24} {antes:8.3f}s -> {ahora:8.3f}s ({cambio:+.1%})")
+            if cambio > tolerancia:
+                regresiones.append((escala, etapa, antes, ahora, cambio))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de etapas del ETL con los CSV de database/')
+    parser.add_argument('--datos', default=str(DIRECTORIO_DATOS), help='Directorio con los CSV de entrada')
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help='Factores de escala del libro (replicando máquinas y fechas)')
+    parser.add_argument('--repeticiones', type=int, default=3, help='Corridas por escala para p50/p95')
+    parser.add_argument('--backend', choices=list(backends.DIALECTOS) + ['embebido'], default='embebido',
+                        help='Backend medido (embebido = DuckDB si está instalado, si no SQLite)')
+    parser.add_argument('--db-path', help='Archivo de la base embebida (por defecto en memoria)')
+    parser.add_argument('--db-host', default='localhost', help='Host de MySQL')
+    parser.add_argument('--db-user', help='Usuario de MySQL')
+    parser.add_argument('--db-password', help='Contraseña de MySQL')
+    parser.add_argument('--db-name', default='TEMPERAS_BENCH', help='Base de MySQL del benchmark')
+    parser.add_argument('--motor-limpieza', choices=['sql', 'python'], default='sql')
+    parser.add_argument('--modo-carga', choices=['infile', 'lotes', 'to_sql'], default='infile')
+    parser.add_argument('--sin-memoria', action='store_true',
+                        help='Omite la corrida adicional con tracemalloc que mide la memoria por etapa')
+    parser.add_argument('--salida', default='benchmark_reporte.json', help='Reporte JSON de esta corrida')
+    parser.add_argument('--baseline', help='Reporte JSON previo contra el que comparar')
+    parser.add_argument('--guardar-baseline', action='store_true',
+                        help='Guarda esta corrida como baseline (en la ruta de --baseline)')
+    parser.add_argument('--tolerancia', type=float, default=0.10,
+                        help='Empeoramiento relativo del p50 que cuenta como regresión')
+    args = parser.parse_args()
+    if args.guardar_baseline and not args.baseline:
+        # Validado antes del benchmark: no se descubre después de minutos de corrida
+        parser.error('--guardar-baseline requiere --baseline (ruta donde guardarlo)')
+
+    # Solo advertencias: el log por etapa del ETL distorsiona los tiempos
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.backend == 'embebido':
+        args.backend = backends.embebido_por_defecto()
+    db_config = {'host': args.db_host, 'database': args.db_name, 'path': args.db_path,
+                 'user': args.db_user, 'password': args.db_password}
+
+    libro_base = cargar_libro_base(args.datos)
+    print(f"📚 Libro base: {len(libro_base)} filas × {libro_base.shape[1]} columnas ({args.backend})")
+
+    benchmark = Benchmark(args.backend, db_config, args.motor_limpieza, args.modo_carga,
+                          medir_memoria=not args.sin_memoria)
+    reporte = benchmark.reporte(libro_base, sorted(args.escalas), args.repeticiones)
+
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+    print(f"\n💾 Reporte guardado en {args.salida}")
+
+    for escala, resultado in reporte['escalas'].items():
+        print(f"\n⏱️  {escala}× ({resultado['filas']} filas):")
+        for etapa, metrica in resultado['etapas'].items():
+            memoria = metrica['memoria_etapa_mb']
+            memoria_txt = f"{memoria:8.1f} MB" if memoria is not None else "     n/d"
+            pico = metrica['pico_rss_proceso_mb']
+            pico_txt = f"{pico:8.1f} MB" if pico is not None else "     n/d"
+            por_s = metrica['filas_por_s']
+            por_s_txt = f"{por_s:>12,.0f}" if por_s is not None else f"{'n/d':>12}"
+            nombre = '  ' * metrica['nivel'] + etapa
+            print(f"   {nombre:<26} p50 {metrica['p50_s']:8.3f}s  p95 {metrica['p95_s']:8.3f}s  "
+                  f"{por_s_txt} filas/s  etapa {memoria_txt}  pico proceso {pico_txt}")
+        print("   (etapa: memoria asignada por Python en la etapa; pico proceso: RSS máximo desde el inicio)")
+
+    if not args.baseline:
+        return 0
+    ruta_baseline = Path(args.baseline)
+    if args.guardar_baseline or not ruta_baseline.exists():
+        ruta_baseline.write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"📌 Baseline guardado en {ruta_baseline}")
+        return 0
+    regresiones = comparar(reporte, json.loads(ruta_baseline.read_text(encoding='utf-8')), args.tolerancia)
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} etapas más lentas que el baseline (tolerancia {args.tolerancia:.0%})")
+        return 1
+    print("\n✅ Sin regresiones respecto al baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
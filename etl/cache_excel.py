@@ -0,0 +1,165 @@
+# cache_excel.py
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# infer_dtype de las columnas que mezclan texto, números, fechas o booleanos (Arrow las rechaza)
+TIPOS_MEZCLADOS = ('mixed', 'mixed-integer')
+
+
+def normalizar_tipos(df):
+    """Convierte a texto las columnas con tipos mezclados.
+
+    Se aplica al leer el libro con y sin cache: el ETL recibe los mismos tipos
+    en una ejecución cacheada que en una que abre el Excel.
+    """
+    mezcladas = [col for col in df.columns
+                 if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) in TIPOS_MEZCLADOS]
+    if not mezcladas:
+        return df
+    df = df.copy()
+    for col in mezcladas:
+        df[col] = df[col].map(lambda v: str(v) if pd.notna(v) else None)
+    return df
+
+
+class CacheExcel:
+    """Cache columnar (Arrow IPC) de libros Excel ya parseados"""
+
+    ARCHIVO_INDICE = "indice.json"
+
+    def __init__(self, directorio=".cache_etl", max_entradas=5):
+        self.directorio = Path(directorio)
+        self.max_entradas = max_entradas
+
+    @property
+    def disponible(self):
+        return pa is not None
+
+    def hash_contenido(self, ruta, bloque=1024 * 1024):
+        """Calcula el SHA-256 del contenido del archivo"""
+        digest = hashlib.sha256()
+        with open(ruta, 'rb') as f:
+            for parte in iter(lambda: f.read(bloque), b''):
+                digest.update(parte)
+        return digest.hexdigest()
+
+    def clave(self, ruta):
+        """Clave del cache: ruta, tamaño, mtime y hash del contenido"""
+        ruta = str(Path(ruta).resolve())
+        info = os.stat(ruta)
+        contenido = self.hash_contenido(ruta)
+        base = f"{ruta}|{info.st_size}|{info.st_mtime_ns}|{contenido}"
+        return hashlib.sha256(base.encode('utf-8')).hexdigest()[:32]
+
+    def leer_indice(self):
+        archivo = self.directorio / self.ARCHIVO_INDICE
+        if not archivo.exists():
+            return {}
+        try:
+            with open(archivo, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            logger.warning("⚠️  Índice de cache ilegible, se reconstruye")
+            return {}
+
+    def guardar_indice(self, indice):
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        archivo = self.directorio / self.ARCHIVO_INDICE
+        temporal = archivo.with_suffix('.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(indice, f, indent=2)
+        os.replace(temporal, archivo)
+
+    def obtener(self, ruta):
+        """Devuelve el DataFrame cacheado o None si no hay entrada.
+
+        El archivo se abre con memory_map y se deserializa el IPC; to_pandas copia
+        las columnas a bloques de pandas (no es una lectura perezosa sobre el mmap),
+        pero sin consolidarlos y liberando cada buffer Arrow al convertirlo.
+        """
+        if not self.disponible:
+            return None
+
+        clave = self.clave(ruta)
+        indice = self.leer_indice()
+        entrada = indice.get(clave)
+        archivo = self.directorio / f"{clave}.arrow"
+        if entrada is None or not archivo.exists():
+            return None
+
+        with pa.memory_map(str(archivo), 'r') as fuente:
+            tabla = pa.ipc.open_file(fuente).read_all()
+        df = tabla.to_pandas(split_blocks=True, self_destruct=True)
+        del tabla
+
+        entrada['ultimo_uso'] = time.time()
+        self.guardar_indice(indice)
+        logger.info(f"⚡ Cache encontrado para {ruta} ({len(df)} filas)")
+        return df
+
+    def normalizar(self, df):
+        """normalizar_tipos y, por si Arrow rechaza otra combinación, texto en esa columna"""
+        df = normalizar_tipos(df).copy()
+        for col in df.columns:
+            if df[col].dtype != object:
+                continue
+            try:
+                pa.array(df[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                df[col] = df[col].map(lambda v: str(v) if pd.notna(v) else None)
+        return df
+
+    def guardar(self, ruta, df):
+        """Guarda el DataFrame en el cache y aplica el límite de entradas.
+
+        Devuelve el DataFrame normalizado, idéntico al que se leerá en un acierto.
+        """
+        if not self.disponible:
+            return df
+
+        df = self.normalizar(df)
+        clave = self.clave(ruta)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        archivo = self.directorio / f"{clave}.arrow"
+
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        temporal = archivo.with_suffix('.tmp')
+        with pa.OSFile(str(temporal), 'wb') as sink:
+            with pa.ipc.new_file(sink, tabla.schema) as writer:
+                writer.write_table(tabla)
+        os.replace(temporal, archivo)
+
+        info = os.stat(ruta)
+        indice = self.leer_indice()
+        indice[clave] = {
+            'ruta': str(Path(ruta).resolve()),
+            'tamano': info.st_size,
+            'mtime': info.st_mtime,
+            'ultimo_uso': time.time()
+        }
+        self.purgar(indice)
+        self.guardar_indice(indice)
+        logger.info(f"💾 Cache guardado: {archivo.name}")
+        return df
+
+    def purgar(self, indice):
+        """Elimina las entradas menos usadas por encima de max_entradas"""
+        sobrantes = sorted(indice, key=lambda c: indice[c]['ultimo_uso'], reverse=True)[self.max_entradas:]
+        for clave in sobrantes:
+            archivo = self.directorio / f"{clave}.arrow"
+            if archivo.exists():
+                archivo.unlink()
+            del indice[clave]
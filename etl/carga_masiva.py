@@ -0,0 +1,226 @@
+# carga_masiva.py
+import csv
+import logging
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+import backends
+
+logger = logging.getLogger(__name__)
+
+# Longitud máxima para usar VARCHAR; por encima se usa TEXT
+MAX_VARCHAR = 1024
+
+
+def tipo_mysql(serie):
+    """Devuelve el tipo MySQL explícito para una columna del DataFrame"""
+    if pd.api.types.is_bool_dtype(serie):
+        return "TINYINT(1)"
+    if pd.api.types.is_integer_dtype(serie):
+        minimo, maximo = (serie.min(), serie.max()) if serie.notna().any() else (0, 0)
+        if -32768 <= minimo and maximo <= 32767:
+            return "SMALLINT"
+        if -2147483648 <= minimo and maximo <= 2147483647:
+            return "INT"
+        return "BIGINT"
+    if pd.api.types.is_float_dtype(serie):
+        return "DOUBLE"
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return "DATETIME"
+
+    # Texto o columnas mezcladas: VARCHAR ajustado a la longitud real
+    longitudes = serie.dropna().astype(str).str.len()
+    longitud = int(longitudes.max()) if len(longitudes) else 0
+    if longitud > MAX_VARCHAR:
+        return "TEXT"
+    # Redondear a múltiplos de 32 para tolerar cambios pequeños entre cargas
+    return f"VARCHAR({max(32, -(-longitud // 32) * 32)})"
+
+
+def tipo_dominio(serie):
+    """Tipo MySQL del dominio de la columna, no de los valores de esta carga.
+
+    Para tablas que reciben filas en cargas posteriores (cruda, incremental,
+    demonio): los enteros son BIGINT, los reales DOUBLE y el texto TEXT, así
+    un id mayor, un número más grande o una celda más larga siguen cabiendo.
+    """
+    if pd.api.types.is_bool_dtype(serie):
+        return "TINYINT(1)"
+    if pd.api.types.is_integer_dtype(serie):
+        return "BIGINT"
+    if pd.api.types.is_float_dtype(serie):
+        return "DOUBLE"
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return "DATETIME"
+    return "TEXT"
+
+
+def familia_tipo(tipo):
+    """'entero', 'real', 'fecha' o 'texto' de un tipo SQL de cualquier backend"""
+    tipo = str(tipo).upper()
+    if 'INT' in tipo:
+        return 'entero'
+    if any(nombre in tipo for nombre in ('DOUBLE', 'FLOAT', 'REAL', 'DECIMAL', 'NUMERIC')):
+        return 'real'
+    if 'DATE' in tipo or 'TIME' in tipo:
+        return 'fecha'
+    return 'texto'
+
+
+def columnas_incompatibles(df, tipos_tabla):
+    """Columnas del DataFrame cuyo tipo de dominio no cabe en el tipo guardado en la tabla"""
+    incompatibles = []
+    for col in df.columns:
+        nuevo = familia_tipo(tipo_dominio(df[col]))
+        guardado = familia_tipo(tipos_tabla.get(col, ''))
+        # Un entero cabe en una columna real; cualquier otro cambio de familia no
+        if nuevo != guardado and (nuevo, guardado) != ('entero', 'real'):
+            incompatibles.append(col)
+    return incompatibles
+
+
+def generar_ddl(df, tabla, tipos=None, dialecto=backends.MYSQL, dominio=False):
+    """Genera el CREATE TABLE tipado; tipos permite fijar el tipo de columnas concretas.
+
+    dominio=True usa tipo_dominio (tablas a las que se agregan filas) en lugar
+    de ajustar cada tipo a los valores del DataFrame.
+    """
+    tipos = tipos or {}
+    citar = dialecto.citar
+    tipo_columna = tipo_dominio if dominio else tipo_mysql
+    columnas = [f"    {citar(col)} {tipos.get(col) or tipo_columna(df[col])} NULL" for col in df.columns]
+    return (
+        f"CREATE TABLE {citar(tabla)} (\n"
+        + ",\n".join(columnas)
+        + f"\n){dialecto.sufijo_tabla}"
+    )
+
+
+def crear_tabla(conn, df, tabla, tipos=None, dialecto=backends.MYSQL, dominio=False):
+    """Recrea la tabla con DDL explícito (equivalente a if_exists='replace')"""
+    conn.execute(text(f"DROP TABLE IF EXISTS {dialecto.citar(tabla)}"))
+    conn.execute(text(generar_ddl(df, tabla, tipos, dialecto, dominio)))
+
+
+def valores_python(df):
+    """Convierte el DataFrame en tuplas con tipos nativos y None en lugar de NaN"""
+    objeto = df.astype(object)
+    objeto = objeto.where(df.notna(), None)
+    for fila in objeto.itertuples(index=False, name=None):
+        yield tuple(v.item() if isinstance(v, np.generic) else
+                    v.to_pydatetime() if isinstance(v, pd.Timestamp) else v
+                    for v in fila)
+
+
+def texto_columna(serie):
+    """str() de cada celda con una sola conversión de la columna (los nulos quedan nulos)"""
+    return serie.astype(object).astype(str).where(serie.notna(), None)
+
+
+def escapar_texto(serie):
+    """Escapa caracteres especiales según el formato por defecto de LOAD DATA"""
+    return (serie.str.replace('\\', '\\\\', regex=False)
+                 .str.replace('\t', '\\t', regex=False)
+                 .str.replace('\n', '\\n', regex=False)
+                 .str.replace('\r', '\\r', regex=False))
+
+
+def escribir_archivo_delimitado(df, ruta):
+    """Escribe el DataFrame como archivo separado por tabuladores para LOAD DATA"""
+    salida = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        serie = df[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.astype(object)
+        if serie.dtype == np.float32:
+            # El texto de float32 es su repr corta, no el valor exacto en DOUBLE
+            serie = serie.astype(np.float64)
+        if pd.api.types.is_bool_dtype(serie):
+            salida[col] = serie.astype('Int8')
+        elif pd.api.types.is_numeric_dtype(serie) or pd.api.types.is_datetime64_any_dtype(serie):
+            salida[col] = serie
+        else:
+            salida[col] = escapar_texto(texto_columna(serie))
+
+    salida.to_csv(
+        ruta, sep='\t', header=False, index=False, na_rep='\\N',
+        quoting=csv.QUOTE_NONE, lineterminator='\n',
+        date_format='%Y-%m-%d %H:%M:%S', encoding='utf-8'
+    )
+
+
+def cargar_load_data(conn, df, tabla):
+    """Carga con LOAD DATA LOCAL INFILE desde un archivo temporal"""
+    descriptor, ruta = tempfile.mkstemp(prefix='etl_carga_', suffix='.tsv')
+    os.close(descriptor)
+    try:
+        escribir_archivo_delimitado(df, ruta)
+        columnas = ', '.join(f"`{col}`" for col in df.columns)
+        ruta_sql = ruta.replace('\\', '/')
+        resultado = conn.execute(text(
+            f"LOAD DATA LOCAL INFILE '{ruta_sql}' INTO TABLE `{tabla}` "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+            "LINES TERMINATED BY '\\n' "
+            f"({columnas})"
+        ))
+        return resultado.rowcount
+    finally:
+        os.remove(ruta)
+
+
+def cargar_registrado(conn, df, tabla, dialecto):
+    """Carga en DuckDB registrando el DataFrame como vista y con un único INSERT ... SELECT"""
+    salida = df.copy()
+    for col in salida.columns:
+        # Las columnas object mezclan tipos; DuckDB las recibe como texto y convierte al insertar
+        if salida[col].dtype == object or isinstance(salida[col].dtype, pd.CategoricalDtype):
+            salida[col] = texto_columna(salida[col])
+    vista = f"etl_df_{id(salida)}"
+    duckdb = conn.connection.driver_connection
+    duckdb.register(vista, salida)
+    try:
+        columnas = ', '.join(dialecto.citar(col) for col in df.columns)
+        conn.execute(text(f"INSERT INTO {dialecto.citar(tabla)} ({columnas}) SELECT {columnas} FROM {vista}"))
+    finally:
+        duckdb.unregister(vista)
+    return len(df)
+
+
+def cargar_local(conn, df, tabla, dialecto=backends.MYSQL):
+    """Carga masiva propia del backend: LOAD DATA LOCAL INFILE o el DataFrame registrado en DuckDB"""
+    if dialecto.nombre == 'duckdb':
+        return cargar_registrado(conn, df, tabla, dialecto)
+    return cargar_load_data(conn, df, tabla)
+
+
+def cargar_executemany(conn, df, tabla, tamano_lote=5000, dialecto=backends.MYSQL):
+    """Carga con INSERT multi-fila en lotes grandes (executemany)"""
+    columnas = ', '.join(dialecto.citar(col) for col in df.columns)
+    marcadores = ', '.join(f":c{i}" for i in range(len(df.columns)))
+    insert = text(f"INSERT INTO {dialecto.citar(tabla)} ({columnas}) VALUES ({marcadores})")
+
+    total = 0
+    lote = []
+    for fila in valores_python(df):
+        lote.append({f"c{i}": v for i, v in enumerate(fila)})
+        if len(lote) >= tamano_lote:
+            conn.execute(insert, lote)
+            total += len(lote)
+            lote = []
+    if lote:
+        conn.execute(insert, lote)
+        total += len(lote)
+    return total
+
+
+def es_error_infile_deshabilitado(error):
+    """Detecta si el servidor o el cliente rechazan LOAD DATA LOCAL"""
+    mensaje = str(error).lower()
+    return any(patron in mensaje for patron in (
+        'local data is disabled', 'local infile', 'load data local', '1148', '3948', '2068'
+    ))
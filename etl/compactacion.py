@@ -0,0 +1,100 @@
+# compactacion.py
+"""Representación compacta en memoria del DataFrame crudo.
+
+Las columnas de texto repetitivo (mes, máquina, operario, referencia,
+códigos y subcódigos de paro, área) pasan a categóricas, los números al
+tipo más chico que conserva exactamente cada valor y la fecha se parsea
+una sola vez a datetime64. Cada conversión se aplica solo si no cambia
+ningún valor: el texto que ven el motor SQL y el vectorizado es el mismo.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Una columna de texto es categórica si sus valores distintos no superan esta fracción de las filas
+MAX_PROPORCION_DISTINTOS = 0.5
+
+
+def memoria_mb(df):
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def es_texto(serie):
+    return serie.dtype == object or isinstance(serie.dtype, pd.StringDtype)
+
+
+def como_categoria(serie):
+    """Categórica si la columna es solo texto y de baja cardinalidad; None si no conviene.
+
+    Las columnas con números o booleanos mezclados no se convierten: la
+    categórica uniría 1, 1.0 y True en una sola categoría.
+    """
+    if not es_texto(serie) or pd.api.types.infer_dtype(serie, skipna=True) != 'string':
+        return None
+    no_nulos = serie.notna().sum()
+    if not no_nulos or serie.nunique(dropna=True) > no_nulos * MAX_PROPORCION_DISTINTOS:
+        return None
+    return serie.astype('category')
+
+
+def como_numero_compacto(serie):
+    """Entero con signo más chico, o float32 si representa exactamente cada valor"""
+    if pd.api.types.is_bool_dtype(serie) or not pd.api.types.is_numeric_dtype(serie):
+        return None
+    if pd.api.types.is_integer_dtype(serie):
+        compacta = pd.to_numeric(serie, downcast='signed')
+        return compacta if compacta.dtype != serie.dtype else None
+    if serie.dtype == np.float64:
+        valores = serie.to_numpy()
+        reducidos = valores.astype(np.float32)
+        with np.errstate(over='ignore', invalid='ignore'):
+            exactos = np.array_equal(reducidos.astype(np.float64), valores, equal_nan=True)
+        return serie.astype(np.float32) if exactos else None
+    return None
+
+
+def parsear_fechas(serie):
+    """Fechas ISO (año-mes-día) y el resto con el día primero, como en el libro (03/04/2024 = 3 de abril).
+
+    dayfirst no se aplica a las ISO: con format='mixed' convertiría 2023-02-03 en el 2 de marzo.
+    """
+    fechas = pd.to_datetime(serie, errors='coerce', format='ISO8601')
+    resto = fechas.isna() & serie.notna()
+    if resto.any():
+        fechas = fechas.fillna(pd.to_datetime(serie[resto], errors='coerce', format='mixed', dayfirst=True))
+    return fechas
+
+
+def como_fecha(serie):
+    """datetime64 si cada valor no vacío es una fecha válida; None si alguno no lo es"""
+    if pd.api.types.is_datetime64_any_dtype(serie) or not es_texto(serie):
+        return None
+    fechas = parsear_fechas(serie)
+    if fechas.isna().sum() != serie.isna().sum():
+        return None
+    return fechas
+
+
+def compactar(df, columnas_fecha=()):
+    """Devuelve (df compacto, {'antes_mb', 'despues_mb', 'categoricas', 'numericas', 'fechas'})"""
+    antes = memoria_mb(df)
+    compacto = {}
+    resumen = {'categoricas': [], 'numericas': [], 'fechas': []}
+    for col in df.columns:
+        serie = df[col]
+        if col in columnas_fecha:
+            nueva, tipo = como_fecha(serie), 'fechas'
+        elif es_texto(serie):
+            nueva, tipo = como_categoria(serie), 'categoricas'
+        else:
+            nueva, tipo = como_numero_compacto(serie), 'numericas'
+        if nueva is not None:
+            resumen[tipo].append(col)
+            serie = nueva
+        compacto[col] = serie
+    df = pd.DataFrame(compacto, index=df.index)
+    resumen.update(antes_mb=antes, despues_mb=memoria_mb(df))
+    return df, resumen
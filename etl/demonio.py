@@ -0,0 +1,222 @@
+# demonio.py
+"""Modo demonio: reprocesa el libro cada vez que se guarda.
+
+Vigila el directorio del libro con inotify (paquete watchdog) o, si no
+está instalado, consultando su mtime y tamaño cada INTERVALO_SONDEO
+segundos. Las ráfagas de guardados se agrupan: el ETL corre cuando el
+libro lleva ESPERA_CAMBIOS segundos sin cambiar. Cada ciclo relee el
+libro y compara el hash de cada fila con la última versión procesada; si
+algo cambió ejecuta la carga incremental con el mismo motor (pool de
+conexiones ya abierto) y las dimensiones ya cacheadas en memoria.
+"""
+import logging
+import os
+import signal
+import threading
+import time
+
+import numpy as np
+
+import incremental
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+# Segundos sin cambios en el libro antes de procesarlo
+ESPERA_CAMBIOS = 5.0
+
+# Segundos entre consultas del mtime cuando no hay inotify
+INTERVALO_SONDEO = 1.0
+
+# Máximo de segundos que una espera bloquea sin revisar si el demonio se detuvo
+PASO_ESPERA = 1.0
+
+
+def firma(ruta):
+    """(mtime_ns, tamaño) del archivo; None si no existe (p. ej. a mitad de un guardado)"""
+    try:
+        info = os.stat(ruta)
+    except OSError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+class VigilanteSondeo:
+    """Detecta cambios comparando el mtime y el tamaño del libro"""
+
+    nombre = 'sondeo'
+
+    def __init__(self, ruta, intervalo=INTERVALO_SONDEO):
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.ultima = firma(ruta)
+
+    def iniciar(self):
+        pass
+
+    def detener(self):
+        pass
+
+    def esperar_cambio(self, segundos):
+        """True si el libro cambió desde la llamada anterior (espera como máximo segundos)"""
+        limite = time.monotonic() + segundos
+        while True:
+            actual = firma(self.ruta)
+            if actual != self.ultima:
+                self.ultima = actual
+                return True
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return False
+            time.sleep(min(self.intervalo, restante))
+
+
+class VigilanteInotify:
+    """Detecta cambios con los eventos del sistema de archivos sobre el directorio del libro.
+
+    Se vigila el directorio y no el archivo: Excel guarda en un temporal y
+    lo renombra sobre el libro.
+    """
+
+    nombre = 'inotify'
+
+    def __init__(self, ruta):
+        self.ruta = os.path.abspath(ruta)
+        self.evento = threading.Event()
+        self.observador = Observer()
+        manejador = FileSystemEventHandler()
+        manejador.on_any_event = self.al_evento
+        self.observador.schedule(manejador, os.path.dirname(self.ruta), recursive=False)
+
+    def al_evento(self, evento):
+        rutas = (getattr(evento, 'src_path', None), getattr(evento, 'dest_path', None))
+        if any(r and os.path.abspath(r) == self.ruta for r in rutas):
+            self.evento.set()
+
+    def iniciar(self):
+        self.observador.start()
+
+    def detener(self):
+        self.observador.stop()
+        self.observador.join()
+
+    def esperar_cambio(self, segundos):
+        if self.evento.wait(segundos):
+            self.evento.clear()
+            return True
+        return False
+
+
+class DemonioETL:
+    """Ciclo de vigilancia y carga incremental sobre una instancia del ETL ya configurada"""
+
+    def __init__(self, etl, espera=ESPERA_CAMBIOS, intervalo=INTERVALO_SONDEO):
+        self.etl = etl
+        self.espera = espera
+        self.intervalo = intervalo
+        self.detenido = threading.Event()
+        # Hashes por fila de la última versión del libro cargada
+        self.hashes = None
+        self.ciclos = 0
+
+    def crear_vigilante(self, ruta):
+        if Observer is not None:
+            try:
+                return VigilanteInotify(ruta)
+            except Exception as e:
+                logger.warning(f"⚠️  inotify no disponible, se usa sondeo: {e}")
+        return VigilanteSondeo(ruta, self.intervalo)
+
+    def detener(self, *_):
+        self.detenido.set()
+
+    def preparar(self):
+        """Resuelve el libro y abre el motor y el esquema una sola vez"""
+        etl = self.etl
+        with etl.consola():
+            if not etl.validate_file_path():
+                logger.error("❌ No se encontró el libro a vigilar")
+                return False
+            return etl.connect_to_mysql() and etl.aplicar_esquema()
+
+    def esperar_estable(self, vigilante):
+        """Espera a que el libro lleve `espera` segundos sin cambios; False si el demonio se detuvo"""
+        quieto_desde = time.monotonic()
+        while not self.detenido.is_set():
+            if vigilante.esperar_cambio(min(PASO_ESPERA, self.espera)):
+                quieto_desde = time.monotonic()
+            elif time.monotonic() - quieto_desde >= self.espera and firma(self.etl.excel_file_path) is not None:
+                return True
+        return False
+
+    def procesar(self):
+        """Un ciclo: relee el libro y, si alguna fila cambió, ejecuta la carga incremental"""
+        etl = self.etl
+        self.ciclos += 1
+        inicio = time.perf_counter()
+        etl.metricas_etapas = []
+        etl.filas_tablas = {}
+        if etl.instrumentacion is not None:
+            etl.instrumentacion.reiniciar()
+        resultado = 'error'
+        try:
+            with etl.consola():
+                with etl.medir_etapa('lectura') as metrica:
+                    if not etl.read_excel_raw():
+                        return False
+                    metrica['filas'] = len(etl.dataframe)
+                if etl.compactar:
+                    with etl.medir_etapa('compactacion'):
+                        etl.compactar_dataframe()
+
+                hashes = incremental.hashes_filas(etl.dataframe)
+                if self.hashes is not None and np.array_equal(hashes, self.hashes):
+                    resultado = 'sin cambios'
+                    return True
+                if self.hashes is not None:
+                    print(f"🔁 {len(np.setxor1d(hashes, self.hashes))} filas distintas a la versión anterior")
+
+                with etl.medir_etapa('carga_incremental') as metrica:
+                    metrica['filas'] = len(etl.dataframe)
+                    if not etl.ejecutar_incremental():
+                        return False
+                self.hashes = hashes
+                resultado = 'cargado'
+                return True
+        except Exception as e:
+            logger.error(f"❌ Error en el ciclo {self.ciclos}: {e}")
+            return False
+        finally:
+            etl.cerrar_workbook()
+            if resultado != 'sin cambios':
+                with etl.consola():
+                    etl.mostrar_metricas_etapas()
+                etl.exportar_metricas()
+            logger.info(f"🔁 Ciclo {self.ciclos} ({resultado}) en {time.perf_counter() - inicio:.2f}s")
+
+    def ejecutar(self):
+        """Carga inicial y vigilancia hasta SIGINT/SIGTERM; False si no se pudo iniciar"""
+        signal.signal(signal.SIGTERM, self.detener)
+        signal.signal(signal.SIGINT, self.detener)
+        if not self.preparar():
+            return False
+
+        ruta = self.etl.excel_file_path
+        vigilante = self.crear_vigilante(ruta)
+        vigilante.iniciar()
+        logger.info(f"👀 Vigilando {ruta} ({vigilante.nombre}, espera {self.espera:g}s)")
+        try:
+            self.procesar()
+            while not self.detenido.is_set():
+                if vigilante.esperar_cambio(PASO_ESPERA) and self.esperar_estable(vigilante):
+                    self.procesar()
+        finally:
+            vigilante.detener()
+            self.etl.engine.dispose()
+            logger.info(f"🛑 Demonio detenido tras {self.ciclos} ciclos")
+        return True
@@ -0,0 +1,162 @@
+# descubrimiento.py
+"""Búsqueda del libro Excel del proyecto en un solo recorrido acotado.
+
+El árbol se recorre una vez, por niveles y hasta PROFUNDIDAD_MAXIMA,
+saltando directorios ocultos, entornos virtuales y carpetas de
+herramientas; cada archivo se compara con todos los patrones a la vez y
+gana el de mayor prioridad (a igual prioridad, el menos profundo y
+después el primero en orden alfabético). El resultado se guarda en un
+índice con los mtime del libro y de los directorios recorridos: si nada
+cambió, el siguiente arranque no lista ningún directorio.
+"""
+import fnmatch
+import json
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Patrones por prioridad (el primero es el libro de seguimiento exacto)
+PATRONES = (
+    "SEGUIMIENTO TEMPERAS Y VINILOS Actividad.xlsm",
+    "SEGUIMIENTO TEMPERAS Y VINILOS Actividad.xlsx",
+    "SEGUIMIENTO TEMPERAS*.xls*",
+    "*TEMPERAS*.xls*",
+    "*VINILOS*.xls*",
+    "*.xls*",
+)
+
+# Directorios que nunca contienen el libro
+EXCLUIDOS = frozenset({
+    '__pycache__', 'node_modules', 'venv', 'env', 'site-packages',
+})
+
+# Archivos de bloqueo que Excel deja junto al libro abierto
+ARCHIVOS_EXCLUIDOS = ('~$*',)
+
+# Marca de un entorno virtual de Python
+MARCA_VENV = 'pyvenv.cfg'
+
+PROFUNDIDAD_MAXIMA = 4
+
+
+class DescubrimientoLibros:
+    """Busca el libro de mayor prioridad bajo una raíz con un índice persistente"""
+
+    ARCHIVO_INDICE = "libros.json"
+
+    def __init__(self, directorio_indice=".cache_etl", profundidad=PROFUNDIDAD_MAXIMA,
+                 patrones=PATRONES, excluidos=EXCLUIDOS):
+        self.directorio_indice = Path(directorio_indice) if directorio_indice else None
+        self.profundidad = profundidad
+        self.patrones = patrones
+        self.excluidos = excluidos
+
+    def prioridad(self, nombre):
+        """Índice del primer patrón que cumple el nombre; None si no cumple ninguno"""
+        if any(fnmatch.fnmatchcase(nombre, patron) for patron in ARCHIVOS_EXCLUIDOS):
+            return None
+        for i, patron in enumerate(self.patrones):
+            if fnmatch.fnmatchcase(nombre, patron):
+                return i
+        return None
+
+    def excluir_directorio(self, nombre):
+        return nombre.startswith('.') or nombre in self.excluidos
+
+    def recorrer(self, raiz):
+        """Un solo recorrido por niveles: (libro, prioridad, {directorio: mtime_ns})"""
+        mejor, mejor_prioridad = None, None
+        directorios = {}
+        nivel = [Path(raiz)]
+        for profundidad in range(self.profundidad + 1):
+            siguiente = []
+            for directorio in nivel:
+                try:
+                    # mtime antes de listar: un cambio durante el listado invalida el índice
+                    mtime = os.stat(directorio).st_mtime_ns
+                    with os.scandir(directorio) as entradas:
+                        entradas = sorted(entradas, key=lambda e: e.name)
+                    directorios[str(directorio)] = mtime
+                except OSError:
+                    continue
+                if profundidad and any(e.name == MARCA_VENV for e in entradas):
+                    continue
+                for entrada in entradas:
+                    try:
+                        if entrada.is_dir(follow_symlinks=False):
+                            if not self.excluir_directorio(entrada.name):
+                                siguiente.append(Path(entrada.path))
+                            continue
+                        if not entrada.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    prioridad = self.prioridad(entrada.name)
+                    if prioridad is not None and (mejor_prioridad is None or prioridad < mejor_prioridad):
+                        mejor, mejor_prioridad = entrada.path, prioridad
+                        if prioridad == 0:
+                            # Nada supera al libro exacto: el recorrido termina aquí
+                            return mejor, mejor_prioridad, directorios
+            nivel = siguiente
+            if not nivel:
+                break
+        return mejor, mejor_prioridad, directorios
+
+    def leer_indice(self):
+        if self.directorio_indice is None:
+            return {}
+        archivo = self.directorio_indice / self.ARCHIVO_INDICE
+        if not archivo.exists():
+            return {}
+        try:
+            with open(archivo, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            logger.warning("⚠️  Índice de libros ilegible, se reconstruye")
+            return {}
+
+    def guardar_indice(self, indice):
+        if self.directorio_indice is None:
+            return
+        try:
+            self.directorio_indice.mkdir(parents=True, exist_ok=True)
+            archivo = self.directorio_indice / self.ARCHIVO_INDICE
+            temporal = archivo.with_suffix('.tmp')
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(indice, f, indent=2)
+            os.replace(temporal, archivo)
+        except OSError as e:
+            logger.warning(f"⚠️  No se pudo guardar el índice de libros: {e}")
+
+    def vigente(self, entrada):
+        """La entrada sigue valiendo si el libro y los directorios recorridos no cambiaron"""
+        try:
+            if entrada['libro'] is not None and os.stat(entrada['libro']).st_mtime_ns != entrada['mtime_ns']:
+                return False
+            return all(os.stat(directorio).st_mtime_ns == mtime
+                       for directorio, mtime in entrada['directorios'].items())
+        except (OSError, KeyError, TypeError):
+            return False
+
+    def buscar(self, raiz=None):
+        """Ruta del libro de mayor prioridad bajo raiz (por defecto el directorio actual) o None"""
+        raiz = str(Path(raiz or Path.cwd()).resolve())
+        clave = f"{raiz}|{self.profundidad}|{'|'.join(self.patrones)}"
+        indice = self.leer_indice()
+        entrada = indice.get(clave)
+        if entrada is not None and self.vigente(entrada):
+            logger.info(f"📇 Libro tomado del índice ({len(entrada['directorios'])} directorios sin cambios)")
+            return entrada['libro']
+
+        libro, prioridad, directorios = self.recorrer(raiz)
+        indice[clave] = {
+            'libro': libro,
+            'prioridad': prioridad,
+            'mtime_ns': os.stat(libro).st_mtime_ns if libro else None,
+            'directorios': directorios,
+        }
+        self.guardar_indice(indice)
+        logger.info(f"🔎 {len(directorios)} directorios recorridos (profundidad máxima {self.profundidad})")
+        return libro
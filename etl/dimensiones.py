@@ -0,0 +1,205 @@
+# dimensiones.py
+"""Dimensiones con claves sustitutas (máquina, operario, producto, código de paro).
+
+Las claves se resuelven en memoria con un cache de diccionarios: solo los
+valores que no están en el cache se insertan en la base de datos.
+"""
+import logging
+
+import pandas as pd
+from sqlalchemy import text
+
+import backends
+import limpieza_vectorizada
+
+logger = logging.getLogger(__name__)
+
+# tabla -> (columna id, columna nombre, tipo id, tipo nombre, columnas extra)
+DIMENSIONES = {
+    'dim_maquina': ('maquina_id', 'nombre_maquina', 'SMALLINT', 'VARCHAR(100)', []),
+    'dim_operario': ('operario_id', 'nombre_operario', 'SMALLINT', 'VARCHAR(150)', []),
+    'dim_producto': ('producto_id', 'nombre_producto', 'SMALLINT', 'VARCHAR(128)', [
+        ('ciclo_teorico_segundos', 'DECIMAL(10,2) NULL'),
+        ('objetivo_produccion_hora', 'DECIMAL(10,2) NULL'),
+    ]),
+    'dim_codigo_paro': ('codigo_paro_id', 'descripcion', 'INT', 'VARCHAR(255)', []),
+}
+
+# Columna del libro (nombre del mapeo) que alimenta cada dimensión
+ORIGEN_DIMENSION = {
+    'maquina': 'dim_maquina',
+    'operario': 'dim_operario',
+    'referencia': 'dim_producto',
+}
+
+
+def ddl_dimension(tabla, dialecto=backends.MYSQL):
+    """Sentencias (secuencias y CREATE TABLE) de una dimensión"""
+    id_col, nombre_col, tipo_id, tipo_nombre, extras = DIMENSIONES[tabla]
+    previas, definicion_id = dialecto.columna_autoincremental(tabla, id_col, tipo_id)
+    columnas = [
+        f"    {definicion_id}",
+        f"    {nombre_col} {tipo_nombre} NOT NULL",
+    ]
+    columnas += [f"    {col} {tipo}" for col, tipo in extras]
+    columnas.append(f"    CONSTRAINT uk_{tabla}_{nombre_col} UNIQUE ({nombre_col})")
+    return previas + [f"CREATE TABLE IF NOT EXISTS {tabla} (\n" + ",\n".join(columnas)
+                      + f"\n){dialecto.sufijo_tabla}"]
+
+
+def ddl_dimensiones(dialecto=backends.MYSQL):
+    return [sentencia for tabla in DIMENSIONES for sentencia in ddl_dimension(tabla, dialecto)]
+
+
+class CacheDimensiones:
+    """Cache en memoria {tabla: {clave normalizada: id}} de las dimensiones"""
+
+    def __init__(self, dialecto=backends.MYSQL):
+        self.ids = {tabla: {} for tabla in DIMENSIONES}
+        self.cargado = False
+        self.dialecto = dialecto
+
+    def cargar(self, conn):
+        """Carga todas las claves existentes (una consulta por dimensión)"""
+        for tabla, (id_col, nombre_col, *_resto) in DIMENSIONES.items():
+            result = conn.execute(text(f"SELECT {nombre_col}, {id_col} FROM {tabla}"))
+            self.ids[tabla] = {
+                limpieza_vectorizada.clave_lookup(nombre): id_ for nombre, id_ in result.fetchall()
+            }
+        self.cargado = True
+
+    def registrar(self, conn, tabla, valores):
+        """Inserta los valores que aún no tienen clave y devuelve cuántos se agregaron"""
+        if not self.cargado:
+            self.cargar(conn)
+        id_col, nombre_col, *_resto = DIMENSIONES[tabla]
+        conocidos = self.ids[tabla]
+
+        nuevos = {}
+        for valor in valores:
+            if valor is None or valor == '':
+                continue
+            clave = limpieza_vectorizada.clave_lookup(valor)
+            if clave and clave not in conocidos and clave not in nuevos:
+                nuevos[clave] = str(valor).rstrip(' ')
+        if not nuevos:
+            return 0
+
+        ultimo = max(conocidos.values(), default=0)
+        # IGNORE: la collation de MySQL puede considerar iguales valores que aquí difieren
+        conn.execute(text(f"{self.dialecto.insertar_ignorando(tabla)} ({nombre_col}) VALUES (:nombre)"),
+                     [{'nombre': nombre} for nombre in nuevos.values()])
+        # Releer solo los ids recién asignados por AUTO_INCREMENT
+        result = conn.execute(
+            text(f"SELECT {nombre_col}, {id_col} FROM {tabla} WHERE {id_col} > :ultimo"), {'ultimo': ultimo}
+        )
+        for nombre, id_ in result.fetchall():
+            conocidos[limpieza_vectorizada.clave_lookup(nombre)] = id_
+
+        # Valores que la base de datos unió con una clave existente
+        for clave, nombre in nuevos.items():
+            if clave not in conocidos:
+                id_ = conn.execute(text(f"SELECT {id_col} FROM {tabla} WHERE {nombre_col} = :nombre"),
+                                   {'nombre': nombre}).scalar()
+                if id_ is not None:
+                    conocidos[clave] = id_
+        logger.info(f"{tabla}: {len(nuevos)} claves nuevas")
+        return len(nuevos)
+
+    def resolver(self, conn, tabla, serie):
+        """Devuelve la serie de claves sustitutas, dando de alta los valores nuevos"""
+        texto = limpieza_vectorizada.como_texto(serie)
+        self.registrar(conn, tabla, texto.dropna().unique())
+        return limpieza_vectorizada.asignar_ids(texto, self.ids[tabla]).astype('Int64')
+
+    def claves(self):
+        """Ids de máquina y operario en el formato del motor vectorizado"""
+        return {'maquina': self.ids['dim_maquina'], 'operario': self.ids['dim_operario']}
+
+
+def como_hora(serie):
+    """Hora (HH:MM:SS) del turno: '06:30', '1899-12-30 14:00:00' (hora de Excel), '6' o '14 h'"""
+    texto = limpieza_vectorizada.como_texto(serie)
+    partes = texto.str.extract(r'(\d{1,2}):(\d{2})')
+    solo_hora = texto.str.extract(r'^\s*(\d{1,2})\s*h?\s*$')[0]
+    hora = pd.to_numeric(partes[0].fillna(solo_hora), errors='coerce')
+    minuto = pd.to_numeric(partes[1], errors='coerce').fillna(0)
+    valida = hora.between(0, 23) & minuto.between(0, 59)
+    texto = hora.map(lambda h: f"{int(h):02d}" if pd.notna(h) else '') + ':' + \
+        minuto.map(lambda m: f"{int(m):02d}") + ':00'
+    return texto.where(valida)
+
+
+def columnas_turno(df):
+    """Columnas separadas de inicio y fin de turno ('Turno INICIO' / 'Turno FINAL' o 'CIERRE')"""
+    inicio = next((c for c in df.columns if 'turno' in c.lower() and 'inicio' in c.lower()), None)
+    fin = next((c for c in df.columns if 'turno' in c.lower() and ('final' in c.lower() or 'cierre' in c.lower())), None)
+    return inicio, fin
+
+
+def fact_registro_produccion(df, mapeo, cache, conn):
+    """Tabla de hechos de producción con claves enteras (una fila por registro)"""
+    def numero(nombre):
+        serie = limpieza_vectorizada.columna(df, mapeo, nombre)
+        return limpieza_vectorizada.extraer_numero(serie) if serie is not None else pd.Series(0.0, index=df.index)
+
+    vacio = pd.Series([None] * len(df), index=df.index, dtype=object)
+    fecha = limpieza_vectorizada.columna(df, mapeo, 'fecha')
+    col_inicio, col_fin = columnas_turno(df)
+    if col_inicio and col_fin:
+        inicio, final = df[col_inicio], df[col_fin]
+    else:
+        turno = limpieza_vectorizada.columna(df, mapeo, 'turno')
+        inicio, final = limpieza_vectorizada.separar_turno(turno) if turno is not None else (vacio, vacio)
+
+    fact = {
+        'registro_id': df['registro_id'],
+        'fecha': limpieza_vectorizada.como_fecha(fecha) if fecha is not None else vacio,
+    }
+    for nombre, tabla in ORIGEN_DIMENSION.items():
+        serie = limpieza_vectorizada.columna(df, mapeo, nombre)
+        id_col = DIMENSIONES[tabla][0]
+        fact[id_col] = cache.resolver(conn, tabla, serie) if serie is not None else vacio
+    fact.update({
+        'hora_inicio': como_hora(inicio),
+        'hora_fin': como_hora(final),
+        'cantidad_producida': numero('pacas_producidas'),
+        # El libro no registra unidades defectuosas
+        'cantidad_defectuosa': vacio,
+        'horas_trabajadas': numero('horas_trabajadas'),
+        'tiempo_de_paro': numero('tiempo_de_paro'),
+    })
+    return pd.DataFrame(fact, index=df.index).reset_index(drop=True)
+
+
+def fact_detalle_paros(df_paros, cache, conn):
+    """Detalle de paros con claves enteras a partir de la tabla larga fact_paros"""
+    return pd.DataFrame({
+        'registro_id': df_paros['registro_id'],
+        'slot': df_paros['slot'],
+        'codigo_paro_id': cache.resolver(conn, 'dim_codigo_paro', df_paros['codigo']),
+        'subcodigo_paro_id': cache.resolver(conn, 'dim_codigo_paro', df_paros['subcodigo']),
+        'duracion_minutos': df_paros['minutos'],
+    }).reset_index(drop=True)
+
+
+def generar_script():
+    """Script SQL de las dimensiones (database/dim_data.sql)"""
+    partes = [
+        "-- ============================================================",
+        "-- Dimensiones con claves sustitutas (mantenidas por el ETL)",
+        "-- Generado con: python etl/dimensiones.py > database/dim_data.sql",
+        "-- ============================================================",
+        "-- ciclo_teorico_segundos y objetivo_produccion_hora de dim_producto",
+        "-- no vienen en el libro y se completan a mano, por ejemplo:",
+        "--   UPDATE dim_producto SET ciclo_teorico_segundos = 45",
+        "--   WHERE nombre_producto = 'VINILO BLANCO';",
+        "",
+    ]
+    for sentencia in ddl_dimensiones():
+        partes += [sentencia + ";", ""]
+    return "\n".join(partes)
+
+
+if __name__ == '__main__':
+    print(generar_script())
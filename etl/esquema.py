@@ -0,0 +1,212 @@
+# esquema.py
+"""DDL explícito (tipos e índices) de las tablas derivadas del ETL.
+
+Las listas de columnas siguen el mismo orden que los SELECT del ETL, de modo
+que cada tabla se llena con INSERT INTO tabla SELECT ... posicional.
+"""
+import backends
+import resumenes
+
+SLOTS_POR_DEFECTO = range(1, 19)
+
+TIPOS_NUMERICOS = ('tinyint', 'smallint', 'mediumint', 'int', 'bigint', 'integer',
+                   'decimal', 'numeric', 'double', 'float', 'real')
+
+NUMERO = 'DECIMAL(10,2)'
+
+COLUMNAS_BASE = [
+    ('registro_id', 'INT'),
+    ('fecha', 'DATE'),
+    ('mes', 'VARCHAR(20)'),
+    ('año', 'SMALLINT'),
+    ('maquina', 'VARCHAR(100)'),
+    ('maquina_id', 'SMALLINT'),
+    ('operario', 'VARCHAR(150)'),
+    ('operario_id', 'SMALLINT'),
+    ('referencia', 'VARCHAR(128)'),
+    ('pacas_producidas', NUMERO),
+    ('horas_trabajadas', NUMERO),
+    ('horas_no_trabajadas', NUMERO),
+    ('tiempo_de_paro', NUMERO),
+    ('turno_inicio', 'VARCHAR(64)'),
+    ('turno_final', 'VARCHAR(64)'),
+]
+
+COLUMNAS_ADICIONALES = [
+    ('sub_codigo_de_paro_1', 'VARCHAR(255)'),
+    ('subcodigo_3', 'VARCHAR(255)'),
+    ('subcodigo_5', 'VARCHAR(255)'),
+    ('area_involucrada_en_subcodigo_5', 'VARCHAR(255)'),
+    ('personal_involucrado', 'VARCHAR(255)'),
+    ('observaciones', 'TEXT'),
+]
+
+INDICES = {
+    'datos_limpios_temperas_vinilos': [('maquina', 'fecha'), ('maquina_id', 'fecha'), ('operario_id', 'fecha')],
+    'datos_paros_procesados': [('maquina', 'fecha'), ('maquina_id', 'fecha')],
+    'produccion_maquina': [('maquina', 'fecha'), ('maquina_id', 'fecha'), ('fecha',)],
+    'produccion_operario': [('operario', 'fecha'), ('operario_id', 'fecha'), ('maquina', 'fecha')],
+    'analisis_paros': [('maquina', 'fecha'), ('operario_id', 'fecha')],
+    'fact_paros': [('maquina', 'fecha'), ('maquina_id', 'fecha'), ('codigo',), ('registro_id',)],
+    'fact_registro_produccion': [('maquina_id', 'fecha'), ('operario_id', 'fecha'), ('producto_id', 'fecha'),
+                                 ('registro_id',)],
+    'fact_detalle_paros': [('registro_id',), ('codigo_paro_id',)],
+    **resumenes.INDICES_RESUMEN,
+    'resultados_oee': [('agrupacion', 'grano', 'periodo'), ('maquina', 'periodo')],
+    'metricas_etl': [('instante',), ('etapa', 'instante')],
+}
+
+
+def es_tipo_numerico(tipo):
+    """Indica si un tipo SQL (SHOW COLUMNS / inspector) es numérico"""
+    return str(tipo).strip().lower().startswith(TIPOS_NUMERICOS)
+
+
+def _resumen(dimension, tipo_dimension):
+    return [
+        ('grano', 'VARCHAR(6) NOT NULL'),
+        ('periodo', 'DATE NOT NULL'),
+        (dimension, tipo_dimension),
+        ('registros', 'INT NOT NULL'),
+        ('pacas', 'DECIMAL(14,2) NOT NULL'),
+        ('horas_trabajadas', 'DECIMAL(14,2) NOT NULL'),
+        ('horas_paro', 'DECIMAL(14,2) NOT NULL'),
+        ('disponibilidad', 'DECIMAL(10,6)'),
+        ('rendimiento_pacas_hora', 'DECIMAL(14,6)'),
+    ]
+
+
+def columnas_tabla(nombre, slots=SLOTS_POR_DEFECTO):
+    """Columnas (nombre, tipo) de una tabla derivada, o None si no tiene esquema"""
+    if nombre == 'datos_limpios_temperas_vinilos':
+        columnas = list(COLUMNAS_BASE)
+        for i in slots:
+            columnas += [(f'Codigo_{i}_en_horas', 'VARCHAR(64)'), (f'Codigo_de_paro_{i}', 'VARCHAR(255)')]
+        return columnas + COLUMNAS_ADICIONALES
+
+    if nombre == 'datos_paros_procesados':
+        columnas = list(COLUMNAS_BASE)
+        for i in slots:
+            columnas += [(f'codigo_paro_{i}', 'SMALLINT'), (f'minutos_paro_{i}', NUMERO)]
+        return columnas + COLUMNAS_ADICIONALES
+
+    if nombre == 'produccion_maquina':
+        return [('registro_id', 'INT'), ('fecha', 'DATE'), ('mes', 'VARCHAR(20)'),
+                ('maquina', 'VARCHAR(100)'), ('maquina_id', 'SMALLINT'),
+                ('pacas_producidas', NUMERO), ('horas_trabajadas', NUMERO), ('tiempo_de_paro', NUMERO),
+                ('turno_inicio', 'VARCHAR(64)'), ('turno_final', 'VARCHAR(64)')]
+
+    if nombre == 'produccion_operario':
+        return [('registro_id', 'INT'), ('fecha', 'DATE'), ('mes', 'VARCHAR(20)'),
+                ('maquina', 'VARCHAR(100)'), ('maquina_id', 'SMALLINT'),
+                ('operario', 'VARCHAR(150)'), ('operario_id', 'SMALLINT'), ('referencia', 'VARCHAR(128)'),
+                ('pacas_producidas', NUMERO), ('horas_trabajadas', NUMERO),
+                ('turno_inicio', 'VARCHAR(64)'), ('turno_final', 'VARCHAR(64)')]
+
+    if nombre == 'analisis_paros':
+        columnas = [('registro_id', 'INT'), ('fecha', 'DATE'), ('mes', 'VARCHAR(20)'),
+                    ('maquina', 'VARCHAR(100)'), ('maquina_id', 'SMALLINT'),
+                    ('operario', 'VARCHAR(150)'), ('operario_id', 'SMALLINT')]
+        for i in slots:
+            columnas += [(f'codigo_paro_{i}', 'SMALLINT'), (f'minutos_paro_{i}', NUMERO)]
+        return columnas + [('total_minutos_paro', 'DECIMAL(12,2)')]
+
+    if nombre == 'fact_paros':
+        return [('registro_id', 'INT'), ('fecha', 'DATE'),
+                ('maquina', 'VARCHAR(100)'), ('maquina_id', 'SMALLINT'),
+                ('operario', 'VARCHAR(150)'), ('operario_id', 'SMALLINT'),
+                ('slot', 'SMALLINT'), ('codigo', 'VARCHAR(255)'), ('subcodigo', 'VARCHAR(255)'),
+                ('minutos', NUMERO)]
+
+    if nombre == 'fact_registro_produccion':
+        return [('registro_id', 'INT NOT NULL'), ('fecha', 'DATE'),
+                ('maquina_id', 'SMALLINT'), ('operario_id', 'SMALLINT'), ('producto_id', 'SMALLINT'),
+                ('hora_inicio', 'TIME'), ('hora_fin', 'TIME'),
+                ('cantidad_producida', NUMERO), ('cantidad_defectuosa', NUMERO),
+                ('horas_trabajadas', NUMERO), ('tiempo_de_paro', NUMERO)]
+
+    if nombre == 'fact_detalle_paros':
+        return [('registro_id', 'INT NOT NULL'), ('slot', 'SMALLINT NOT NULL'),
+                ('codigo_paro_id', 'INT'), ('subcodigo_paro_id', 'INT'),
+                ('duracion_minutos', NUMERO)]
+
+    if nombre == 'resumen_oee_maquina':
+        return _resumen('maquina', 'VARCHAR(100)')
+
+    if nombre == 'resumen_oee_operario':
+        return _resumen('operario', 'VARCHAR(150)')
+
+    if nombre == 'resultados_oee':
+        return [('agrupacion', 'VARCHAR(64) NOT NULL'), ('grano', 'VARCHAR(6)'), ('periodo', 'DATE'),
+                ('maquina', 'VARCHAR(100)'), ('operario', 'VARCHAR(150)'),
+                ('referencia', 'VARCHAR(128)'), ('turno', 'VARCHAR(64)'),
+                ('registros', 'INT NOT NULL'), ('horas_planificadas', 'DECIMAL(14,2)'),
+                ('horas_paro', 'DECIMAL(14,2)'), ('paros', 'INT'), ('horas_operativas', 'DECIMAL(14,2)'),
+                ('pacas', 'DECIMAL(14,2)'), ('pacas_ideales', 'DECIMAL(14,2)'),
+                ('disponibilidad', 'DECIMAL(10,6)'), ('rendimiento', 'DECIMAL(10,6)'),
+                ('calidad', 'DECIMAL(10,6)'), ('oee', 'DECIMAL(10,6)')]
+
+    if nombre == 'metricas_etl':
+        return [('ejecucion', 'VARCHAR(32) NOT NULL'), ('instante', 'DATETIME NOT NULL'),
+                ('tipo', 'VARCHAR(8) NOT NULL'), ('etapa', 'VARCHAR(64)'),
+                ('operacion', 'VARCHAR(16)'), ('tabla', 'VARCHAR(128)'), ('sentencias', 'INT'),
+                ('segundos', 'DECIMAL(14,6)'), ('segundos_servidor', 'DECIMAL(14,6)'),
+                ('filas', 'BIGINT'), ('bytes', 'BIGINT')]
+
+    return None
+
+
+def ddl_tabla(nombre, slots=SLOTS_POR_DEFECTO, nombre_fisico=None, si_no_existe=False,
+              dialecto=backends.MYSQL):
+    """CREATE TABLE tipado de una tabla derivada (nombre_fisico permite crear la sombra)"""
+    columnas = columnas_tabla(nombre, slots)
+    definiciones = ",\n".join(
+        f"    {dialecto.citar(col)} {tipo}" + ("" if tipo.endswith('NULL') else " NULL") for col, tipo in columnas
+    )
+    existe = "IF NOT EXISTS " if si_no_existe else ""
+    return f"CREATE TABLE {existe}{nombre_fisico or nombre} (\n{definiciones}\n){dialecto.sufijo_tabla}"
+
+
+def ddl_indices(nombre, nombre_fisico=None):
+    """CREATE INDEX de una tabla derivada (el nombre del índice usa el nombre lógico)"""
+    return [
+        f"CREATE INDEX idx_{nombre}_{'_'.join(columnas)} ON {nombre_fisico or nombre} ({', '.join(columnas)})"
+        for columnas in INDICES.get(nombre, [])
+    ]
+
+
+TABLAS = [
+    'datos_limpios_temperas_vinilos',
+    'datos_paros_procesados',
+    'produccion_maquina',
+    'produccion_operario',
+    'analisis_paros',
+    'fact_paros',
+    'fact_registro_produccion',
+    'fact_detalle_paros',
+    *resumenes.TABLAS_RESUMEN,
+    'resultados_oee',
+    # Histórico de ejecuciones (solo se le agregan filas; no se refresca)
+    'metricas_etl',
+]
+
+
+def generar_script(slots=SLOTS_POR_DEFECTO):
+    """Script SQL completo del esquema (database/ddl_schema.sql)"""
+    partes = [
+        "-- ============================================================",
+        "-- Esquema tipado de las tablas derivadas del ETL",
+        "-- Generado con: python etl/esquema.py > database/ddl_schema.sql",
+        "-- Las dimensiones (dim_*) están en database/dim_data.sql",
+        "-- ============================================================",
+        "",
+    ]
+    for tabla in TABLAS:
+        partes.append(ddl_tabla(tabla, slots, si_no_existe=True) + ";")
+        partes += [indice + ";" for indice in ddl_indices(tabla)]
+        partes.append("")
+    return "\n".join(partes)
+
+
+if __name__ == '__main__':
+    print(generar_script())
@@ -1,13 +1,40 @@
 # etl_python_sql_hibrido.py
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine, text
+from sqlalchemy import text, inspect
 import logging
 import os
 import re
 import argparse
+import sys
 from pathlib import Path
 import getpass
+import time
+import glob
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext, redirect_stdout
+from itertools import islice, chain
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import cache_excel
+import carga_masiva
+import compactacion
+import backends
+import demonio
+import descubrimiento
+import dimensiones
+import esquema
+import incremental
+import instrumentacion as instrumentacion_etl
+import limpieza_vectorizada
+import oee
+import pipeline
+import resolutor_columnas
+import resumenes
 
 # Configuración de logging
 logging.basicConfig(
@@ -20,34 +47,68 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# silencioso: sin consola ni consultas de diagnóstico (cron); depuracion: exploración completa
+VERBOSIDADES = ('silencioso', 'normal', 'depuracion')
+
+# Filas por bloque al leer tablas grandes con cursor del lado del servidor
+FILAS_LECTURA = 50000
+
 class TemperasVinilosETL:
-    def __init__(self, excel_file_path=None, db_config=None):
+    def __init__(self, excel_file_path=None, db_config=None, cache=None,
+                 modo_carga='infile', tamano_lote=5000, incremental=False,
+                 motor_limpieza='sql', lote=None, workers=None, todas_las_hojas=False,
+                 pipeline=False, tamano_bloque=5000, tamano_cola=4, oee_config=None, backend='mysql',
+                 instrumentacion=None, verbosidad='normal', compactar=True,
+                 tamano_pool=None, desborde_pool=None, descubridor=None, resolutor=None):
         self.excel_file_path = excel_file_path
         self.db_config = db_config or {}
+        self.cache = cache
+        self.dialecto = backends.obtener(backend)
+        # Los motores embebidos no tienen LOAD DATA LOCAL INFILE
+        self.modo_carga = modo_carga if self.dialecto.carga_local or modo_carga != 'infile' else 'lotes'
+        self.tamano_lote = tamano_lote
+        self.incremental = incremental
+        self.motor_limpieza = motor_limpieza
+        self.lote = lote
+        self.workers = workers or os.cpu_count() or 1
+        self.todas_las_hojas = todas_las_hojas
+        self.pipeline = pipeline
+        self.tamano_bloque = tamano_bloque
+        self.tamano_cola = tamano_cola
+        self.oee_config = oee.cargar_config(oee_config)
+        self.compactar = compactar
+        # None conserva el valor de backends.OPCIONES_POOL
+        self.pool = {'pool_size': tamano_pool, 'max_overflow': desborde_pool}
+        self.descubridor = descubridor or descubrimiento.DescubrimientoLibros()
+        self.resolutor = resolutor or resolutor_columnas.ResolutorColumnas()
+        # Slots de código de paro que generan columnas y SQL (se reducen a los que tienen datos)
+        self.slots = list(esquema.SLOTS_POR_DEFECTO)
         self.engine = None
         self.dataframe = None
+        self.workbook = None
+        self.encabezado_detectado = False
+        self.metricas_etapas = []
+        self.nivel_etapa = 0
+        # Tablas refrescadas en la etapa en curso cuyo intercambio espera al final de la etapa
+        self.intercambios_pendientes = None
+        self.instrumentacion = instrumentacion
+        if verbosidad not in VERBOSIDADES:
+            raise ValueError(f"Verbosidad desconocida: {verbosidad} (opciones: {', '.join(VERBOSIDADES)})")
+        self.verbosidad = verbosidad
+        self.depuracion = verbosidad == 'depuracion'
+        # Filas escritas en cada tabla según el resultado de la carga (sin re-escanear)
+        self.filas_tablas = {}
+        self.tipos_crudos = {}
+        self.dimensiones = dimensiones.CacheDimensiones(self.dialecto)
         
     def find_excel_file(self):
-        """Busca automáticamente el archivo Excel en el proyecto"""
+        """Busca automáticamente el archivo Excel en el proyecto (un recorrido acotado con índice)"""
         try:
-            current_dir = Path.cwd()
-            
-            patterns = [
-                "**/SEGUIMIENTO TEMPERAS Y VINILOS Actividad.xlsm",
-                "**/SEGUIMIENTO TEMPERAS Y VINILOS Actividad.xlsx", 
-                "**/SEGUIMIENTO TEMPERAS*.xls*",
-                "**/*TEMPERAS*.xls*",
-                "**/*VINILOS*.xls*",
-                "**/*.xls*"
-            ]
-            
-            for pattern in patterns:
-                files = list(current_dir.glob(pattern))
-                for file in files:
-                    if file.exists():
-                        self.excel_file_path = str(file)
-                        logger.info(f"📁 Archivo encontrado: {self.excel_file_path}")
-                        return True
+            ruta = self.descubridor.buscar(Path.cwd())
+            if ruta:
+                self.excel_file_path = ruta
+                logger.info(f"📁 Archivo encontrado: {self.excel_file_path}")
+                return True
             
             print("❌ No se encontraron archivos Excel en el proyecto")
             return False
@@ -73,79 +134,389 @@ class TemperasVinilosETL:
         return self.find_excel_file()
 
     def connect_to_mysql(self):
-        """Establece conexión con MySQL"""
+        """Establece conexión con MySQL o con el backend embebido (DuckDB / SQLite)"""
         try:
-            connection_string = f"mysql+mysqlconnector://{self.db_config['user']}:{self.db_config['password']}@{self.db_config['host']}/{self.db_config['database']}"
-            self.engine = create_engine(connection_string)
+            self.engine = self.dialecto.crear_motor(self.db_config, self.modo_carga, self.pool)
+            if self.instrumentacion is not None:
+                self.instrumentacion.conectar(self.engine, self.dialecto)
             
             with self.engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
                 
-            logger.info("✅ Conectado a MySQL")
+            logger.info(f"✅ Conectado a {self.dialecto.nombre}")
             return True
         except Exception as e:
-            logger.error(f"❌ Error conectando a MySQL: {e}")
+            logger.error(f"❌ Error conectando a {self.dialecto.nombre}: {e}")
             return False
 
+    def leer_sql(self, conn, consulta):
+        """DataFrame de una consulta grande.
+
+        Con mysqlconnector, SQLite y DuckDB el driver trae el resultado completo
+        (no tienen cursores del lado del servidor): se lee de una vez, sin una
+        lista de bloques que duplique la memoria al concatenarlos. Solo con un
+        driver que sí los tenga se lee por bloques de FILAS_LECTURA filas.
+        """
+        if not conn.dialect.supports_server_side_cursors:
+            return pd.read_sql(text(consulta), conn)
+        sentencia = text(consulta).execution_options(stream_results=True, max_row_buffer=FILAS_LECTURA)
+        bloques = list(pd.read_sql(sentencia, conn, chunksize=FILAS_LECTURA))
+        if len(bloques) == 1:
+            return bloques[0]
+        df = pd.concat(bloques, ignore_index=True)
+        # Un bloque con una columna toda NULL la infiere como object: se vuelve a inferir el tipo
+        mixtas = [c for c in df.columns if len({b[c].dtype for b in bloques}) > 1]
+        if mixtas:
+            df[mixtas] = df[mixtas].infer_objects()
+        return df
+
+    def memoria_pico_mb(self):
+        """Devuelve el pico de memoria residente del proceso en MB (desde su inicio, no por etapa)"""
+        if resource is None:
+            return None
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB, macOS reporta bytes
+        divisor = 1024 * 1024 if os.uname().sysname == 'Darwin' else 1024
+        return pico / divisor
+
+    def memoria_actual_mb(self):
+        """Memoria residente actual del proceso en MB (/proc/self/statm); None fuera de Linux"""
+        try:
+            with open('/proc/self/statm') as f:
+                paginas = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            return None
+        return paginas * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+    @contextmanager
+    def medir_etapa(self, nombre):
+        """Mide duración y memoria de una etapa del ETL.
+
+        'variacion_rss_mb' es la memoria residente al terminar menos la del
+        inicio de la etapa; 'pico_mb' es el pico RSS del proceso hasta ese
+        momento (puede venir de una etapa anterior). Entrega un dict en el que
+        la etapa puede anotar 'filas' procesadas; las sentencias SQL
+        ejecutadas dentro se atribuyen a la etapa.
+        """
+        metrica = {'etapa': nombre, 'nivel': self.nivel_etapa, 'filas': None}
+        instrumentada = (self.instrumentacion.etapa(nombre, metrica)
+                         if self.instrumentacion is not None else nullcontext())
+        inicio = time.perf_counter()
+        rss_inicio = self.memoria_actual_mb()
+        self.nivel_etapa += 1
+        self.metricas_etapas.append(metrica)
+        try:
+            with instrumentada:
+                try:
+                    yield metrica
+                finally:
+                    metrica['segundos'] = time.perf_counter() - inicio
+                    rss_fin = self.memoria_actual_mb()
+                    metrica['variacion_rss_mb'] = (rss_fin - rss_inicio
+                                                   if rss_inicio is not None and rss_fin is not None else None)
+                    metrica['pico_mb'] = self.memoria_pico_mb()
+        finally:
+            self.nivel_etapa -= 1
+            pico = metrica['pico_mb']
+            pico_txt = f"{pico:.1f} MB" if pico is not None else "n/d"
+            variacion = metrica['variacion_rss_mb']
+            variacion_txt = f"{variacion:+.1f} MB" if variacion is not None else "n/d"
+            filas_txt = f", {metrica['filas']} filas" if metrica['filas'] is not None else ""
+            logger.info(f"⏱️  Etapa '{nombre}': {metrica['segundos']:.2f}s{filas_txt} "
+                        f"(memoria en la etapa: {variacion_txt}, pico del proceso: {pico_txt})")
+
+    @contextmanager
+    def transaccion_etapa(self, conn, nombre):
+        """Etapa medida en una transacción explícita: un commit al terminar, rollback si falla.
+
+        Las tablas que refresca la etapa se intercambian todas juntas al final.
+        En MySQL el DDL confirma implícitamente la transacción, así que el
+        rollback no deshace lo ya escrito en las sombras; pero mientras no se
+        llega al RENAME final las tablas vigentes no cambian, y si la etapa falla
+        ninguna de sus tablas queda a medias. Las etapas anteriores ya están
+        confirmadas y no se revierten.
+        """
+        with self.medir_etapa(nombre) as metrica:
+            self.intercambios_pendientes = []
+            try:
+                yield metrica
+                self.intercambiar_pendientes(conn)
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self.intercambios_pendientes = None
+            conn.commit()
+
+    def mostrar_metricas_etapas(self):
+        """Imprime el resumen de tiempos y memoria por etapa"""
+        if not self.metricas_etapas:
+            return
+        print(f"\n⏱️  TIEMPOS POR ETAPA:")
+        for metrica in self.metricas_etapas:
+            pico = metrica['pico_mb']
+            pico_txt = f"{pico:8.1f} MB" if pico is not None else "     n/d"
+            variacion = metrica['variacion_rss_mb']
+            variacion_txt = f"{variacion:+8.1f} MB" if variacion is not None else "     n/d"
+            nombre = '  ' * metrica['nivel'] + metrica['etapa']
+            print(f"   {nombre:<28} {metrica['segundos']:8.2f}s  etapa {variacion_txt}  pico proceso {pico_txt}")
+        # Las subetapas ya están contadas en su etapa
+        total = sum(m['segundos'] for m in self.metricas_etapas if m['nivel'] == 0)
+        print(f"   {'TOTAL':<28} {total:8.2f}s")
+        print("   (etapa: variación de la memoria residente; pico proceso: RSS máximo desde el inicio)")
+
+    def exportar_metricas(self):
+        """Escribe las métricas de etapas y sentencias SQL (si la instrumentación está activa)"""
+        if self.instrumentacion is None:
+            return
+        try:
+            self.instrumentacion.exportar(self.engine)
+        except Exception as e:
+            logger.warning(f"⚠️  No se pudieron exportar las métricas: {e}")
+
+    def seleccionar_hoja(self, sheet_names):
+        """Selecciona la hoja 'Base De Datos' o la primera disponible"""
+        if self.depuracion:
+            print(f"\n📋 Hojas disponibles en el archivo:")
+            for i, sheet_name in enumerate(sheet_names, 1):
+                print(f"  {i}. {sheet_name}")
+        
+        for sheet_name in sheet_names:
+            if 'base de datos' in sheet_name.lower():
+                print(f"✅ Hoja encontrada: {sheet_name}")
+                return sheet_name
+        
+        print(f"⚠️  Usando hoja: {sheet_names[0]}")
+        return sheet_names[0]
+
+    def nombres_encabezado(self, fila_encabezado, ancho):
+        """Construye nombres de columnas igual que pandas (Unnamed: N, duplicados .1)"""
+        nombres = []
+        vistos = {}
+        for i in range(ancho):
+            valor = fila_encabezado[i] if i < len(fila_encabezado) else None
+            nombre = f"Unnamed: {i}" if valor is None or (isinstance(valor, str) and not valor.strip()) else str(valor)
+            if nombre in vistos:
+                vistos[nombre] += 1
+                nombre = f"{nombre}.{vistos[nombre]}"
+            else:
+                vistos[nombre] = 0
+            nombres.append(nombre)
+        return nombres
+
+    def construir_dataframe(self, fila_encabezado, filas):
+        """Construye el DataFrame a partir de las filas ya leídas, sin reparsear"""
+        filas = list(filas)
+        
+        # Quitar filas vacías al final (openpyxl en modo lectura las reporta)
+        while filas and all(v is None for v in filas[-1]):
+            filas.pop()
+        
+        ancho = max([len(fila_encabezado)] + [len(f) for f in filas])
+        columnas = self.nombres_encabezado(fila_encabezado, ancho)
+        filas = [tuple(f) + (None,) * (ancho - len(f)) if len(f) < ancho else f for f in filas]
+        
+        return pd.DataFrame.from_records(filas, columns=columnas)
+
     def read_excel_raw(self):
-        """Lee el archivo Excel SIN transformaciones - solo lectura básica"""
+        """Lee el archivo Excel SIN transformaciones - usa el cache columnar si está vigente"""
         try:
             if not self.validate_file_path():
                 logger.error("No se pudo encontrar el archivo Excel")
                 return False
             
-            logger.info(f"📖 Leyendo archivo Excel: {self.excel_file_path}")
+            if self.cache is not None and self.cache.disponible:
+                with self.medir_etapa('lectura_cache'):
+                    df = self.cache.obtener(self.excel_file_path)
+                if df is not None:
+                    print(f"\n⚡ Usando datos cacheados (sin abrir el Excel)")
+                    self.dataframe = df
+                    self.mostrar_resumen_lectura()
+                    return True
+            elif self.cache is not None:
+                logger.warning("⚠️  pyarrow no está instalado: cache deshabilitado")
             
-            excel_file = pd.ExcelFile(self.excel_file_path)
+            if not self.leer_excel_streaming():
+                return False
+            # Mismos tipos que un acierto del cache aunque el cache esté deshabilitado
+            self.dataframe = cache_excel.normalizar_tipos(self.dataframe)
             
-            print(f"\n📋 Hojas disponibles en el archivo:")
-            for i, sheet_name in enumerate(excel_file.sheet_names, 1):
-                print(f"  {i}. {sheet_name}")
+            if self.cache is not None and self.cache.disponible:
+                with self.medir_etapa('guardar_cache'):
+                    self.dataframe = self.cache.guardar(self.excel_file_path, self.dataframe)
             
-            # Buscar la hoja 'Base De Datos'
-            target_sheet = None
-            for sheet_name in excel_file.sheet_names:
-                if 'base de datos' in sheet_name.lower():
-                    target_sheet = sheet_name
-                    break
+            return True
             
-            if not target_sheet:
-                target_sheet = excel_file.sheet_names[0]
-                print(f"⚠️  Usando hoja: {target_sheet}")
-            else:
-                print(f"✅ Hoja encontrada: {target_sheet}")
+        except Exception as e:
+            logger.error(f"❌ Error leyendo Excel: {e}")
+            return False
+
+    def leer_excel_streaming(self, hoja=None):
+        """Abre el libro una sola vez en modo lectura y construye el DataFrame (hoja=None: hoja principal)"""
+        logger.info(f"📖 Leyendo archivo Excel: {self.excel_file_path}")
+        
+        with self.medir_etapa('apertura_excel'):
+            # .xls no es soportado por openpyxl: se usa el lector de pandas
+            if Path(self.excel_file_path).suffix.lower() == '.xls':
+                return self.read_excel_raw_pandas(hoja)
+            # Extractos CSV (database/*.csv): el encabezado es la primera fila
+            if Path(self.excel_file_path).suffix.lower() == '.csv':
+                self.dataframe = self.limpiar_columnas(pd.read_csv(self.excel_file_path))
+                self.encabezado_detectado = True
+                self.mostrar_resumen_lectura()
+                return True
+            
+            from openpyxl import load_workbook
+            self.workbook = load_workbook(self.excel_file_path, read_only=True, data_only=True, keep_links=False)
+            target_sheet = hoja or self.seleccionar_hoja(self.workbook.sheetnames)
+        
+        with self.medir_etapa('lectura_filas'):
+            filas = self.workbook[target_sheet].iter_rows(values_only=True)
             
-            # Leer datos SIN header para análisis
-            df_raw = pd.read_excel(self.excel_file_path, sheet_name=target_sheet, header=None, nrows=10)
+            # Las primeras filas sirven para detectar el encabezado
+            primeras_filas = list(islice(filas, 10))
+            df_raw = pd.DataFrame(primeras_filas)
             
-            print(f"\n🔍 Analizando estructura del archivo...")
-            print("Primeras 10 filas crudas:")
-            print(df_raw.to_string())
+            if self.depuracion:
+                print(f"\n🔍 Analizando estructura del archivo...")
+                print("Primeras 10 filas crudas:")
+                print(df_raw.to_string())
             
             # Encontrar la fila donde empiezan los datos reales
             data_start_row = self.find_data_start_row(df_raw)
             print(f"\n📊 Fila donde inician los datos: {data_start_row}")
             
-            # Leer datos con header correcto pero SIN transformaciones
-            df = pd.read_excel(self.excel_file_path, sheet_name=target_sheet, header=data_start_row)
-            
-            # Solo limpiar nombres de columnas básico
-            df.columns = [self.clean_column_name_basic(col) for col in df.columns]
-            
-            # Eliminar duplicados de columnas
-            df = df.loc[:, ~df.columns.duplicated()]
+            fila_encabezado = primeras_filas[data_start_row] if primeras_filas else ()
+            self.encabezado_detectado = bool(primeras_filas) and self.is_data_header_row(df_raw.iloc[data_start_row])
+            df = self.construir_dataframe(
+                fila_encabezado,
+                chain(primeras_filas[data_start_row + 1:], filas)
+            )
+        
+        with self.medir_etapa('limpieza_columnas'):
+            self.dataframe = self.limpiar_columnas(df)
+        
+        self.mostrar_resumen_lectura()
+        return True
+
+    def cerrar_workbook(self):
+        """Cierra el handle del libro abierto por read_excel_raw"""
+        if self.workbook is not None:
+            self.workbook.close()
+            self.workbook = None
+
+    def expandir_lote(self, lote):
+        """Lista los libros de un directorio o de un patrón glob (ordenados, sin archivos de bloqueo ~$)"""
+        if Path(lote).is_dir():
+            rutas = [str(p) for p in Path(lote).iterdir() if p.suffix.lower() in ('.xlsx', '.xlsm', '.xls', '.csv')]
+        else:
+            rutas = glob.glob(lote, recursive=True)
+        return sorted(r for r in rutas if Path(r).is_file() and not Path(r).name.startswith('~$'))
+
+    def listar_hojas(self, ruta):
+        """Nombres de las hojas de un libro (None para CSV)"""
+        extension = Path(ruta).suffix.lower()
+        if extension == '.csv':
+            return [None]
+        if extension == '.xls':
+            with pd.ExcelFile(ruta) as excel_file:
+                return list(excel_file.sheet_names)
+        from openpyxl import load_workbook
+        workbook = load_workbook(ruta, read_only=True, keep_links=False)
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+
+    def leer_lote(self):
+        """Parsea en paralelo todos los libros/hojas del lote y los une en un solo DataFrame"""
+        rutas = self.expandir_lote(self.lote)
+        if not rutas:
+            logger.error(f"❌ El lote '{self.lote}' no contiene libros")
+            return False
+        
+        with self.medir_etapa('lectura_lote'):
+            tareas = []
+            for ruta in rutas:
+                hojas = self.listar_hojas(ruta) if self.todas_las_hojas else [None]
+                tareas += [(ruta, hoja) for hoja in hojas]
             
-            self.dataframe = df
-            print(f"\n✅ Datos leídos: {df.shape[0]} filas × {df.shape[1]} columnas")
+            workers = min(self.workers, len(tareas))
+            print(f"\n📚 Lote: {len(rutas)} libros, {len(tareas)} hojas, {workers} procesos")
+            argumentos = ([t[0] for t in tareas], [t[1] for t in tareas], [self.todas_las_hojas] * len(tareas),
+                          [self.verbosidad] * len(tareas))
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as ejecutor:
+                    resultados = list(ejecutor.map(leer_hoja_lote, *argumentos))
+            else:
+                resultados = list(map(leer_hoja_lote, *argumentos))
+        
+        partes = []
+        for (ruta, hoja), df in zip(tareas, resultados):
+            if df is None:
+                print(f"  ⚠️  {Path(ruta).name} [{hoja}]: sin encabezado de datos, se omite")
+                continue
+            df.insert(0, 'hoja_origen', hoja or '')
+            df.insert(0, 'archivo_origen', Path(ruta).name)
+            partes.append(df)
+            print(f"  ✅ {Path(ruta).name} [{hoja or 'principal'}]: {len(df)} filas")
+        
+        if not partes:
+            logger.error("❌ Ninguna hoja del lote tiene datos")
+            return False
+        
+        with self.medir_etapa('union_lote'):
+            self.dataframe = pd.concat(partes, ignore_index=True, sort=False)
+        self.mostrar_resumen_lectura()
+        return True
+
+    def read_excel_raw_pandas(self, hoja=None):
+        """Lectura con pandas para formatos que openpyxl no soporta (.xls)"""
+        excel_file = pd.ExcelFile(self.excel_file_path)
+        self.workbook = excel_file
+        target_sheet = hoja or self.seleccionar_hoja(excel_file.sheet_names)
+        
+        df_raw = excel_file.parse(target_sheet, header=None, nrows=10)
+        data_start_row = self.find_data_start_row(df_raw)
+        self.encabezado_detectado = len(df_raw) > 0 and self.is_data_header_row(df_raw.iloc[data_start_row])
+        print(f"\n📊 Fila donde inician los datos: {data_start_row}")
+        
+        df = excel_file.parse(target_sheet, header=data_start_row)
+        self.dataframe = self.limpiar_columnas(df)
+        self.mostrar_resumen_lectura()
+        return True
+
+    def limpiar_columnas(self, df):
+        """Limpia nombres de columnas y elimina columnas duplicadas"""
+        df.columns = [self.clean_column_name_basic(col) for col in df.columns]
+        return df.loc[:, ~df.columns.duplicated()]
+
+    def compactar_dataframe(self):
+        """Categóricas, números reducidos y fecha parseada en el DataFrame crudo; informa la memoria"""
+        # La columna fecha del mapeo (queda en caché para mapear_columnas)
+        mapeo, _desde_cache = self.resolver_mapeo(self.dataframe.columns)
+        columnas_fecha = [mapeo['fecha']] if mapeo.get('fecha') else []
+        self.dataframe, resumen = compactacion.compactar(self.dataframe, columnas_fecha)
+        antes, despues = resumen['antes_mb'], resumen['despues_mb']
+        print(f"\n🗜️  Memoria del DataFrame: {antes:.1f} MB -> {despues:.1f} MB "
+              f"({1 - despues / antes if antes else 0:.0%} menos)")
+        print(f"   {len(resumen['categoricas'])} categóricas, {len(resumen['numericas'])} numéricas reducidas, "
+              f"fecha parseada: {', '.join(resumen['fechas']) or 'no'}")
+        if self.depuracion:
+            for tipo in ('categoricas', 'numericas', 'fechas'):
+                for col in resumen[tipo]:
+                    print(f"  - {col}: {self.dataframe[col].dtype}")
+        logger.info(f"🗜️  Compactación: {antes:.1f} MB -> {despues:.1f} MB")
+        return resumen
+
+    def mostrar_resumen_lectura(self):
+        """Muestra las dimensiones y columnas del DataFrame leído"""
+        df = self.dataframe
+        print(f"\n✅ Datos leídos: {df.shape[0]} filas × {df.shape[1]} columnas")
+        if self.depuracion:
             print("📋 Columnas detectadas:")
             for i, col in enumerate(df.columns, 1):
                 print(f"  {i:2d}. {col}")
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"❌ Error leyendo Excel: {e}")
-            return False
 
     def find_data_start_row(self, df_raw):
         """Encuentra la fila donde empiezan los datos reales"""
@@ -178,10 +549,20 @@ class TemperasVinilosETL:
         
         return col_name or "columna_desconocida"
 
-    def cargar_datos_crudos_mysql(self):
+    def asignar_registro_id(self, df, inicio=1):
+        """Agrega (o reemplaza) la columna registro_id con ids consecutivos desde inicio"""
+        ids = np.arange(inicio, inicio + len(df), dtype=np.int64)
+        if 'registro_id' in df.columns:
+            df['registro_id'] = ids
+        else:
+            df.insert(0, 'registro_id', ids)
+        return df
+
+    def cargar_datos_crudos_mysql(self, df=None, table_name="datos_crudos_temperas_vinilos"):
         """Carga los datos crudos a MySQL para procesamiento con SQL"""
         try:
-            if self.dataframe is None or self.dataframe.empty:
+            df = self.dataframe if df is None else df
+            if df is None or df.empty:
                 logger.error("No hay datos para cargar")
                 return False
             
@@ -189,20 +570,29 @@ class TemperasVinilosETL:
             print("CARGA DE DATOS CRUDOS A MYSQL")
             print("="*70)
             
-            table_name = "datos_crudos_temperas_vinilos"
+            inicio = time.perf_counter()
             
-            # Cargar datos crudos a MySQL
-            self.dataframe.to_sql(
-                name=table_name,
-                con=self.engine,
-                if_exists='replace',
-                index=False,
-                chunksize=1000
-            )
+            if self.modo_carga == 'to_sql':
+                # Carga clásica con inserts parametrizados de pandas
+                df.to_sql(
+                    name=table_name,
+                    con=self.engine,
+                    if_exists='replace',
+                    index=False,
+                    chunksize=1000
+                )
+                modo_usado = 'to_sql'
+            else:
+                modo_usado = self.carga_masiva(df, table_name)
             
-            print(f"✅ Tabla '{table_name}' creada exitosamente")
-            print(f"📊 Total de registros: {len(self.dataframe)}")
-            print(f"🏗️  Total de columnas: {len(self.dataframe.columns)}")
+            duracion = time.perf_counter() - inicio
+            filas_por_segundo = len(df) / duracion if duracion > 0 else float('inf')
+            
+            print(f"✅ Tabla '{table_name}' creada exitosamente (modo: {modo_usado})")
+            print(f"📊 Total de registros: {len(df)}")
+            print(f"🏗️  Total de columnas: {len(df.columns)}")
+            print(f"🚀 Velocidad de carga: {filas_por_segundo:,.0f} filas/s ({duracion:.2f}s)")
+            logger.info(f"🚀 Carga cruda ({modo_usado}): {len(df)} filas en {duracion:.2f}s ({filas_por_segundo:,.0f} filas/s)")
             
             return True
             
@@ -210,151 +600,178 @@ class TemperasVinilosETL:
             logger.error(f"❌ Error cargando datos crudos: {e}")
             return False
 
-    def generar_expresiones_codigos_paro(self, total_codigos=18):
-        """Genera expresiones SQL para procesar hasta 18 códigos de paro"""
-        expresiones_minutos = []
-        expresiones_codigos = []
-        selects_estadisticas = []
-        sumas_minutos = []
+    def carga_masiva(self, df, table_name):
+        """Crea la tabla con DDL tipado y carga con LOAD DATA o lotes executemany.
+
+        La tabla cruda recibe filas en cargas incrementales: se tipa por dominio
+        (BIGINT, DOUBLE, TEXT) y no por el mínimo, máximo o largo de esta carga.
+        """
+        with self.engine.begin() as conn:
+            # registro_id fijo en BIGINT: las cargas incrementales continúan desde MAX(registro_id)
+            tipos = {'registro_id': 'BIGINT'} if 'registro_id' in df.columns else None
+            carga_masiva.crear_tabla(conn, df, table_name, tipos, self.dialecto, dominio=True)
         
-        for i in range(1, total_codigos + 1):
-            # Expresiones para extraer minutos de las celdas de tiempo
-            expr_minutos = f"""
-            CASE 
-                WHEN `Codigo_{i}_en_horas` IS NOT NULL AND `Codigo_{i}_en_horas` != '' 
-                THEN CAST(REGEXP_REPLACE(`Codigo_{i}_en_horas`, '[^0-9.]', '') AS DECIMAL(10,2))
-                ELSE 0 
-            END AS minutos_paro_{i}"""
-            expresiones_minutos.append(expr_minutos)
-            
-            # Expresiones para extraer el número del código de paro
-            # Si hay contenido en la celda de código, usar el número correspondiente
-            expr_codigos = f"""
-            CASE 
-                WHEN `Codigo_de_paro_{i}` IS NOT NULL AND `Codigo_de_paro_{i}` != '' 
-                THEN '{i}'  -- Reemplazar con el número del código
+        if self.modo_carga == 'infile':
+            try:
+                with self.engine.begin() as conn:
+                    carga_masiva.cargar_local(conn, df, table_name, self.dialecto)
+                return 'infile'
+            except Exception as e:
+                if not carga_masiva.es_error_infile_deshabilitado(e):
+                    raise
+                logger.warning(f"⚠️  LOAD DATA LOCAL INFILE deshabilitado, usando lotes: {e}")
+        
+        with self.engine.begin() as conn:
+            carga_masiva.cargar_executemany(conn, df, table_name, self.tamano_lote, self.dialecto)
+        return 'lotes'
+
+    def escribir_dataframe(self, conn, df, table_name, tipos=None, crear=True):
+        """Llena una tabla con el DataFrame usando la conexión dada (crear=True la recrea tipada)"""
+        if crear:
+            carga_masiva.crear_tabla(conn, df, table_name, tipos, self.dialecto)
+        if self.modo_carga == 'infile':
+            try:
+                return carga_masiva.cargar_local(conn, df, table_name, self.dialecto)
+            except Exception as e:
+                if not carga_masiva.es_error_infile_deshabilitado(e):
+                    raise
+                logger.warning(f"⚠️  LOAD DATA LOCAL INFILE deshabilitado, usando lotes: {e}")
+        return carga_masiva.cargar_executemany(conn, df, table_name, self.tamano_lote, self.dialecto)
+
+    def expresiones_paro_slot(self, i):
+        """(código, minutos) del slot i calculados sobre las columnas de la tabla limpia"""
+        horas = self.dialecto.citar(f'Codigo_{i}_en_horas')
+        codigo = self.dialecto.citar(f'Codigo_de_paro_{i}')
+        # Si hay contenido en la celda de código, usar el número correspondiente
+        expr_codigo = f"""CASE 
+                WHEN {self.dialecto.con_contenido(codigo)}
+                THEN {i}
                 ELSE NULL 
-            END AS codigo_paro_{i}"""
-            expresiones_codigos.append(expr_codigos)
-            
-            # Para estadísticas
+            END"""
+        expr_minutos = f"""CASE 
+                WHEN {self.dialecto.con_contenido(horas)}
+                THEN {self.dialecto.numero(horas)}
+                ELSE 0 
+            END"""
+        return expr_codigo, expr_minutos
+
+    def generar_expresiones_codigos_paro(self, slots):
+        """Genera las expresiones de estadísticas de los slots de código de paro"""
+        selects_estadisticas = []
+        sumas_minutos = []
+        for i in slots:
             selects_estadisticas.append(f"SUM(CASE WHEN codigo_paro_{i} IS NOT NULL THEN 1 ELSE 0 END) as paros_{i}")
             sumas_minutos.append(f"SUM(minutos_paro_{i}) as total_minutos_{i}")
         
         return {
-            'minutos': ',\n            '.join(expresiones_minutos),
-            'codigos': ',\n            '.join(expresiones_codigos),
             'estadisticas': ',\n            '.join(selects_estadisticas),
             'sumas_minutos': ',\n            '.join(sumas_minutos)
         }
 
-    def procesar_codigos_paro(self, conn, mapeo_columnas):
-        """Procesa los códigos de paro - separa código (número) de minutos"""
-        print(f"\n🔄 Procesando códigos de paro (1-18)...")
-        
-        # Verificar las columnas reales en la tabla limpia
-        print(f"🔍 Verificando columnas disponibles en la tabla limpia...")
-        result = conn.execute(text("SHOW COLUMNS FROM datos_limpios_temperas_vinilos"))
-        columnas_limpias = [row[0] for row in result.fetchall()]
-        
-        print(f"📋 Columnas disponibles en tabla limpia:")
-        columnas_codigos = [col for col in columnas_limpias if 'codigo' in col.lower()]
-        for col in columnas_codigos[:10]:
-            print(f"  - {col}")
-        if len(columnas_codigos) > 10:
-            print(f"  - ... ({len(columnas_codigos) - 10} columnas más)")
-        
-        # Generar expresiones SQL dinámicamente
-        expresiones = self.generar_expresiones_codigos_paro(18)
-        
-        # Crear tabla temporal para procesar códigos de paro
-        temp_table_query = f"""
-        CREATE TABLE IF NOT EXISTS temp_codigos_paro AS
-        SELECT *,
-            -- Extraer minutos de las columnas de códigos en horas
-            {expresiones['minutos']},
-            
-            -- Extraer solo el número del código de paro 
-            -- Si hay contenido en la celda, usar el número correspondiente
-            {expresiones['codigos']}
-            
-        FROM datos_limpios_temperas_vinilos;
+    def select_paros_procesados(self, origen='datos_limpios_temperas_vinilos'):
+        """SELECT de la tabla final con los códigos de paro procesados.
+
+        Lee directamente la tabla limpia: la extracción de código y minutos de
+        cada slot va en la misma sentencia, sin tabla intermedia que copie
+        todas las columnas y se vuelva a leer.
         """
-        
-        try:
-            conn.execute(text(temp_table_query))
-            print("✅ Tabla temporal 'temp_codigos_paro' creada")
-        except Exception as e:
-            print(f"❌ Error creando tabla temporal: {e}")
-            print(f"🔍 Columnas disponibles en datos_limpios_temperas_vinilos:")
-            for col in columnas_limpias:
-                if any(f'codigo_{i}' in col.lower() for i in range(1, 19)):
-                    print(f"  - {col}")
-            return False
-        
-        # Crear tabla final con los códigos de paro procesados
-        final_table_query = """
-        CREATE TABLE IF NOT EXISTS datos_paros_procesados AS
+        query = """
         SELECT 
             -- Columnas básicas
-            fecha, mes, año, maquina, operario, referencia,
+            registro_id, fecha, mes, año, maquina, maquina_id, operario, operario_id, referencia,
             pacas_producidas, horas_trabajadas, horas_no_trabajadas, tiempo_de_paro,
             turno_inicio, turno_final,
             
             -- Códigos de paro procesados (números) y minutos"""
         
-        # Agregar columnas dinámicas para códigos 1-18
-        for i in range(1, 19):
-            final_table_query += f",\n            codigo_paro_{i}, minutos_paro_{i}"
+        # Agregar columnas de los slots con datos
+        for i in self.slots:
+            expr_codigo, expr_minutos = self.expresiones_paro_slot(i)
+            query += f""",
+            {expr_codigo} AS codigo_paro_{i},
+            {expr_minutos} AS minutos_paro_{i}"""
         
         # Agregar información adicional de paros
-        final_table_query += """,
+        query += f""",
             
             -- Información adicional de paros preservada
             sub_codigo_de_paro_1, subcodigo_3, subcodigo_5,
             area_involucrada_en_subcodigo_5, personal_involucrado, observaciones
             
-        FROM temp_codigos_paro;
-        """
+        FROM {origen}"""
+        return query
+
+    def procesar_codigos_paro(self, conn, mapeo_columnas):
+        """Procesa los códigos de paro - separa código (número) de minutos"""
+        print(f"\n🔄 Procesando códigos de paro ({self.descripcion_slots()})...")
+        
+        if self.depuracion:
+            # Verificar las columnas reales en la tabla limpia
+            print(f"🔍 Verificando columnas disponibles en la tabla limpia...")
+            columnas_limpias = [nombre for nombre, _tipo in self.dialecto.columnas(conn, 'datos_limpios_temperas_vinilos')]
+            
+            print(f"📋 Columnas disponibles en tabla limpia:")
+            columnas_codigos = [col for col in columnas_limpias if 'codigo' in col.lower()]
+            for col in columnas_codigos[:10]:
+                print(f"  - {col}")
+            if len(columnas_codigos) > 10:
+                print(f"  - ... ({len(columnas_codigos) - 10} columnas más)")
         
-        conn.execute(text(final_table_query))
+        # Una sola sentencia desde la tabla limpia (sin tabla temporal intermedia)
+        try:
+            self.refrescar_tabla(conn, 'datos_paros_procesados', self.select_paros_procesados())
+        except Exception as e:
+            print(f"❌ Error creando 'datos_paros_procesados': {e}")
+            print(f"🔍 Columnas disponibles en datos_limpios_temperas_vinilos:")
+            for col, _tipo in self.dialecto.columnas(conn, 'datos_limpios_temperas_vinilos'):
+                if 'codigo' in col.lower():
+                    print(f"  - {col}")
+            return False
         print("✅ Tabla 'datos_paros_procesados' creada")
         
-        # Mostrar estadísticas de paros procesados
+        if self.depuracion:
+            self.mostrar_estadisticas_paros(conn)
+        return True
+
+    def mostrar_estadisticas_paros(self, conn):
+        """Diagnóstico de depuración: conteos y minutos por código y filas de ejemplo (escanea la tabla)"""
+        if not self.slots:
+            print(f"\n📊 Sin slots de código de paro con datos")
+            return
+        expresiones = self.generar_expresiones_codigos_paro(self.slots)
         stats_query = f"""
         SELECT 
             COUNT(*) as total_registros,
             {expresiones['estadisticas']},
             {expresiones['sumas_minutos']}
-        FROM datos_paros_procesados;
+        FROM {self.tabla_vigente('datos_paros_procesados')};
         """
         
         result = conn.execute(text(stats_query))
-        stats = result.fetchone()
+        stats = result.mappings().fetchone()
         
-        print(f"\n📊 ESTADÍSTICAS DE PAROS PROCESADOS (1-18):")
-        print(f"   Total registros: {stats[0]}")
+        print(f"\n📊 ESTADÍSTICAS DE PAROS PROCESADOS ({self.descripcion_slots()}):")
+        print(f"   Total registros: {stats['total_registros']}")
         
         # Mostrar estadísticas para cada código
-        for i in range(1, 19):
-            paros_count = stats[i]  # índice 1-18 para conteos
-            minutos_total = stats[18 + i]  # índice 19-36 para minutos
+        for i in self.slots:
+            paros_count = stats[f'paros_{i}']
+            minutos_total = stats[f'total_minutos_{i}']
             if paros_count > 0:
                 print(f"   Paros código {i}: {paros_count} registros (Total minutos: {minutos_total})")
         
         # Calcular total general de minutos
-        total_minutos_general = sum(stats[19:37])
+        total_minutos_general = sum(stats[f'total_minutos_{i}'] or 0 for i in self.slots)
         print(f"   🔴 TOTAL MINUTOS PARO: {total_minutos_general}")
         
-        # Mostrar ejemplos de datos procesados
+        # Mostrar ejemplos de datos procesados (primeros tres slots)
         print(f"\n🔍 EJEMPLOS DE DATOS PROCESADOS:")
-        ejemplo_query = """
+        primeros = self.slots[:3]
+        ejemplo_query = f"""
         SELECT 
-            codigo_paro_1, minutos_paro_1,
-            codigo_paro_2, minutos_paro_2,
-            codigo_paro_3, minutos_paro_3
-        FROM datos_paros_procesados 
-        WHERE codigo_paro_1 IS NOT NULL OR codigo_paro_2 IS NOT NULL OR codigo_paro_3 IS NOT NULL
+            {', '.join(f'codigo_paro_{i}, minutos_paro_{i}' for i in primeros)}
+        FROM {self.tabla_vigente('datos_paros_procesados')} 
+        WHERE {' OR '.join(f'codigo_paro_{i} IS NOT NULL' for i in primeros)}
         LIMIT 5;
         """
         
@@ -363,15 +780,423 @@ class TemperasVinilosETL:
         
         for i, ejemplo in enumerate(ejemplos, 1):
             print(f"   Ejemplo {i}:")
-            for j in range(0, 6, 2):
+            for j in range(0, 2 * len(primeros), 2):
                 codigo = ejemplo[j]
                 minutos = ejemplo[j+1]
                 if codigo is not None:
                     print(f"     - Código {codigo}: {minutos} minutos")
+
+    def resolver_mapeo(self, columnas_reales):
+        """(mapeo, desde_cache) de las columnas base y de los slots de código presentes en el libro"""
+        slots = self.detectar_slots_paro(columnas_reales)
+        return self.resolutor.mapear(columnas_reales, resolutor_columnas.columnas_esperadas(slots))
+
+    def mapear_columnas(self, columnas_reales):
+        """Mapea las columnas esperadas contra las columnas reales de la tabla cruda"""
+        print(f"\n🔄 Mapeando columnas...")
+        mapeo_columnas, desde_cache = self.resolver_mapeo(columnas_reales)
+        if self.depuracion:
+            for col_esperada, col_real in mapeo_columnas.items():
+                if 'codigo' in col_esperada and any(str(i) in col_esperada for i in range(1, 6)):
+                    print(f"  ✅ '{col_esperada}' -> '{col_real}'" if col_real
+                          else f"  ⚠️  '{col_esperada}' -> NO ENCONTRADA")
         
-        # Limpiar tabla temporal
-        conn.execute(text("DROP TABLE IF EXISTS temp_codigos_paro"))
-        print("✅ Tabla temporal eliminada")
+        columnas_encontradas = sum(1 for col_real in mapeo_columnas.values() if col_real)
+        origen = " (mapeo en caché)" if desde_cache else ""
+        print(f"\n📊 Resumen mapeo: {columnas_encontradas}/{len(mapeo_columnas)} columnas encontradas{origen}")
+        return mapeo_columnas
+
+    def expresion_columna(self, nombre_columna, mapeo, es_numerica=False, defecto=None):
+        """Genera la expresión SQL de una columna mapeada (o su valor por defecto)"""
+        col_real = mapeo.get(nombre_columna)
+        if col_real:
+            if es_numerica:
+                return self.dialecto.numero(self.dialecto.citar(col_real))
+            else:
+                return self.dialecto.citar(col_real)
+        else:
+            if defecto is not None:
+                return defecto
+            if es_numerica:
+                return "0"
+            else:
+                return "NULL"
+
+    def expresion_fecha(self, mapeo):
+        """Fecha truncada a DATE (columna tipada de las tablas derivadas)"""
+        return self.dialecto.fecha(self.expresion_columna('fecha', mapeo)) if mapeo.get('fecha') else "NULL"
+
+    def expresion_codigo_paro(self, nombre_columna, mapeo):
+        """Texto del código de paro; en columnas crudas numéricas el 0 equivale a celda vacía"""
+        col_real = mapeo.get(nombre_columna)
+        if col_real:
+            return self.expresion_codigo_crudo(col_real)
+        return self.expresion_columna(nombre_columna, mapeo)
+
+    def expresion_texto_crudo(self, expresion, col_real):
+        """Texto de una columna cruda; las numéricas se imprimen como en MySQL (3.0 -> '3')"""
+        if esquema.es_tipo_numerico(self.tipos_crudos.get(col_real, '')):
+            return self.dialecto.texto_numero(expresion)
+        return f"CAST({expresion} AS CHAR)"
+
+    def expresion_codigo_crudo(self, col_real):
+        """Columna cruda de código de paro con NULLIF(col, 0) si su tipo es numérico"""
+        if esquema.es_tipo_numerico(self.tipos_crudos.get(col_real, '')):
+            return f"NULLIF({self.dialecto.citar(col_real)}, 0)"
+        return self.dialecto.citar(col_real)
+
+    def joins_lookups(self, mapeo):
+        """LEFT JOIN a las dimensiones de máquina y operario y expresiones de sus ids"""
+        joins = []
+        ids = {}
+        for dimension, (tabla, alias) in {'maquina': ('dim_maquina', 'dm'), 'operario': ('dim_operario', 'dop')}.items():
+            id_col, nombre_col, *_resto = dimensiones.DIMENSIONES[tabla]
+            if mapeo.get(dimension):
+                condicion = self.dialecto.igual_texto(f"{alias}.{nombre_col}", self.dialecto.citar(mapeo[dimension]))
+                joins.append(f"LEFT JOIN {tabla} {alias} ON {condicion}")
+                ids[dimension] = f"{alias}.{id_col}"
+            else:
+                ids[dimension] = "NULL"
+        return "\n                ".join(joins), ids
+
+    def sincronizar_dimensiones(self, conn, df, mapeo):
+        """Da de alta en las dimensiones los valores nuevos del libro (cache en memoria)"""
+        for nombre, tabla in dimensiones.ORIGEN_DIMENSION.items():
+            serie = limpieza_vectorizada.columna(df, mapeo, nombre)
+            if serie is not None:
+                valores = limpieza_vectorizada.como_texto(serie).dropna().unique()
+                self.dimensiones.registrar(conn, tabla, valores)
+
+    def hechos_dimensionales(self, conn, df, mapeo):
+        """DataFrame de fact_registro_produccion con claves enteras"""
+        return dimensiones.fact_registro_produccion(df, mapeo, self.dimensiones, conn)
+
+    def detalle_paros(self, conn, tabla='fact_paros'):
+        """DataFrame de fact_detalle_paros leído una sola vez de la tabla larga ya construida"""
+        df_paros = self.leer_sql(conn, f"SELECT registro_id, slot, codigo, subcodigo, minutos "
+                                       f"FROM {tabla} ORDER BY registro_id, slot")
+        return dimensiones.fact_detalle_paros(df_paros, self.dimensiones, conn)
+
+    def select_datos_limpios(self, mapeo_columnas, origen='datos_crudos_temperas_vinilos'):
+        """SELECT que limpia los datos crudos (números, turno y códigos de paro)"""
+        expr = self.expresion_columna
+        joins, ids = self.joins_lookups(mapeo_columnas)
+        query = f"""
+                SELECT 
+                    -- Columnas básicas
+                    registro_id,
+                    {self.expresion_fecha(mapeo_columnas)} AS fecha,
+                    {expr('mes', mapeo_columnas)} AS mes,
+                    {expr('año', mapeo_columnas, True, defecto='NULL')} AS año,
+                    {expr('maquina', mapeo_columnas)} AS maquina,
+                    {ids['maquina']} AS maquina_id,
+                    {expr('operario', mapeo_columnas)} AS operario,
+                    {ids['operario']} AS operario_id,
+                    {expr('referencia', mapeo_columnas)} AS referencia,
+                    
+                    -- Extraer números de texto
+                    {expr('pacas_producidas', mapeo_columnas, True)} AS pacas_producidas,
+                    {expr('horas_trabajadas', mapeo_columnas, True)} AS horas_trabajadas,
+                    {expr('horas_no_trabajadas', mapeo_columnas, True)} AS horas_no_trabajadas,
+                    {expr('tiempo_de_paro', mapeo_columnas, True)} AS tiempo_de_paro,
+                    
+                    -- Separar turno en inicio y final
+                    {self.dialecto.subcadena(expr('turno', mapeo_columnas), '-', 1)} AS turno_inicio,
+                    {self.dialecto.subcadena(expr('turno', mapeo_columnas), '-', -1)} AS turno_final"""
+        
+        # Agregar columnas de códigos de los slots con datos
+        for i in self.slots:
+            query += f""",
+                    -- Códigos de paro {i} (preservar texto original)
+                    {expr(f'codigo_{i}_en_horas', mapeo_columnas)} AS Codigo_{i}_en_horas,
+                    {self.expresion_codigo_paro(f'codigo_de_paro_{i}', mapeo_columnas)} AS Codigo_de_paro_{i}"""
+        
+        # Agregar columnas adicionales
+        query += f""",
+                    
+                    -- Textos originales adicionales
+                    {expr('sub_codigo_de_paro_1', mapeo_columnas)} AS sub_codigo_de_paro_1,
+                    {expr('subcodigo_3', mapeo_columnas)} AS subcodigo_3,
+                    {expr('subcodigo_5', mapeo_columnas)} AS subcodigo_5,
+                    {expr('area_involucrada_en_subcodigo_5', mapeo_columnas)} AS area_involucrada_en_subcodigo_5,
+                    {expr('personal_involucrado', mapeo_columnas)} AS personal_involucrado,
+                    {expr('observaciones', mapeo_columnas)} AS observaciones
+                    
+                FROM {origen}
+                {joins}"""
+        return query
+
+    def select_produccion_maquina(self, origen='datos_limpios_temperas_vinilos'):
+        return f"""
+                SELECT 
+                    registro_id, fecha, mes, maquina, maquina_id,
+                    COALESCE(pacas_producidas, 0) AS pacas_producidas,
+                    COALESCE(horas_trabajadas, 0) AS horas_trabajadas,
+                    COALESCE(tiempo_de_paro, 0) AS tiempo_de_paro,
+                    turno_inicio, turno_final
+                FROM {origen}"""
+
+    def select_produccion_operario(self, origen='datos_limpios_temperas_vinilos'):
+        return f"""
+                SELECT 
+                    registro_id, fecha, mes, maquina, maquina_id, operario, operario_id, referencia,
+                    COALESCE(pacas_producidas, 0) AS pacas_producidas,
+                    COALESCE(horas_trabajadas, 0) AS horas_trabajadas,
+                    turno_inicio, turno_final
+                FROM {origen}"""
+
+    def select_analisis_paros(self, origen='datos_paros_procesados'):
+        query = """
+                SELECT 
+                    registro_id, fecha, mes, maquina, maquina_id, operario, operario_id"""
+        
+        # Agregar columnas de los slots con datos
+        for i in self.slots:
+            query += f",\n                    codigo_paro_{i}, minutos_paro_{i}"
+        
+        # Calcular total de minutos
+        suma_minutos = " + ".join([f"COALESCE(minutos_paro_{i}, 0)" for i in self.slots]) or "0"
+        query += f",\n                    ({suma_minutos}) as total_minutos_paro"
+        query += f"\n                FROM {origen}"
+        return query
+
+    def refrescar_tabla(self, conn, nombre, select_sql=None, df=None, tipos=None):
+        """Reconstruye una tabla derivada en una tabla sombra y la intercambia con RENAME TABLE.
+
+        La tabla sombra se llena con select_sql o, en el motor vectorizado, con
+        el DataFrame df. Los lectores (Grafana) siguen viendo la versión anterior
+        completa hasta el intercambio atómico; nunca ven una tabla a medio construir.
+        Dentro de transaccion_etapa el intercambio se hace al terminar la etapa.
+        Devuelve las filas escritas (None si el driver no las informa).
+        """
+        sombra = self.crear_sombra(conn, nombre)
+        if df is not None:
+            self.escribir_dataframe(conn, df, sombra, tipos, crear=esquema.columnas_tabla(nombre) is None)
+            filas = len(df)
+        elif esquema.columnas_tabla(nombre) is not None:
+            # Tabla con esquema explícito: DDL tipado y después INSERT ... SELECT
+            filas = conn.execute(text(f"INSERT INTO {sombra}{select_sql}")).rowcount
+        else:
+            filas = conn.execute(text(f"CREATE TABLE {sombra} AS{select_sql}")).rowcount
+        if self.intercambios_pendientes is None:
+            self.intercambiar_tabla(conn, nombre)
+        else:
+            self.intercambios_pendientes.append(nombre)
+        self.filas_tablas[nombre] = filas if filas is not None and filas >= 0 else None
+        return self.filas_tablas[nombre]
+
+    def filas_tabla(self, conn, nombre):
+        """Filas de una tabla según su carga; en depuración (o si no se conocen) con COUNT(*)"""
+        filas = self.filas_tablas.get(nombre)
+        if filas is None and not self.depuracion:
+            return 'n/d'
+        if self.depuracion:
+            filas = conn.execute(text(f"SELECT COUNT(*) FROM {nombre}")).scalar()
+        return filas
+
+    def crear_sombra(self, conn, nombre):
+        """Elimina restos de ejecuciones previas y crea la tabla sombra tipada si tiene esquema"""
+        sombra = f"{nombre}__nueva"
+        conn.execute(text(f"DROP TABLE IF EXISTS {sombra}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {nombre}__vieja"))
+        if esquema.columnas_tabla(nombre) is not None:
+            conn.execute(text(esquema.ddl_tabla(nombre, self.slots, nombre_fisico=sombra, dialecto=self.dialecto)))
+        return sombra
+
+    def intercambiar_tabla(self, conn, nombre):
+        """Crea los índices de la tabla sombra ya llena y la intercambia (RENAME TABLE en MySQL)"""
+        self.dialecto.intercambiar(conn, nombre, f"{nombre}__nueva",
+                                   lambda fisica: esquema.ddl_indices(nombre, fisica))
+
+    def intercambiar_tablas(self, conn, nombres):
+        """Intercambia varias tablas sombra a la vez (un solo RENAME TABLE en MySQL)"""
+        self.dialecto.intercambiar_varias(conn, [(nombre, f"{nombre}__nueva") for nombre in nombres],
+                                          esquema.ddl_indices)
+
+    def intercambiar_pendientes(self, conn):
+        """Publica las tablas refrescadas en la etapa en curso"""
+        pendientes, self.intercambios_pendientes = self.intercambios_pendientes, None
+        self.intercambiar_tablas(conn, pendientes or [])
+
+    def tabla_vigente(self, nombre):
+        """Tabla física con la última versión: la sombra si su intercambio sigue pendiente"""
+        if self.intercambios_pendientes and nombre in self.intercambios_pendientes:
+            return f"{nombre}__nueva"
+        return nombre
+
+    def aplicar_esquema(self):
+        """Crea las dimensiones y las tablas derivadas que aún no existen, con sus índices"""
+        try:
+            with self.engine.begin() as conn:
+                for sentencia in dimensiones.ddl_dimensiones(self.dialecto):
+                    conn.execute(text(sentencia))
+                existentes = set(inspect(conn).get_table_names())
+                for tabla in esquema.TABLAS:
+                    if tabla in existentes:
+                        continue
+                    conn.execute(text(esquema.ddl_tabla(tabla, dialecto=self.dialecto)))
+                    for indice in esquema.ddl_indices(tabla):
+                        conn.execute(text(indice))
+                    print(f"🧱 Tabla '{tabla}' creada con esquema tipado")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error aplicando el esquema: {e}")
+            return False
+
+    def refrescar_tablas_especificas(self, conn):
+        """Reconstruye las tablas por máquina, por operario y de análisis de paros"""
+        tablas = [
+            ('produccion_maquina', self.select_produccion_maquina()),
+            ('produccion_operario', self.select_produccion_operario()),
+            # Usa los datos de paros procesados
+            ('analisis_paros', self.select_analisis_paros()),
+        ]
+        for tabla, select_sql in tablas:
+            self.refrescar_tabla(conn, tabla, select_sql)
+            print(f"✅ Tabla '{tabla}' creada")
+        return [tabla for tabla, _ in tablas]
+
+    def refrescar_resumenes(self, conn):
+        """Reconstruye los resúmenes OEE pre-agregados para Grafana"""
+        for tabla, dimension in resumenes.TABLAS_RESUMEN.items():
+            self.refrescar_tabla(conn, tabla, resumenes.select_resumen(dimension, dialecto=self.dialecto))
+            print(f"✅ Tabla '{tabla}' creada (día/semana/mes)")
+        return list(resumenes.TABLAS_RESUMEN)
+
+    def calcular_oee(self, conn):
+        """Calcula el OEE con NumPy desde produccion_maquina y analisis_paros y lo guarda en resultados_oee"""
+        inicio = time.perf_counter()
+        df_maquina = self.leer_sql(conn,
+            "SELECT registro_id, fecha, maquina, pacas_producidas, horas_trabajadas, tiempo_de_paro, turno_inicio "
+            "FROM produccion_maquina")
+        df_paros = self.leer_sql(conn, "SELECT * FROM analisis_paros")
+        df_operario = self.leer_sql(conn, "SELECT registro_id, operario, referencia FROM produccion_operario")
+        
+        # Objetivos por producto de dim_producto, salvo que la configuración defina otros
+        config = self.oee_config
+        objetivos = conn.execute(text(
+            "SELECT nombre_producto, objetivo_produccion_hora FROM dim_producto "
+            "WHERE objetivo_produccion_hora > 0")).fetchall()
+        if objetivos:
+            config = {**config, 'tasas_ideales': {**config['tasas_ideales'], 'referencia': {
+                **{nombre: float(tasa) for nombre, tasa in objetivos},
+                **config['tasas_ideales'].get('referencia', {}),
+            }}}
+        
+        registros = oee.unir_registros(df_maquina, df_paros, df_operario)
+        df_oee = oee.resultados_tabla(oee.preparar(registros, config), config)
+        self.refrescar_tabla(conn, 'resultados_oee', df=df_oee)
+        print(f"✅ Tabla 'resultados_oee' creada ({len(df_oee)} filas, "
+              f"{time.perf_counter() - inicio:.2f}s)")
+        return ['resultados_oee']
+
+    def detectar_slots_con_datos(self, df):
+        """Fija self.slots con los slots de código de paro que tienen datos en el DataFrame.
+
+        Las columnas, el SQL y el DDL de las tablas limpia, de paros y de
+        análisis se generan solo para esos slots.
+        """
+        presentes = self.detectar_slots_paro(df.columns)
+        self.slots = limpieza_vectorizada.slots_con_datos(df, presentes)
+        print(f"🧮 Slots de código de paro con datos: {self.descripcion_slots()} "
+              f"({len(self.slots)} de {len(presentes)} en el libro)")
+        return self.slots
+
+    def descripcion_slots(self):
+        """'1-5' si los slots son consecutivos; si no, la lista"""
+        if not self.slots:
+            return "ninguno"
+        if len(self.slots) == 1:
+            return str(self.slots[0])
+        if self.slots == list(range(self.slots[0], self.slots[-1] + 1)):
+            return f"{self.slots[0]}-{self.slots[-1]}"
+        return ", ".join(str(i) for i in self.slots)
+
+    def slots_tabla(self, conn, tabla):
+        """Slots con columna codigo_paro_N en una tabla ya creada"""
+        slots = []
+        for nombre, _tipo in self.dialecto.columnas(conn, tabla):
+            coincidencia = re.match(r'^codigo_paro_(\d+)$', nombre)
+            if coincidencia:
+                slots.append(int(coincidencia.group(1)))
+        return sorted(slots)
+
+    def slots_columnas(self, columnas):
+        """Columnas de los slots de self.slots presentes en columnas (detectar_slots_paro)"""
+        return {n: cols for n, cols in self.detectar_slots_paro(columnas).items() if n in self.slots}
+
+    def detectar_slots_paro(self, columnas):
+        """Detecta los slots de código de paro presentes en las columnas crudas.
+
+        Devuelve {slot: {'codigo': col, 'horas': col, 'subcodigo': col}} sin
+        límite fijo de slots.
+        """
+        patrones = {
+            'codigo': re.compile(r'^codigo_de_paro_(\d+)$'),
+            'horas': re.compile(r'^codigo_(\d+)_en_horas$'),
+            'subcodigo': re.compile(r'^sub_?codigo(?:_de_paro)?_(\d+)$'),
+        }
+        slots = {}
+        for col in columnas:
+            for tipo, patron in patrones.items():
+                coincidencia = patron.match(resolutor_columnas.normalizar_nombre(col))
+                if coincidencia:
+                    slot = slots.setdefault(int(coincidencia.group(1)), {'codigo': None, 'horas': None, 'subcodigo': None})
+                    if slot[tipo] is None:
+                        slot[tipo] = col
+        return {n: slots[n] for n in sorted(slots) if slots[n]['codigo'] or slots[n]['horas']}
+
+    def select_fact_paros(self, mapeo_columnas, slots, origen='datos_crudos_temperas_vinilos'):
+        """SELECT de la tabla larga fact_paros: una fila por (registro, slot) con paro"""
+        expr = self.expresion_columna
+        joins, ids = self.joins_lookups(mapeo_columnas)
+        partes = []
+        for n, columnas in slots.items():
+            citar = self.dialecto.citar
+            # Mismo criterio que Codigo_de_paro_N en la tabla limpia: el 0 numérico no es un paro
+            codigo = self.expresion_codigo_crudo(columnas['codigo']) if columnas['codigo'] else "NULL"
+            subcodigo = citar(columnas['subcodigo']) if columnas['subcodigo'] else "NULL"
+            # Mismo texto que el motor vectorizado: es el que se da de alta en dim_codigo_paro
+            codigo_texto = self.expresion_texto_crudo(codigo, columnas['codigo']) if columnas['codigo'] else "NULL"
+            subcodigo_texto = (self.expresion_texto_crudo(subcodigo, columnas['subcodigo'])
+                               if columnas['subcodigo'] else "NULL")
+            if columnas['horas']:
+                horas = citar(columnas['horas'])
+                minutos = (f"CASE WHEN {self.dialecto.con_contenido(horas)} "
+                           f"THEN {self.dialecto.numero(horas)} ELSE 0 END")
+            else:
+                minutos = "0"
+            partes.append(f"""
+                SELECT 
+                    registro_id,
+                    {self.expresion_fecha(mapeo_columnas)} AS fecha,
+                    {expr('maquina', mapeo_columnas)} AS maquina,
+                    {ids['maquina']} AS maquina_id,
+                    {expr('operario', mapeo_columnas)} AS operario,
+                    {ids['operario']} AS operario_id,
+                    {n} AS slot,
+                    {codigo_texto} AS codigo,
+                    {subcodigo_texto} AS subcodigo,
+                    {minutos} AS minutos
+                FROM {origen}
+                {joins}
+                WHERE ({self.dialecto.con_contenido(codigo)}) OR {minutos} > 0""")
+        return "\n                UNION ALL".join(partes)
+
+    def construir_fact_paros(self, conn, mapeo_columnas, columnas_crudas, claves=None):
+        """Construye fact_paros (formato largo) a partir de la tabla cruda"""
+        slots = self.slots_columnas(columnas_crudas)
+        if not slots:
+            print("⚠️  Sin columnas de códigos de paro: 'fact_paros' no se construye")
+            return False
+        
+        if self.motor_limpieza == 'python':
+            df_fact = limpieza_vectorizada.fact_paros(self.dataframe, mapeo_columnas, slots, claves)
+            self.refrescar_tabla(conn, 'fact_paros', df=df_fact)
+        else:
+            self.refrescar_tabla(conn, 'fact_paros', self.select_fact_paros(mapeo_columnas, slots))
+        print(f"✅ Tabla 'fact_paros' creada ({len(slots)} slots de código: {min(slots)}-{max(slots)})")
+        return True
 
     def ejecutar_queries_limpieza(self):
         """Ejecuta queries SQL para limpiar y transformar los datos"""
@@ -384,189 +1209,91 @@ class TemperasVinilosETL:
                 
                 # Primero, obtener los nombres reales de las columnas
                 print(f"\n🔍 Obteniendo estructura de la tabla cruda...")
-                result = conn.execute(text("SHOW COLUMNS FROM datos_crudos_temperas_vinilos"))
-                columnas_reales = [row[0] for row in result.fetchall()]
+                filas_columnas = self.dialecto.columnas(conn, 'datos_crudos_temperas_vinilos')
+                columnas_reales = [row[0] for row in filas_columnas]
+                self.tipos_crudos = {row[0]: str(row[1]) for row in filas_columnas}
                 
                 print(f"📋 Columnas reales en la tabla: {len(columnas_reales)}")
-                for i, col in enumerate(columnas_reales, 1):
-                    print(f"  {i:2d}. {col}")
-                
-                # Función para mapear nombres de columnas
-                def encontrar_columna_exacta(patron, columnas):
-                    patron_lower = patron.lower()
-                    for col in columnas:
-                        if patron_lower in col.lower():
-                            return col
-                    return None
+                if self.depuracion:
+                    for i, col in enumerate(columnas_reales, 1):
+                        print(f"  {i:2d}. {col}")
                 
                 # Mapear columnas esperadas vs reales
-                mapeo_columnas = {}
-                columnas_esperadas = [
-                    'fecha', 'mes', 'año', 'maquina', 'operario', 'referencia',
-                    'pacas_producidas', 'horas_trabajadas', 'horas_no_trabajadas', 'tiempo_de_paro',
-                    'turno'
-                ]
+                mapeo_columnas = self.mapear_columnas(columnas_reales)
+                self.detectar_slots_con_datos(self.dataframe)
                 
-                # Agregar columnas para códigos 1-18
-                for i in range(1, 19):
-                    columnas_esperadas.extend([
-                        f'codigo_{i}_en_horas',
-                        f'codigo_de_paro_{i}'
-                    ])
-                
-                # Agregar columnas adicionales
-                columnas_esperadas.extend([
-                    'sub_codigo_de_paro_1', 'subcodigo_3', 'subcodigo_5',
-                    'area_involucrada_en_subcodigo_5', 'personal_involucrado', 'observaciones'
-                ])
-                
-                print(f"\n🔄 Mapeando columnas...")
-                columnas_encontradas = 0
-                for col_esperada in columnas_esperadas:
-                    col_real = encontrar_columna_exacta(col_esperada, columnas_reales)
-                    if col_real:
-                        mapeo_columnas[col_esperada] = col_real
-                        columnas_encontradas += 1
-                        if 'codigo' in col_esperada and any(str(i) in col_esperada for i in range(1, 6)):
-                            print(f"  ✅ '{col_esperada}' -> '{col_real}'")
-                    else:
-                        mapeo_columnas[col_esperada] = None
-                        if 'codigo' in col_esperada and any(str(i) in col_esperada for i in range(1, 6)):
-                            print(f"  ⚠️  '{col_esperada}' -> NO ENCONTRADA")
-                
-                print(f"\n📊 Resumen mapeo: {columnas_encontradas}/{len(columnas_esperadas)} columnas encontradas")
-                
-                # Función para generar la expresión SQL
-                def generar_expresion_sql(nombre_columna, mapeo, es_numerica=False):
-                    col_real = mapeo.get(nombre_columna)
-                    if col_real:
-                        if es_numerica:
-                            return f"CAST(REGEXP_REPLACE(`{col_real}`, '[^0-9.]', '') AS DECIMAL(10,2))"
-                        else:
-                            return f"`{col_real}`"
-                    else:
-                        if es_numerica:
-                            return "0"
-                        else:
-                            return "NULL"
+                # Cada etapa confirma su trabajo con un solo commit: las tablas ya
+                # intercambiadas quedan visibles y los bloqueos se liberan antes de la siguiente
+                with self.transaccion_etapa(conn, 'dimensiones'):
+                    # Claves sustitutas de las dimensiones (resueltas en memoria)
+                    self.sincronizar_dimensiones(conn, self.dataframe, mapeo_columnas)
+                claves = self.dimensiones.claves() if self.motor_limpieza == 'python' else None
                 
                 # 1. Crear tabla limpia
                 print(f"\n🔄 Creando tabla con datos limpios...")
                 
-                create_clean_table_query = f"""
-                CREATE TABLE IF NOT EXISTS datos_limpios_temperas_vinilos AS
-                SELECT 
-                    -- Columnas básicas
-                    {generar_expresion_sql('fecha', mapeo_columnas)} AS fecha,
-                    {generar_expresion_sql('mes', mapeo_columnas)} AS mes,
-                    {generar_expresion_sql('año', mapeo_columnas)} AS año,
-                    {generar_expresion_sql('maquina', mapeo_columnas)} AS maquina,
-                    {generar_expresion_sql('operario', mapeo_columnas)} AS operario,
-                    {generar_expresion_sql('referencia', mapeo_columnas)} AS referencia,
-                    
-                    -- Extraer números de texto
-                    {generar_expresion_sql('pacas_producidas', mapeo_columnas, True)} AS pacas_producidas,
-                    {generar_expresion_sql('horas_trabajadas', mapeo_columnas, True)} AS horas_trabajadas,
-                    {generar_expresion_sql('horas_no_trabajadas', mapeo_columnas, True)} AS horas_no_trabajadas,
-                    {generar_expresion_sql('tiempo_de_paro', mapeo_columnas, True)} AS tiempo_de_paro,
-                    
-                    -- Separar turno en inicio y final
-                    SUBSTRING_INDEX({generar_expresion_sql('turno', mapeo_columnas)}, '-', 1) AS turno_inicio,
-                    SUBSTRING_INDEX({generar_expresion_sql('turno', mapeo_columnas)}, '-', -1) AS turno_final"""
-                
-                # Agregar columnas de códigos dinámicamente (1-18)
-                for i in range(1, 19):
-                    create_clean_table_query += f""",
-                    -- Códigos de paro {i} (preservar texto original)
-                    {generar_expresion_sql(f'codigo_{i}_en_horas', mapeo_columnas)} AS Codigo_{i}_en_horas,
-                    {generar_expresion_sql(f'codigo_de_paro_{i}', mapeo_columnas)} AS Codigo_de_paro_{i}"""
-                
-                # Agregar columnas adicionales
-                create_clean_table_query += f""",
-                    
-                    -- Textos originales adicionales
-                    {generar_expresion_sql('sub_codigo_de_paro_1', mapeo_columnas)} AS sub_codigo_de_paro_1,
-                    {generar_expresion_sql('subcodigo_3', mapeo_columnas)} AS subcodigo_3,
-                    {generar_expresion_sql('subcodigo_5', mapeo_columnas)} AS subcodigo_5,
-                    {generar_expresion_sql('area_involucrada_en_subcodigo_5', mapeo_columnas)} AS area_involucrada_en_subcodigo_5,
-                    {generar_expresion_sql('personal_involucrado', mapeo_columnas)} AS personal_involucrado,
-                    {generar_expresion_sql('observaciones', mapeo_columnas)} AS observaciones
-                    
-                FROM datos_crudos_temperas_vinilos;
-                """
-                
-                conn.execute(text(create_clean_table_query))
+                with self.transaccion_etapa(conn, 'tabla_limpia'):
+                    if self.motor_limpieza == 'python':
+                        # Motor vectorizado: la limpieza se hace en pandas y se cargan columnas tipadas
+                        df_limpio = limpieza_vectorizada.limpiar(self.dataframe, mapeo_columnas, self.slots, claves)
+                        self.refrescar_tabla(conn, 'datos_limpios_temperas_vinilos', df=df_limpio)
+                    else:
+                        self.refrescar_tabla(conn, 'datos_limpios_temperas_vinilos', self.select_datos_limpios(mapeo_columnas))
                 print("✅ Tabla 'datos_limpios_temperas_vinilos' creada")
                 
-                # Contar registros en tabla limpia
-                result = conn.execute(text("SELECT COUNT(*) FROM datos_limpios_temperas_vinilos"))
-                count = result.fetchone()[0]
-                print(f"📊 Registros en tabla limpia: {count}")
-                
-                # Mostrar estructura de la tabla limpia
-                print(f"\n🔍 Estructura de la tabla limpia (primeros códigos):")
-                result = conn.execute(text("SHOW COLUMNS FROM datos_limpios_temperas_vinilos"))
-                columnas_count = 0
-                for row in result.fetchall():
-                    if 'codigo' in row[0].lower() and any(str(i) in row[0].lower() for i in range(1, 6)):
-                        print(f"  - {row[0]} ({row[1]})")
-                        columnas_count += 1
+                print(f"📊 Registros en tabla limpia: {self.filas_tabla(conn, 'datos_limpios_temperas_vinilos')}")
                 
-                print(f"  - ... ({36 - columnas_count} columnas más de códigos 6-18)")
+                if self.depuracion:
+                    # Mostrar estructura de la tabla limpia
+                    print(f"\n🔍 Estructura de la tabla limpia (primeros códigos):")
+                    columnas_count = 0
+                    for row in self.dialecto.columnas(conn, 'datos_limpios_temperas_vinilos'):
+                        if 'codigo' in row[0].lower() and any(str(i) in row[0].lower() for i in range(1, 6)):
+                            print(f"  - {row[0]} ({row[1]})")
+                            columnas_count += 1
+                    
+                    print(f"  - ... ({2 * len(self.slots) - columnas_count} columnas más de códigos)")
                 
                 # PROCESAR CÓDIGOS DE PARO - NUEVA LÓGICA
-                self.procesar_codigos_paro(conn, mapeo_columnas)
+                with self.transaccion_etapa(conn, 'codigos_paro'):
+                    if self.motor_limpieza == 'python':
+                        self.refrescar_tabla(conn, 'datos_paros_procesados',
+                                             df=limpieza_vectorizada.procesar_paros(df_limpio, self.slots))
+                        print("✅ Tabla 'datos_paros_procesados' creada (motor vectorizado)")
+                    elif not self.procesar_codigos_paro(conn, mapeo_columnas):
+                        raise RuntimeError("no se pudo crear 'datos_paros_procesados'")
                 
                 # Crear las tablas específicas
                 print(f"\n🔄 Creando tablas específicas...")
                 
                 tablas_creadas = ['datos_crudos_temperas_vinilos', 'datos_limpios_temperas_vinilos', 'datos_paros_procesados']
                 
-                # Tabla: Produccion_maquina
-                conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS produccion_maquina AS
-                SELECT 
-                    fecha, mes, maquina, 
-                    COALESCE(pacas_producidas, 0) AS pacas_producidas,
-                    COALESCE(horas_trabajadas, 0) AS horas_trabajadas,
-                    COALESCE(tiempo_de_paro, 0) AS tiempo_de_paro,
-                    turno_inicio, turno_final
-                FROM datos_limpios_temperas_vinilos;
-                """))
-                tablas_creadas.append('produccion_maquina')
-                print("✅ Tabla 'produccion_maquina' creada")
-                
-                # Tabla: Produccion_operario
-                conn.execute(text("""
-                CREATE TABLE IF NOT EXISTS produccion_operario AS
-                SELECT 
-                    fecha, mes, maquina, operario, referencia,
-                    COALESCE(pacas_producidas, 0) AS pacas_producidas,
-                    COALESCE(horas_trabajadas, 0) AS horas_trabajadas,
-                    turno_inicio, turno_final
-                FROM datos_limpios_temperas_vinilos;
-                """))
-                tablas_creadas.append('produccion_operario')
-                print("✅ Tabla 'produccion_operario' creada")
-                
-                # Tabla: Analisis_paros (usando los datos procesados)
-                analisis_query = """
-                CREATE TABLE IF NOT EXISTS analisis_paros AS
-                SELECT 
-                    fecha, mes, maquina, operario"""
-                
-                # Agregar columnas dinámicas para códigos 1-18
-                for i in range(1, 19):
-                    analisis_query += f",\n                    codigo_paro_{i}, minutos_paro_{i}"
-                
-                # Calcular total de minutos
-                suma_minutos = " + ".join([f"COALESCE(minutos_paro_{i}, 0)" for i in range(1, 19)])
-                analisis_query += f",\n                    ({suma_minutos}) as total_minutos_paro"
-                analisis_query += "\n                FROM datos_paros_procesados;"
+                with self.transaccion_etapa(conn, 'tablas_derivadas'):
+                    # Tablas produccion_maquina, produccion_operario y analisis_paros
+                    with self.medir_etapa('tablas_especificas'):
+                        tablas_creadas += self.refrescar_tablas_especificas(conn)
+                    
+                    # Tabla: fact_paros (una fila por paro, sin límite de slots)
+                    with self.medir_etapa('fact_paros'):
+                        if self.construir_fact_paros(conn, mapeo_columnas, columnas_reales, claves):
+                            tablas_creadas.append('fact_paros')
+                    
+                    # Hechos compactos con claves enteras (dim_maquina, dim_operario, dim_producto, dim_codigo_paro)
+                    with self.medir_etapa('hechos_dimensionales'):
+                        df_registro = self.hechos_dimensionales(conn, self.dataframe, mapeo_columnas)
+                        self.refrescar_tabla(conn, 'fact_registro_produccion', df=df_registro)
+                        tablas_creadas.append('fact_registro_produccion')
+                        if 'fact_paros' in tablas_creadas:
+                            self.refrescar_tabla(conn, 'fact_detalle_paros',
+                                                 df=self.detalle_paros(conn, self.tabla_vigente('fact_paros')))
+                            tablas_creadas.append('fact_detalle_paros')
+                print("✅ Tablas 'fact_registro_produccion' y 'fact_detalle_paros' creadas (claves enteras)")
                 
-                conn.execute(text(analisis_query))
-                tablas_creadas.append('analisis_paros')
-                print("✅ Tabla 'analisis_paros' creada")
+                # Resúmenes OEE pre-agregados para Grafana
+                with self.transaccion_etapa(conn, 'resumenes'):
+                    tablas_creadas += self.refrescar_resumenes(conn)
+                with self.transaccion_etapa(conn, 'oee'):
+                    tablas_creadas += self.calcular_oee(conn)
                 
                 # Tablas adicionales básicas
                 tablas_adicionales = [
@@ -576,37 +1303,426 @@ class TemperasVinilosETL:
                     ('porcentaje_codigo_paro', "CREATE TABLE IF NOT EXISTS porcentaje_codigo_paro AS SELECT * FROM datos_paros_procesados WHERE 1=0")
                 ]
                 
-                for nombre_tabla, query in tablas_adicionales:
-                    try:
-                        conn.execute(text(query))
-                        tablas_creadas.append(nombre_tabla)
-                        print(f"✅ Tabla '{nombre_tabla}' creada (estructura básica)")
-                    except Exception as e:
-                        print(f"❌ No se pudo crear '{nombre_tabla}': {e}")
+                # También en su propia etapa: un solo commit y no quedan fuera de ninguna transacción
+                with self.transaccion_etapa(conn, 'tablas_basicas'):
+                    for nombre_tabla, query in tablas_adicionales:
+                        try:
+                            conn.execute(text(query))
+                            tablas_creadas.append(nombre_tabla)
+                            print(f"✅ Tabla '{nombre_tabla}' creada (estructura básica)")
+                        except Exception as e:
+                            print(f"❌ No se pudo crear '{nombre_tabla}': {e}")
                 
-                # Mostrar resumen de tablas creadas
+                # Mostrar resumen de tablas creadas (filas según la carga, sin re-escanear)
+                self.filas_tablas['datos_crudos_temperas_vinilos'] = len(self.dataframe)
                 print(f"\n📊 RESUMEN DE TABLAS CREADAS:")
                 for table in tablas_creadas:
                     try:
-                        result = conn.execute(text(f"SELECT COUNT(*) FROM {table}"))
-                        count = result.fetchone()[0]
-                        print(f"   ✅ {table}: {count} registros")
+                        print(f"   ✅ {table}: {self.filas_tabla(conn, table)} registros")
                     except:
                         print(f"   ⚠️  {table}: no se pudo contar")
-                
                 return True
                 
         except Exception as e:
             logger.error(f"❌ Error ejecutando queries SQL: {e}")
             return False
 
+    def ejecutar_incremental(self):
+        """Carga solo las filas insertadas, actualizadas o eliminadas y las propaga a las tablas derivadas"""
+        try:
+            print(f"\n" + "="*70)
+            print("CARGA INCREMENTAL POR HUELLA DE FILA")
+            print("="*70)
+            
+            mapeo = self.mapear_columnas(list(self.dataframe.columns))
+            if not mapeo.get('fecha') or not mapeo.get('maquina'):
+                logger.warning("⚠️  Sin columnas fecha/maquina: se ejecuta carga completa")
+                return self.ejecutar_carga_completa(mapeo=mapeo)
+            
+            existentes = set(inspect(self.engine).get_table_names())
+            tablas_requeridas = (['datos_crudos_temperas_vinilos', incremental.TABLA_HUELLAS]
+                                 + incremental.TABLAS_POR_REGISTRO + list(resumenes.TABLAS_RESUMEN))
+            guardadas = None
+            if all(t in existentes for t in tablas_requeridas):
+                with self.engine.connect() as conn:
+                    guardadas = self.leer_sql(conn, f"SELECT registro_id, clave, huella, maquina, fecha "
+                                                    f"FROM {incremental.TABLA_HUELLAS}")
+            if guardadas is None or guardadas.empty:
+                print("ℹ️  Sin huellas de filas previas: primera carga completa")
+                return self.ejecutar_carga_completa(mapeo=mapeo)
+            
+            with self.engine.connect() as conn:
+                self.tipos_crudos = dict(self.dialecto.columnas(conn, 'datos_crudos_temperas_vinilos'))
+                ultimo_id = conn.execute(text("SELECT COALESCE(MAX(registro_id), 0) FROM datos_crudos_temperas_vinilos")).scalar()
+                slots_guardados = self.slots_tabla(conn, 'datos_paros_procesados')
+            columnas_crudas = set(self.tipos_crudos)
+            if not (set(self.dataframe.columns) | {'registro_id'}) <= columnas_crudas:
+                print("⚠️  El libro tiene columnas nuevas: se reconstruye todo")
+                return self.ejecutar_carga_completa(mapeo=mapeo)
+            if self.detectar_slots_con_datos(self.dataframe) != slots_guardados:
+                print("⚠️  Cambiaron los slots de código con datos: se reconstruye todo")
+                return self.ejecutar_carga_completa(mapeo=mapeo)
+            incompatibles = carga_masiva.columnas_incompatibles(self.dataframe, self.tipos_crudos)
+            if incompatibles:
+                print(f"⚠️  Cambió el tipo de {len(incompatibles)} columnas ({', '.join(incompatibles[:5])}): se reconstruye todo")
+                return self.ejecutar_carga_completa(mapeo=mapeo)
+            
+            # Los registros nuevos continúan la numeración existente; los actualizados conservan su id
+            cambios = incremental.calcular_cambios(self.dataframe, mapeo, guardadas, int(ultimo_id) + 1)
+            df_delta, borrados, afectadas = cambios['delta'], cambios['borrados'], cambios['afectadas']
+            conteos = cambios['conteos']
+            print(f"📊 Filas: {conteos['insertadas']} nuevas, {conteos['actualizadas']} actualizadas, "
+                  f"{conteos['eliminadas']} eliminadas, {conteos['sin_cambios']} sin cambios")
+            if df_delta.empty and borrados.empty:
+                print("✅ Sin cambios desde la última carga")
+                return True
+            
+            for maquina, desde in afectadas.items():
+                alcance = f"desde {desde:%Y-%m-%d}" if desde is not None else "completos"
+                print(f"  🔄 {maquina or '(sin máquina)'}: resúmenes {alcance}")
+            
+            # Preparar tablas de staging (DDL fuera de la transacción)
+            staging = {
+                'crudos': 'stg_datos_crudos',
+                'limpios': 'stg_datos_limpios',
+                'paros': 'stg_paros_procesados',
+                'borrados': 'stg_registros_borrados',
+                'fact': 'stg_fact_paros',
+            }
+            self.eliminar_tablas(staging.values())
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(text(f"CREATE TABLE {staging['borrados']} (registro_id BIGINT NOT NULL PRIMARY KEY)"))
+                    if not borrados.empty:
+                        self.escribir_dataframe(conn, borrados, staging['borrados'], crear=False)
+                if not df_delta.empty:
+                    if not self.cargar_datos_crudos_mysql(df_delta, staging['crudos']):
+                        return False
+                    with self.engine.connect() as conn:
+                        self.sincronizar_dimensiones(conn, df_delta, mapeo)
+                        df_registro = self.hechos_dimensionales(conn, df_delta, mapeo)
+                        # Staging con el mismo DDL tipado que las tablas finales
+                        for tabla, fisica in (('datos_limpios_temperas_vinilos', staging['limpios']),
+                                              ('datos_paros_procesados', staging['paros']),
+                                              ('fact_paros', staging['fact'])):
+                            conn.execute(text(esquema.ddl_tabla(tabla, self.slots, nombre_fisico=fisica, dialecto=self.dialecto)))
+                        # fact_detalle_paros del delta se lee de sus filas de fact_paros
+                        slots = self.slots_columnas(df_delta.columns)
+                        df_detalle = None
+                        if slots:
+                            conn.execute(text(f"INSERT INTO {staging['fact']}{self.select_fact_paros(mapeo, slots, staging['crudos'])}"))
+                            df_detalle = self.detalle_paros(conn, staging['fact'])
+                        if self.motor_limpieza == 'python':
+                            df_limpio = limpieza_vectorizada.limpiar(df_delta, mapeo, self.slots, self.dimensiones.claves())
+                            self.escribir_dataframe(conn, df_limpio, staging['limpios'], crear=False)
+                            self.escribir_dataframe(conn, limpieza_vectorizada.procesar_paros(df_limpio, self.slots),
+                                                    staging['paros'], crear=False)
+                        else:
+                            conn.execute(text(f"INSERT INTO {staging['limpios']}{self.select_datos_limpios(mapeo, staging['crudos'])}"))
+                            conn.execute(text(f"INSERT INTO {staging['paros']}{self.select_paros_procesados(staging['limpios'])}"))
+                        conn.commit()
+            
+                # Borrar las filas actualizadas o eliminadas e insertar el delta en una sola transacción
+                columnas = ', '.join(self.dialecto.citar(c) for c in df_delta.columns)
+                with self.engine.begin() as conn:
+                    if not borrados.empty:
+                        for tabla in ['datos_crudos_temperas_vinilos', incremental.TABLA_HUELLAS] + incremental.TABLAS_POR_REGISTRO:
+                            conn.execute(text(f"DELETE FROM {tabla} WHERE registro_id IN "
+                                              f"(SELECT registro_id FROM {staging['borrados']})"))
+                
+                    if not df_delta.empty:
+                        conn.execute(text(f"INSERT INTO datos_crudos_temperas_vinilos ({columnas}) SELECT {columnas} FROM {staging['crudos']}"))
+                        conn.execute(text(f"INSERT INTO datos_limpios_temperas_vinilos SELECT * FROM {staging['limpios']}"))
+                        conn.execute(text(f"INSERT INTO datos_paros_procesados SELECT * FROM {staging['paros']}"))
+                        conn.execute(text(f"INSERT INTO produccion_maquina{self.select_produccion_maquina(staging['limpios'])}"))
+                        conn.execute(text(f"INSERT INTO produccion_operario{self.select_produccion_operario(staging['limpios'])}"))
+                        conn.execute(text(f"INSERT INTO analisis_paros{self.select_analisis_paros(staging['paros'])}"))
+                        if df_detalle is not None:
+                            conn.execute(text(f"INSERT INTO fact_paros SELECT * FROM {staging['fact']}"))
+                        self.escribir_dataframe(conn, df_registro, 'fact_registro_produccion', crear=False)
+                        if df_detalle is not None and not df_detalle.empty:
+                            self.escribir_dataframe(conn, df_detalle, 'fact_detalle_paros', crear=False)
+                        self.escribir_dataframe(conn, cambios['huellas'], incremental.TABLA_HUELLAS, crear=False)
+                
+                    # Recalcular solo los periodos afectados de los resúmenes
+                    for tabla, dimension in resumenes.TABLAS_RESUMEN.items():
+                        for sentencia, params in resumenes.sentencias_incrementales(tabla, dimension, afectadas, self.dialecto):
+                            conn.execute(text(sentencia), params)
+            
+                # El OEE se recalcula completo: es una pasada vectorizada sobre las tablas ya
+                # actualizadas (fuera de la transacción porque RENAME TABLE hace commit implícito)
+                with self.engine.begin() as conn:
+                    self.calcular_oee(conn)
+            finally:
+                # Las tablas de staging no deben quedar si la carga falla a mitad
+                self.eliminar_staging(staging.values())
+            
+            print(f"✅ Carga incremental completada: {len(df_delta)} filas escritas, {len(borrados)} reemplazadas o eliminadas")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Error en carga incremental: {e}")
+            return False
+
+    def ejecutar_carga_completa(self, mapeo=None):
+        """Carga completa y registro de las huellas por fila para la próxima carga incremental"""
+        self.asignar_registro_id(self.dataframe)
+        if not self.cargar_datos_crudos_mysql():
+            return False
+        if not self.ejecutar_queries_limpieza():
+            return False
+        self.registrar_huellas(mapeo)
+        return True
+
+    def registrar_huellas(self, mapeo=None):
+        """Reemplaza las huellas por fila con las de la carga completa recién hecha.
+
+        Sin DataFrame completo (modo --pipeline) o sin columnas fecha/maquina
+        solo se vacía la tabla: la próxima carga incremental será completa.
+        """
+        filas = None
+        if self.dataframe is not None:
+            mapeo = mapeo or self.mapear_columnas(list(self.dataframe.columns))
+            if mapeo.get('fecha') and mapeo.get('maquina'):
+                filas = incremental.huellas(self.dataframe, mapeo)
+        with self.engine.begin() as conn:
+            conn.execute(text(incremental.DDL_HUELLAS))
+            conn.execute(text(f"DELETE FROM {incremental.TABLA_HUELLAS}"))
+            if filas is not None:
+                self.escribir_dataframe(conn, filas, incremental.TABLA_HUELLAS, crear=False)
+        if filas is not None:
+            print(f"🔑 Huellas registradas para {len(filas)} filas")
+
+    def eliminar_staging(self, tablas):
+        """Elimina las tablas de staging sin ocultar el error de la carga que las usaba"""
+        try:
+            self.eliminar_tablas(tablas)
+        except Exception as e:
+            logger.warning(f"⚠️  No se pudieron eliminar las tablas de staging: {e}")
+
+    def eliminar_tablas(self, tablas):
+        """Elimina tablas si existen"""
+        with self.engine.connect() as conn:
+            for tabla in tablas:
+                conn.execute(text(f"DROP TABLE IF EXISTS {tabla}"))
+            conn.commit()
+
+    def diferencias_paridad(self):
+        """{tabla: (filas, [(columna, filas_distintas)])} entre las tablas construidas y el motor vectorizado"""
+        mapeo = self.mapear_columnas(list(self.dataframe.columns))
+        with self.engine.connect() as conn:
+            self.dimensiones.cargar(conn)
+        df_limpio = limpieza_vectorizada.limpiar(self.dataframe, mapeo, self.slots, self.dimensiones.claves())
+        esperados = {
+            'datos_limpios_temperas_vinilos': df_limpio,
+            'datos_paros_procesados': limpieza_vectorizada.procesar_paros(df_limpio, self.slots),
+        }
+        slots = self.slots_columnas(self.dataframe.columns)
+        if slots:
+            esperados['fact_paros'] = limpieza_vectorizada.fact_paros(
+                self.dataframe, mapeo, slots, self.dimensiones.claves())
+        
+        diferencias = {}
+        with self.engine.connect() as conn:
+            for tabla, df_python in esperados.items():
+                # Los motores columnares no conservan el orden de inserción
+                orden = ['registro_id', 'slot'] if 'slot' in df_python.columns else ['registro_id']
+                df_sql = self.leer_sql(conn, f"SELECT * FROM {tabla} ORDER BY {', '.join(orden)}")
+                df_python = df_python.sort_values(orden, kind='stable')
+                diferencias[tabla] = (len(df_python), limpieza_vectorizada.comparar_motores(df_sql, df_python))
+        return diferencias
+
+    def verificar_paridad_limpieza(self):
+        """Compara las tablas construidas por SQL con el motor vectorizado"""
+        print(f"\n🔬 Verificando paridad SQL vs motor vectorizado...")
+        paridad = True
+        for tabla, (filas_tabla, diferencias) in self.diferencias_paridad().items():
+            if diferencias:
+                paridad = False
+                for columna, filas in diferencias:
+                    print(f"   ❌ {tabla}.{columna}: {filas} filas distintas")
+            else:
+                print(f"   ✅ {tabla}: resultados idénticos ({filas_tabla} filas)")
+        return paridad
+
+    def iterar_bloques(self, tamano_bloque):
+        """Genera el libro en bloques de filas con las columnas ya limpias, sin cargarlo entero"""
+        extension = Path(self.excel_file_path).suffix.lower()
+        if extension == '.csv':
+            for bloque in pd.read_csv(self.excel_file_path, chunksize=tamano_bloque):
+                yield self.limpiar_columnas(bloque)
+            return
+        if extension == '.xls':
+            # El lector de .xls no permite streaming: se lee completo y se reparte en bloques
+            self.read_excel_raw_pandas()
+            df, self.dataframe = self.dataframe, None
+            for inicio in range(0, len(df), tamano_bloque):
+                yield df.iloc[inicio:inicio + tamano_bloque].reset_index(drop=True)
+            return
+        
+        from openpyxl import load_workbook
+        self.workbook = load_workbook(self.excel_file_path, read_only=True, data_only=True, keep_links=False)
+        target_sheet = self.seleccionar_hoja(self.workbook.sheetnames)
+        filas = self.workbook[target_sheet].iter_rows(values_only=True)
+        
+        primeras_filas = list(islice(filas, 10))
+        data_start_row = self.find_data_start_row(pd.DataFrame(primeras_filas))
+        print(f"\n📊 Fila donde inician los datos: {data_start_row}")
+        
+        fila_encabezado = primeras_filas[data_start_row] if primeras_filas else ()
+        columnas = [self.clean_column_name_basic(c)
+                    for c in self.nombres_encabezado(fila_encabezado, len(fila_encabezado))]
+        unicas = ~pd.Index(columnas).duplicated()
+        
+        def a_dataframe(bloque):
+            ancho = len(columnas)
+            bloque = [tuple(f[:ancho]) + (None,) * (ancho - len(f)) for f in bloque]
+            return pd.DataFrame.from_records(bloque, columns=columnas).loc[:, unicas]
+        
+        bloque = []
+        vacias = []
+        for fila in chain(primeras_filas[data_start_row + 1:], filas):
+            # Las filas vacías solo se conservan si hay datos después (igual que construir_dataframe)
+            if all(v is None for v in fila):
+                vacias.append(fila)
+                continue
+            bloque += vacias
+            vacias = []
+            bloque.append(fila)
+            if len(bloque) >= tamano_bloque:
+                yield a_dataframe(bloque)
+                bloque = []
+        if bloque:
+            yield a_dataframe(bloque)
+
+    def limpiar_bloque(self, df, mapeo, slots):
+        """Etapa limpiadora: ids, limpieza vectorizada y hechos de un bloque"""
+        df = self.asignar_registro_id(df, self.siguiente_registro_id)
+        self.siguiente_registro_id += len(df)
+        
+        with self.engine.begin() as conn:
+            self.sincronizar_dimensiones(conn, df, mapeo)
+            claves = self.dimensiones.claves()
+            resultado = {
+                'datos_crudos_temperas_vinilos': df,
+                'fact_registro_produccion': dimensiones.fact_registro_produccion(df, mapeo, self.dimensiones, conn),
+            }
+            if slots:
+                df_fact = limpieza_vectorizada.fact_paros(df, mapeo, slots, claves)
+                resultado['fact_paros'] = df_fact
+                resultado['fact_detalle_paros'] = dimensiones.fact_detalle_paros(df_fact, self.dimensiones, conn)
+        
+        df_limpio = limpieza_vectorizada.limpiar(df, mapeo, self.slots, claves)
+        resultado['datos_limpios_temperas_vinilos'] = df_limpio
+        resultado['datos_paros_procesados'] = limpieza_vectorizada.procesar_paros(df_limpio, self.slots)
+        return resultado
+
+    def cargar_bloque(self, resultado):
+        """Etapa cargadora: escribe un bloque en las tablas sombra (también la cruda)"""
+        with self.engine.begin() as conn:
+            for tabla, df in resultado.items():
+                if not df.empty:
+                    self.escribir_dataframe(conn, df, f"{tabla}__nueva", crear=False)
+        self.filas_pipeline += len(resultado['datos_crudos_temperas_vinilos'])
+
+    def ejecutar_pipeline(self):
+        """Lee, limpia y carga por bloques con etapas concurrentes unidas por colas acotadas.
+
+        La limpieza usa el motor vectorizado bloque a bloque; todas las tablas,
+        incluida la cruda, se escriben en sombras que al terminar se intercambian
+        juntas, y después se reconstruyen con SQL las tablas agregadas y los
+        resúmenes. Si el pipeline falla, las tablas vigentes no cambian.
+        """
+        try:
+            print(f"\n" + "="*70)
+            print(f"PIPELINE POR BLOQUES ({self.tamano_bloque} filas, cola de {self.tamano_cola})")
+            print("="*70)
+            
+            if self.dialecto.en_memoria(self.db_config):
+                # Limpiadora y cargadora abrirían transacciones a la vez sobre la misma conexión
+                logger.error("❌ El pipeline por bloques necesita una base en archivo (--db-path)")
+                return False
+            
+            bloques = self.iterar_bloques(self.tamano_bloque)
+            primero = next(bloques, None)
+            if primero is None:
+                logger.error("No hay datos para cargar")
+                return False
+            
+            mapeo = self.mapear_columnas(list(primero.columns))
+            # Sin el libro completo no se sabe qué slots tienen datos: se usan los del encabezado
+            slots = self.detectar_slots_paro(primero.columns)
+            self.slots = list(slots)
+            tablas = ['datos_crudos_temperas_vinilos', 'datos_limpios_temperas_vinilos',
+                      'datos_paros_procesados', 'fact_registro_produccion']
+            if slots:
+                tablas += ['fact_paros', 'fact_detalle_paros']
+            
+            # Los tipos de cada bloque varían: la tabla cruda guarda el texto de las celdas
+            plantilla = self.asignar_registro_id(primero.head(0).copy())
+            tipos = {col: 'TEXT' for col in primero.columns}
+            tipos['registro_id'] = 'BIGINT'
+            self.tipos_crudos = dict(tipos)
+            with self.engine.begin() as conn:
+                for tabla in tablas:
+                    self.crear_sombra(conn, tabla)
+                carga_masiva.crear_tabla(conn, plantilla, 'datos_crudos_temperas_vinilos__nueva', tipos, self.dialecto)
+            
+            self.siguiente_registro_id = 1
+            self.filas_pipeline = 0
+            estadisticas = pipeline.ejecutar_etapas(
+                chain([primero], bloques),
+                lambda bloque: self.limpiar_bloque(bloque, mapeo, slots),
+                self.cargar_bloque,
+                self.tamano_cola
+            )
+            print(f"📊 {self.filas_pipeline} filas en {estadisticas['bloques']} bloques "
+                  f"(lector esperando cola: {estadisticas['espera_lector']:.2f}s, "
+                  f"cargador esperando datos: {estadisticas['espera_cargador']:.2f}s)")
+            
+            with self.engine.begin() as conn:
+                self.intercambiar_tablas(conn, tablas)
+                for tabla in tablas:
+                    print(f"✅ Tabla '{tabla}' creada")
+                self.refrescar_tablas_especificas(conn)
+                self.refrescar_resumenes(conn)
+                self.calcular_oee(conn)
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Error en el pipeline por bloques: {e}")
+            return False
+
+    @contextmanager
+    def consola(self):
+        """En modo silencioso descarta la salida de consola y los logs por debajo de WARNING"""
+        if self.verbosidad != 'silencioso':
+            yield
+            return
+        # El FileHandler (también StreamHandler) sigue registrando todo en etl_process.log
+        manejadores = [h for h in logging.getLogger().handlers if type(h) is logging.StreamHandler]
+        niveles = [h.level for h in manejadores]
+        for manejador in manejadores:
+            manejador.setLevel(logging.WARNING)
+        try:
+            with open(os.devnull, 'w') as nulo, redirect_stdout(nulo):
+                yield
+        finally:
+            for manejador, nivel in zip(manejadores, niveles):
+                manejador.setLevel(nivel)
+
     def run_etl(self):
+        """Ejecuta el ETL (sin salida de consola en modo silencioso)"""
+        with self.consola():
+            return self.ejecutar_etl()
+
+    def ejecutar_etl(self):
         """Ejecuta el ETL híbrido Python + SQL"""
         print("="*70)
         print("ETL HÍBRIDO - PYTHON + SQL")
         print("="*70)
         print("🎯 ESTRATEGIA: Python lee datos + SQL los transforma")
-        print("⚡ PROCESAMIENTO: 18 códigos de paro (separación código/minutos)")
+        print("⚡ PROCESAMIENTO: slots de código de paro con datos (separación código/minutos)")
         print("🆕 NUEVA LÓGICA: Si hay contenido → código = número, minutos = valor")
         print("="*70)
         
@@ -614,24 +1730,68 @@ class TemperasVinilosETL:
         if not self.excel_file_path:
             print("🔍 Buscando archivo Excel...")
         
-        if not self.validate_file_path():
-            return False
+        with self.medir_etapa('busqueda_archivo'):
+            if not self.lote and not self.validate_file_path():
+                return False
         
         # 2. Conectar a MySQL
-        if not self.connect_to_mysql():
-            return False
-        
-        # 3. Leer Excel
-        if not self.read_excel_raw():
-            return False
+        with self.medir_etapa('conexion_mysql'):
+            if not self.connect_to_mysql():
+                return False
         
-        # 4. Cargar datos crudos a MySQL
-        if not self.cargar_datos_crudos_mysql():
-            return False
+        # 2b. Esquema tipado (lookups, tablas derivadas e índices)
+        with self.medir_etapa('esquema'):
+            if not self.aplicar_esquema():
+                return False
         
-        # 5. Ejecutar lógica de transformación en SQL
-        if not self.ejecutar_queries_limpieza():
-            return False
+        try:
+            if self.pipeline:
+                # 3-5. Leer, limpiar y cargar por bloques con etapas concurrentes
+                with self.medir_etapa('pipeline') as metrica:
+                    if not self.ejecutar_pipeline():
+                        return False
+                    metrica['filas'] = self.filas_pipeline
+                # Sin el libro completo en memoria no hay huellas: la próxima incremental recarga todo
+                self.registrar_huellas()
+            else:
+                # 3. Leer Excel (un libro o el lote completo en paralelo)
+                with self.medir_etapa('lectura') as metrica:
+                    if not (self.leer_lote() if self.lote else self.read_excel_raw()):
+                        return False
+                    metrica['filas'] = len(self.dataframe)
+                
+                if self.compactar:
+                    with self.medir_etapa('compactacion'):
+                        self.compactar_dataframe()
+                
+                if self.incremental:
+                    # 4-5. Cargar y transformar solo filas nuevas o modificadas
+                    with self.medir_etapa('carga_incremental') as metrica:
+                        metrica['filas'] = len(self.dataframe)
+                        if not self.ejecutar_incremental():
+                            return False
+                else:
+                    # 4. Cargar datos crudos a MySQL
+                    with self.medir_etapa('carga_datos_crudos') as metrica:
+                        metrica['filas'] = len(self.dataframe)
+                        self.asignar_registro_id(self.dataframe)
+                        if not self.cargar_datos_crudos_mysql():
+                            return False
+                    
+                    # 5. Ejecutar lógica de transformación en SQL
+                    with self.medir_etapa('transformacion_sql') as metrica:
+                        metrica['filas'] = len(self.dataframe)
+                        if not self.ejecutar_queries_limpieza():
+                            return False
+                    
+                    # 6. Huellas por fila para la próxima carga incremental
+                    with self.medir_etapa('huellas') as metrica:
+                        metrica['filas'] = len(self.dataframe)
+                        self.registrar_huellas()
+        finally:
+            self.cerrar_workbook()
+            self.mostrar_metricas_etapas()
+            self.exportar_metricas()
         
         print("\n🎉 ETL HÍBRIDO COMPLETADO EXITOSAMENTE!")
         print("="*70)
@@ -644,45 +1804,170 @@ class TemperasVinilosETL:
         
         return True
 
+def leer_hoja_lote(ruta, hoja=None, exigir_encabezado=False, verbosidad='normal'):
+    """Tarea de un proceso del lote: lee una hoja y limpia sus columnas.
+
+    Devuelve None si exigir_encabezado y la hoja no tiene encabezado de datos.
+    """
+    etl = TemperasVinilosETL(excel_file_path=ruta, verbosidad=verbosidad)
+    try:
+        with etl.consola():
+            leida = etl.leer_excel_streaming(hoja)
+        if not leida:
+            return None
+        if exigir_encabezado and not etl.encabezado_detectado:
+            return None
+        return etl.dataframe
+    finally:
+        etl.cerrar_workbook()
+
 def main():
     parser = argparse.ArgumentParser(description='ETL Híbrido Python + SQL - SEPARACIÓN CÓDIGOS/MINUTOS')
     parser.add_argument('--excel-file', help='Ruta del archivo Excel')
     parser.add_argument('--db-host', default='localhost', help='Host de MySQL')
-    parser.add_argument('--db-user', help='Usuario de MySQL')
-    parser.add_argument('--db-password', help='Contraseña de MySQL')
+    parser.add_argument('--db-user', default=os.environ.get('ETL_DB_USER'),
+                        help='Usuario de MySQL (por defecto $ETL_DB_USER)')
+    parser.add_argument('--db-password', default=os.environ.get('ETL_DB_PASSWORD'),
+                        help='Contraseña de MySQL (por defecto $ETL_DB_PASSWORD)')
     parser.add_argument('--db-name', default='TEMPERAS', help='Nombre de la BD')
+    parser.add_argument('--backend', choices=list(backends.DIALECTOS) + ['embebido'], default='mysql',
+                        help='Servidor MySQL o base embebida en proceso (embebido = DuckDB si está instalado, si no SQLite)')
+    parser.add_argument('--db-path', help='Archivo de la base embebida (por defecto en memoria)')
+    parser.add_argument('--tamano-pool', type=int, default=None,
+                        help=f"Conexiones reutilizables del pool (por defecto {backends.OPCIONES_POOL['pool_size']})")
+    parser.add_argument('--desborde-pool', type=int, default=None,
+                        help=f"Conexiones extra en picos (por defecto {backends.OPCIONES_POOL['max_overflow']})")
+    parser.add_argument('--cache-dir', default='.cache_etl', help='Directorio del cache columnar de libros parseados')
+    parser.add_argument('--cache-max-entradas', type=int, default=5, help='Máximo de libros guardados en el cache')
+    parser.add_argument('--sin-cache', action='store_true', help='Desactiva los caches (libro, índice de búsqueda y mapeo de columnas) y reparsea siempre el Excel')
+    parser.add_argument('--profundidad-busqueda', type=int, default=descubrimiento.PROFUNDIDAD_MAXIMA,
+                        help='Niveles de directorio en los que se busca el libro si no se indica --excel-file')
+    parser.add_argument('--modo-carga', choices=['infile', 'lotes', 'to_sql'], default='infile',
+                        help='Carga cruda: LOAD DATA LOCAL INFILE, INSERT multi-fila en lotes o pandas to_sql')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Carga solo filas insertadas, actualizadas o eliminadas: compara el hash de la clave '
+                             '(fecha+máquina+operario+turno) y del contenido de cada fila con etl_huellas_filas')
+    parser.add_argument('--motor-limpieza', choices=['sql', 'python'], default='sql',
+                        help='Limpieza con expresiones SQL (REGEXP_REPLACE) o vectorizada en pandas')
+    parser.add_argument('--verificar-paridad', action='store_true',
+                        help='Tras el ETL compara las tablas SQL con el motor vectorizado')
+    parser.add_argument('--tamano-lote', type=int, default=5000, help='Filas por lote en el modo executemany')
+    parser.add_argument('--lote', help='Directorio o patrón glob de libros a cargar juntos (p. ej. "datos/2024-*.xlsx")')
+    parser.add_argument('--workers', type=int, default=None, help='Procesos para parsear el lote (por defecto, núcleos)')
+    parser.add_argument('--todas-las-hojas', action='store_true',
+                        help='En modo lote lee todas las hojas con encabezado de datos, no solo "Base De Datos"')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Lee, limpia y carga por bloques en etapas concurrentes (memoria acotada)')
+    parser.add_argument('--tamano-bloque', type=int, default=5000, help='Filas por bloque en modo --pipeline')
+    parser.add_argument('--tamano-cola', type=int, default=4, help='Bloques en espera entre etapas en modo --pipeline')
+    parser.add_argument('--metricas', help='Archivo de métricas por etapa y por sentencia SQL')
+    parser.add_argument('--formato-metricas', choices=instrumentacion_etl.FORMATOS, default='jsonl',
+                        help='JSON lines (se agrega una línea por evento) o texto de Prometheus (textfile collector)')
+    parser.add_argument('--metricas-bd', action='store_true',
+                        help='Guarda las métricas de la ejecución en la tabla metricas_etl (para Grafana)')
+    parser.add_argument('--tiempo-servidor', action='store_true',
+                        help='Lee de performance_schema el tiempo de servidor de cada sentencia (MySQL)')
+    verbosidad = parser.add_mutually_exclusive_group()
+    verbosidad.add_argument('--silencioso', action='store_true',
+                            help='Modo batch (cron): sin salida de consola ni consultas de diagnóstico; solo advertencias y errores')
+    verbosidad.add_argument('--depuracion', action='store_true',
+                            help='Exploración completa: filas crudas, columnas, mapeo, estadísticas de paros y COUNT(*) por tabla')
+    parser.add_argument('--sin-compactar', action='store_true',
+                        help='No convierte el DataFrame crudo a categóricas / tipos numéricos reducidos')
+    parser.add_argument('--oee-config', default=str(Path(__file__).parent / 'oee_config.json'),
+                        help='JSON con tasas ideales y agrupaciones del cálculo de OEE')
+    parser.add_argument('--demonio', action='store_true',
+                        help='Queda vigilando el libro y ejecuta la carga incremental cada vez que se guarda')
+    parser.add_argument('--espera-cambios', type=float, default=demonio.ESPERA_CAMBIOS,
+                        help='En modo --demonio, segundos sin cambios en el libro antes de procesarlo')
+    parser.add_argument('--intervalo-sondeo', type=float, default=demonio.INTERVALO_SONDEO,
+                        help='En modo --demonio sin inotify (paquete watchdog), segundos entre revisiones del libro')
     
     args = parser.parse_args()
+    if args.pipeline and (args.incremental or args.lote or args.verificar_paridad):
+        parser.error('--pipeline no se combina con --incremental, --lote ni --verificar-paridad')
+    if args.demonio and (args.pipeline or args.lote):
+        parser.error('--demonio vigila un solo libro: no se combina con --pipeline ni --lote')
+    
+    if args.backend == 'embebido':
+        args.backend = backends.embebido_por_defecto()
+    if args.pipeline and backends.obtener(args.backend).en_memoria({'path': args.db_path}):
+        parser.error('--pipeline necesita --db-path: la base en memoria es una sola conexión '
+                     'y las etapas del pipeline escriben desde hilos distintos')
     
     db_config = {
         'host': args.db_host,
-        'database': args.db_name
+        'database': args.db_name,
+        'path': args.db_path
     }
     
-    if not args.db_user:
-        args.db_user = input("Usuario de MySQL: ")
-    
-    if not args.db_password:
-        args.db_password = getpass.getpass("Contraseña de MySQL: ")
+    if args.backend == 'mysql':
+        if not args.db_user:
+            args.db_user = input("Usuario de MySQL: ")
+        
+        if not args.db_password:
+            args.db_password = getpass.getpass("Contraseña de MySQL: ")
     
     db_config['user'] = args.db_user
     db_config['password'] = args.db_password
     
+    cache = None
+    if not args.sin_cache:
+        cache = cache_excel.CacheExcel(args.cache_dir, max_entradas=args.cache_max_entradas)
+    
+    instrumentacion = None
+    if args.metricas or args.metricas_bd:
+        instrumentacion = instrumentacion_etl.Instrumentacion(
+            args.metricas, args.formato_metricas, args.metricas_bd, args.tiempo_servidor)
+    
     etl = TemperasVinilosETL(
         excel_file_path=args.excel_file,
-        db_config=db_config
+        db_config=db_config,
+        cache=cache,
+        modo_carga=args.modo_carga,
+        tamano_lote=args.tamano_lote,
+        incremental=args.incremental or args.demonio,
+        motor_limpieza=args.motor_limpieza,
+        lote=args.lote,
+        workers=args.workers,
+        todas_las_hojas=args.todas_las_hojas,
+        pipeline=args.pipeline,
+        tamano_bloque=args.tamano_bloque,
+        tamano_cola=args.tamano_cola,
+        oee_config=args.oee_config,
+        backend=args.backend,
+        instrumentacion=instrumentacion,
+        verbosidad='silencioso' if args.silencioso else 'depuracion' if args.depuracion else 'normal',
+        compactar=not args.sin_compactar,
+        tamano_pool=args.tamano_pool,
+        desborde_pool=args.desborde_pool,
+        descubridor=descubrimiento.DescubrimientoLibros(None if args.sin_cache else args.cache_dir,
+                                                      args.profundidad_busqueda),
+        resolutor=resolutor_columnas.ResolutorColumnas(None if args.sin_cache else args.cache_dir)
     )
     
+    if args.demonio:
+        # Un solo proceso: motor, pool y dimensiones quedan abiertos entre guardados
+        sys.exit(0 if demonio.DemonioETL(etl, args.espera_cambios, args.intervalo_sondeo).ejecutar() else 1)
+    
     success = etl.run_etl()
     
+    if success and args.verificar_paridad:
+        with etl.consola():
+            success = etl.verificar_paridad_limpieza()
+    
+    if args.silencioso:
+        # cron: el código de salida indica el resultado
+        sys.exit(0 if success else 1)
+    
     if success:
         print("\n" + "="*70)
         print("✅ PROCESO COMPLETADO EXITOSAMENTE")
         print("="*70)
         print("🎯 SEPARACIÓN CÓDIGOS/MINUTOS IMPLEMENTADA:")
-        print("   📝 Si 'codigo_de_paro_1' tiene contenido → 'codigo_paro_1' = '1'")
+        print("   📝 Si 'codigo_de_paro_1' tiene contenido → 'codigo_paro_1' = 1")
         print("   ⏱️  Si 'Codigo_1_en_horas' tiene '20 mnts' → 'minutos_paro_1' = 20.0")
-        print("   🔄 Para todos los códigos 1-18")
+        print("   🔄 Para cada slot de código con datos en el libro")
         print("   📊 Ejemplo: Código 1: 20 minutos, Código 2: 15 minutos, etc.")
         print("="*70)
     else:
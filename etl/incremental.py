@@ -0,0 +1,166 @@
+# incremental.py
+"""Detección de cambios por fila para la carga incremental.
+
+Cada fila cruda tiene dos hashes vectorizados de 64 bits: la clave natural
+(fecha + máquina + operario + turno) y la huella del contenido completo.
+Se guardan junto a datos_crudos_temperas_vinilos en etl_huellas_filas y en
+cada carga el libro nuevo se compara con ellos: las filas con la misma
+huella no se tocan, las que conservan la clave pero cambiaron de contenido
+se actualizan (mantienen su registro_id), las nuevas se insertan y las que
+ya no están se eliminan.
+"""
+import numpy as np
+import pandas as pd
+
+TABLA_HUELLAS = 'etl_huellas_filas'
+
+DDL_HUELLAS = f"""
+CREATE TABLE IF NOT EXISTS {TABLA_HUELLAS} (
+    registro_id INT NOT NULL PRIMARY KEY,
+    clave BIGINT NOT NULL,
+    huella BIGINT NOT NULL,
+    maquina VARCHAR(100) NOT NULL,
+    fecha DATETIME NULL
+)"""
+
+# Tablas con una fila por registro crudo: se actualizan borrando por registro_id
+TABLAS_POR_REGISTRO = [
+    'datos_limpios_temperas_vinilos',
+    'datos_paros_procesados',
+    'produccion_maquina',
+    'produccion_operario',
+    'analisis_paros',
+    'fact_paros',
+    'fact_registro_produccion',
+    'fact_detalle_paros',
+]
+
+# Columnas generadas por el ETL que no forman parte del contenido del libro
+COLUMNAS_GENERADAS = ['registro_id']
+
+# Campos del mapeo que identifican un registro del libro
+CLAVE_NATURAL = ['fecha', 'maquina', 'operario', 'turno']
+
+
+def clave_maquina(serie):
+    """Normaliza la columna máquina para usarla como clave ('' si está vacía).
+
+    Quita solo espacios, igual que TRIM(maquina) en resumenes.sentencias_incrementales:
+    las tablas guardan la máquina sin recortar y el resumen se busca por TRIM.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # map sobre una categórica no visita los vacíos
+        serie = serie.astype(object)
+    return serie.map(lambda v: str(v).strip(' ') if pd.notna(v) else '')
+
+
+def normalizar(df):
+    """Columnas con el mismo hash sin importar la representación en memoria.
+
+    Los números pasan a float64: la compactación (int8, float32) y un vacío
+    que convierte una columna entera en flotante no cambian la huella.
+    Categóricas y texto ya producen el mismo hash que sus valores.
+    """
+    df = df.drop(columns=COLUMNAS_GENERADAS, errors='ignore')
+    numericas = [col for col in df.columns
+                 if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+                 and df[col].dtype != np.float64]
+    return df.astype({col: np.float64 for col in numericas}) if numericas else df
+
+
+def hash_por_fila(df):
+    """Hash de 64 bits (con signo, como BIGINT) de cada fila en su orden"""
+    if df.empty or not len(df.columns):
+        return np.zeros(len(df), dtype=np.int64)
+    return pd.util.hash_pandas_object(df, index=False).to_numpy().view(np.int64)
+
+
+def hashes_filas(df):
+    """Hashes de contenido de todas las filas, ordenados (no dependen del orden de las filas)"""
+    return np.sort(hash_por_fila(normalizar(df)))
+
+
+def huellas(df, mapeo):
+    """DataFrame registro_id, clave, huella, maquina, fecha de cada fila cruda"""
+    contenido = normalizar(df)
+    columnas_clave = [mapeo[campo] for campo in CLAVE_NATURAL if mapeo.get(campo) in contenido.columns]
+    return pd.DataFrame({
+        'registro_id': df['registro_id'].to_numpy() if 'registro_id' in df.columns else np.arange(len(df)),
+        'clave': hash_por_fila(contenido[columnas_clave]),
+        'huella': hash_por_fila(contenido),
+        'maquina': clave_maquina(df[mapeo['maquina']]).to_numpy(),
+        'fecha': pd.to_datetime(df[mapeo['fecha']], errors='coerce').to_numpy(),
+    })
+
+
+def emparejar(nuevas, viejas, columna):
+    """Pares (posicion, registro_id) con el mismo valor de columna.
+
+    Con valores repetidos se empareja la k-ésima fila nueva con la k-ésima
+    vieja (por posición en el libro y por registro_id).
+    """
+    nuevas = nuevas[['posicion', columna]].assign(ocurrencia=nuevas.groupby(columna).cumcount())
+    viejas = viejas[['registro_id', columna]].assign(ocurrencia=viejas.groupby(columna).cumcount())
+    return nuevas.merge(viejas, on=[columna, 'ocurrencia'])[['posicion', 'registro_id']]
+
+
+def fechas_afectadas(filas):
+    """{maquina: fecha mínima} de las filas cambiadas; None si alguna no tiene fecha"""
+    afectadas = {}
+    for maquina, fechas in filas.groupby('maquina')['fecha']:
+        afectadas[maquina] = None if fechas.isna().any() else fechas.min()
+    return afectadas
+
+
+def calcular_cambios(df, mapeo, guardadas, siguiente_id):
+    """Compara el libro con las huellas guardadas.
+
+    Devuelve un dict con:
+      delta: filas a insertar (nuevas y actualizadas) con su registro_id
+      borrados: registro_id a eliminar (actualizadas y eliminadas)
+      huellas: huellas de las filas del delta
+      afectadas: {maquina: fecha desde la que cambian los resúmenes (None = toda)}
+      conteos: filas insertadas, actualizadas, eliminadas y sin cambios
+    """
+    actuales = huellas(df.drop(columns=COLUMNAS_GENERADAS, errors='ignore'), mapeo)
+    actuales = actuales.rename(columns={'registro_id': 'posicion'})
+    guardadas = guardadas.sort_values('registro_id', kind='stable').assign(
+        fecha=lambda g: pd.to_datetime(g['fecha'], errors='coerce'))
+
+    iguales = emparejar(actuales, guardadas, 'huella')
+    resto_nuevas = actuales[~actuales['posicion'].isin(iguales['posicion'])]
+    resto_viejas = guardadas[~guardadas['registro_id'].isin(iguales['registro_id'])]
+
+    # Misma clave natural con otro contenido: edición de la fila (conserva su registro_id)
+    actualizadas = emparejar(resto_nuevas, resto_viejas, 'clave')
+    insertadas = resto_nuevas.loc[~resto_nuevas['posicion'].isin(actualizadas['posicion']), 'posicion']
+    eliminadas = resto_viejas[~resto_viejas['registro_id'].isin(actualizadas['registro_id'])]
+
+    ids = pd.concat([
+        pd.Series(actualizadas['registro_id'].to_numpy(), index=actualizadas['posicion'].to_numpy()),
+        pd.Series(np.arange(siguiente_id, siguiente_id + len(insertadas), dtype=np.int64),
+                  index=insertadas.to_numpy()),
+    ]).sort_index()
+    delta = df.iloc[ids.index.to_numpy()].copy()
+    if 'registro_id' in delta.columns:
+        delta['registro_id'] = ids.to_numpy()
+    else:
+        delta.insert(0, 'registro_id', ids.to_numpy())
+
+    huellas_delta = actuales.set_index('posicion').loc[ids.index].reset_index(drop=True)
+    huellas_delta.insert(0, 'registro_id', ids.to_numpy())
+
+    borrados = resto_viejas[['registro_id']]
+    cambiadas = pd.concat([resto_viejas[['maquina', 'fecha']], huellas_delta[['maquina', 'fecha']]])
+    return {
+        'delta': delta,
+        'borrados': borrados.reset_index(drop=True),
+        'huellas': huellas_delta,
+        'afectadas': fechas_afectadas(cambiadas),
+        'conteos': {
+            'insertadas': len(insertadas),
+            'actualizadas': len(actualizadas),
+            'eliminadas': len(eliminadas),
+            'sin_cambios': len(iguales),
+        },
+    }
@@ -0,0 +1,238 @@
+# instrumentacion.py
+"""Métricas de ejecución del ETL: tiempo por etapa y por sentencia SQL.
+
+Cada sentencia que pasa por el motor de SQLAlchemy se mide con los eventos
+before/after_cursor_execute (tiempo de pared, filas afectadas, bytes enviados
+y, en MySQL, tiempo de ejecución en el servidor según performance_schema) y
+se atribuye a la etapa abierta en ese momento. Las métricas se exportan como
+JSON lines, como texto de Prometheus (textfile collector) o a la tabla
+metricas_etl para graficarlas en Grafana junto al OEE.
+"""
+import json
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import event, text
+
+logger = logging.getLogger(__name__)
+
+FORMATOS = ('jsonl', 'prometheus')
+
+# Filas de muestra para estimar los bytes de un executemany grande
+MUESTRA_PARAMETROS = 100
+
+PATRONES_SQL = [
+    (re.compile(r'^\s*CREATE\s+(?:TEMPORARY\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?[`"]?(\w+)', re.I), 'create'),
+    (re.compile(r'^\s*CREATE\s+(?:UNIQUE\s+)?INDEX\s+\w+\s+ON\s+[`"]?(\w+)', re.I), 'index'),
+    (re.compile(r'^\s*INSERT\s+(?:OR\s+IGNORE\s+|IGNORE\s+)?INTO\s+[`"]?(\w+)', re.I), 'insert'),
+    (re.compile(r'^\s*DELETE\s+FROM\s+[`"]?(\w+)', re.I), 'delete'),
+    (re.compile(r'^\s*UPDATE\s+[`"]?(\w+)', re.I), 'update'),
+    (re.compile(r'^\s*DROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?[`"]?(\w+)', re.I), 'drop'),
+    (re.compile(r'^\s*(?:RENAME\s+TABLE|ALTER\s+TABLE)\s+[`"]?(\w+)', re.I), 'rename'),
+    (re.compile(r'^\s*LOAD\s+DATA\s+.*?INTO\s+TABLE\s+[`"]?(\w+)', re.I | re.S), 'load'),
+    (re.compile(r'^\s*SELECT\b.*?\bFROM\s+[`"]?(\w+)', re.I | re.S), 'select'),
+]
+
+ARCHIVO_INFILE = re.compile(r"LOAD\s+DATA\s+LOCAL\s+INFILE\s+'([^']+)'", re.I)
+
+# Sufijos de tablas sombra/staging: se agrupan con la tabla lógica
+SUFIJOS_FISICOS = re.compile(r'__(?:nueva|vieja)$')
+
+
+def clasificar_sentencia(sentencia):
+    """(operacion, tabla) de una sentencia, con etiquetas de baja cardinalidad"""
+    for patron, operacion in PATRONES_SQL:
+        coincidencia = patron.match(sentencia)
+        if coincidencia:
+            return operacion, SUFIJOS_FISICOS.sub('', coincidencia.group(1))
+    palabra = sentencia.split(None, 1)[0].lower() if sentencia.strip() else ''
+    return palabra or 'otro', ''
+
+
+def bytes_parametros(parametros, executemany):
+    """Tamaño aproximado en texto de los parámetros enviados"""
+    if not parametros:
+        return 0
+    filas = parametros if executemany else [parametros]
+    muestra = filas[:MUESTRA_PARAMETROS]
+    tamano = 0
+    for fila in muestra:
+        valores = fila.values() if isinstance(fila, dict) else fila
+        tamano += sum(len(str(v)) for v in valores if v is not None)
+    return tamano * len(filas) // max(len(muestra), 1)
+
+
+class Instrumentacion:
+    """Registro de etapas y sentencias SQL de una ejecución del ETL"""
+
+    def __init__(self, ruta=None, formato='jsonl', en_bd=False, tiempo_servidor=False):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de métricas desconocido: {formato} (opciones: {', '.join(FORMATOS)})")
+        self.ruta = ruta
+        self.formato = formato
+        self.en_bd = en_bd
+        self.tiempo_servidor = tiempo_servidor
+        self.ejecucion = f"{datetime.now():%Y%m%d%H%M%S}-{os.getpid()}"
+        self.instante = datetime.now()
+        self.etapas = []
+        self.sentencias = []
+        self.pila = []
+        self.dialecto = None
+        self.pausada = False
+
+    def reiniciar(self):
+        """Empieza una ejecución nueva (modo demonio: una por ciclo, con el mismo motor)"""
+        self.ejecucion = f"{datetime.now():%Y%m%d%H%M%S}-{os.getpid()}"
+        self.instante = datetime.now()
+        self.etapas = []
+        self.sentencias = []
+        self.pila = []
+        self.pausada = False
+
+    def conectar(self, motor, dialecto):
+        """Escucha las sentencias del motor"""
+        self.dialecto = dialecto
+        event.listen(motor, 'before_cursor_execute', self.antes_de_ejecutar)
+        event.listen(motor, 'after_cursor_execute', self.despues_de_ejecutar)
+
+    @contextmanager
+    def etapa(self, nombre, registro=None):
+        """Abre una etapa; registro['filas'] (si se llena) son las filas que procesó"""
+        inicio = time.perf_counter()
+        self.pila.append(nombre)
+        try:
+            yield
+        finally:
+            self.pila.pop()
+            self.etapas.append({
+                'tipo': 'etapa',
+                'etapa': nombre,
+                'padre': self.pila[-1] if self.pila else None,
+                'segundos': time.perf_counter() - inicio,
+                'filas': (registro or {}).get('filas'),
+                'variacion_rss_mb': (registro or {}).get('variacion_rss_mb'),
+                'pico_mb': (registro or {}).get('pico_mb'),
+            })
+
+    def antes_de_ejecutar(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('inicio_sentencia', []).append(time.perf_counter())
+
+    def despues_de_ejecutar(self, conn, cursor, statement, parameters, context, executemany):
+        segundos = time.perf_counter() - conn.info['inicio_sentencia'].pop()
+        if self.pausada:
+            return
+        operacion, tabla = clasificar_sentencia(statement)
+        enviados = len(statement.encode('utf-8')) + bytes_parametros(parameters, executemany)
+        archivo = ARCHIVO_INFILE.search(statement)
+        if archivo and os.path.exists(archivo.group(1)):
+            enviados += os.path.getsize(archivo.group(1))
+        servidor = None
+        if self.tiempo_servidor and self.dialecto is not None and cursor.description is None:
+            servidor = self.dialecto.tiempo_servidor(conn.connection.dbapi_connection, segundos)
+            if servidor is None:
+                logger.warning("⚠️  performance_schema no disponible: sin tiempo de servidor por sentencia")
+                self.tiempo_servidor = False
+        self.sentencias.append({
+            'tipo': 'sql',
+            'etapa': self.pila[-1] if self.pila else None,
+            'operacion': operacion,
+            'tabla': tabla,
+            'segundos': segundos,
+            'segundos_servidor': servidor,
+            'filas': cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None,
+            'bytes': enviados,
+            'lotes': len(parameters) if executemany else 1,
+        })
+
+    def resumen_sql(self):
+        """Sentencias agregadas por (etapa, operacion, tabla)"""
+        grupos = defaultdict(lambda: {'sentencias': 0, 'segundos': 0.0, 'segundos_servidor': None,
+                                      'filas': 0, 'bytes': 0})
+        for sentencia in self.sentencias:
+            grupo = grupos[(sentencia['etapa'], sentencia['operacion'], sentencia['tabla'])]
+            grupo['sentencias'] += 1
+            grupo['segundos'] += sentencia['segundos']
+            grupo['filas'] += sentencia['filas'] or 0
+            grupo['bytes'] += sentencia['bytes']
+            if sentencia['segundos_servidor'] is not None:
+                grupo['segundos_servidor'] = (grupo['segundos_servidor'] or 0.0) + sentencia['segundos_servidor']
+        return [{'etapa': etapa, 'operacion': operacion, 'tabla': tabla, **valores}
+                for (etapa, operacion, tabla), valores in grupos.items()]
+
+    def lineas_json(self):
+        comunes = {'ejecucion': self.ejecucion, 'instante': self.instante.isoformat(timespec='seconds')}
+        return [json.dumps({**comunes, **evento}, ensure_ascii=False, default=str)
+                for evento in self.etapas + self.sentencias]
+
+    def texto_prometheus(self):
+        """Métricas en el formato de exposición de texto de Prometheus"""
+        def etiquetas(**valores):
+            return ','.join(f'{k}="{str(v or "").replace(chr(34), chr(39))}"' for k, v in valores.items())
+
+        lineas = [
+            '# HELP etl_ultima_ejecucion_timestamp_seconds Inicio de la última ejecución del ETL',
+            '# TYPE etl_ultima_ejecucion_timestamp_seconds gauge',
+            f'etl_ultima_ejecucion_timestamp_seconds {self.instante.timestamp():.0f}',
+            '# HELP etl_etapa_segundos Duración de cada etapa del ETL',
+            '# TYPE etl_etapa_segundos gauge',
+        ]
+        lineas += [f'etl_etapa_segundos{{{etiquetas(etapa=e["etapa"], padre=e["padre"])}}} {e["segundos"]:.6f}'
+                   for e in self.etapas]
+        lineas += ['# HELP etl_etapa_filas Filas procesadas por etapa', '# TYPE etl_etapa_filas gauge']
+        lineas += [f'etl_etapa_filas{{{etiquetas(etapa=e["etapa"])}}} {e["filas"]}'
+                   for e in self.etapas if e['filas'] is not None]
+        metricas_sql = [
+            ('etl_sql_sentencias', 'sentencias', 'Sentencias SQL ejecutadas'),
+            ('etl_sql_segundos', 'segundos', 'Tiempo de pared de las sentencias SQL'),
+            ('etl_sql_servidor_segundos', 'segundos_servidor', 'Tiempo de ejecución en el servidor'),
+            ('etl_sql_filas', 'filas', 'Filas afectadas por las sentencias SQL'),
+            ('etl_sql_bytes', 'bytes', 'Bytes enviados al servidor (sentencia, parámetros y archivos)'),
+        ]
+        resumen = self.resumen_sql()
+        for metrica, campo, ayuda in metricas_sql:
+            lineas += [f'# HELP {metrica} {ayuda}', f'# TYPE {metrica} gauge']
+            for grupo in resumen:
+                if grupo[campo] is None:
+                    continue
+                valor = f'{grupo[campo]:.6f}' if isinstance(grupo[campo], float) else grupo[campo]
+                claves = etiquetas(etapa=grupo['etapa'], operacion=grupo['operacion'], tabla=grupo['tabla'])
+                lineas.append(f'{metrica}{{{claves}}} {valor}')
+        return '\n'.join(lineas) + '\n'
+
+    def filas_tabla(self):
+        """Filas de metricas_etl: una por etapa y una por grupo (etapa, operacion, tabla)"""
+        comunes = {'ejecucion': self.ejecucion, 'instante': self.instante.replace(microsecond=0)}
+        filas = [{**comunes, 'tipo': 'etapa', 'etapa': e['etapa'], 'operacion': None, 'tabla': None,
+                  'sentencias': None, 'segundos': e['segundos'], 'segundos_servidor': None,
+                  'filas': e['filas'], 'bytes': None} for e in self.etapas]
+        filas += [{**comunes, 'tipo': 'sql', **grupo} for grupo in self.resumen_sql()]
+        return filas
+
+    def exportar(self, motor=None):
+        """Escribe las métricas en el archivo configurado y, si corresponde, en metricas_etl"""
+        self.pausada = True
+        if self.ruta:
+            ruta = Path(self.ruta)
+            if self.formato == 'prometheus':
+                # Escritura atómica: el textfile collector nunca lee un archivo a medias
+                temporal = ruta.with_name(ruta.name + '.tmp')
+                temporal.write_text(self.texto_prometheus(), encoding='utf-8')
+                os.replace(temporal, ruta)
+            else:
+                with open(ruta, 'a', encoding='utf-8') as archivo:
+                    archivo.write('\n'.join(self.lineas_json()) + '\n')
+            print(f"📈 Métricas de ejecución en {ruta} ({self.formato})")
+        if self.en_bd and motor is not None:
+            filas = self.filas_tabla()
+            columnas = list(filas[0]) if filas else []
+            if filas:
+                with motor.begin() as conn:
+                    conn.execute(text(f"INSERT INTO metricas_etl ({', '.join(columnas)}) "
+                                      f"VALUES ({', '.join(':' + c for c in columnas)})"), filas)
+                print(f"📈 {len(filas)} métricas guardadas en 'metricas_etl' (ejecución {self.ejecucion})")
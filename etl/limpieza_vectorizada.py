@@ -0,0 +1,303 @@
+# limpieza_vectorizada.py
+"""Motor de limpieza vectorizado (pandas/NumPy) equivalente a las expresiones SQL del ETL.
+
+Reproduce la semántica de MySQL de:
+  CAST(REGEXP_REPLACE(col, '[^0-9.]', '') AS DECIMAL(10,2))
+  SUBSTRING_INDEX(turno, '-', 1) / SUBSTRING_INDEX(turno, '-', -1)
+  CASE WHEN col IS NOT NULL AND col != '' THEN ... END
+"""
+import numpy as np
+import pandas as pd
+
+# Máximo representable en DECIMAL(10,2); MySQL recorta los valores mayores
+MAX_DECIMAL_10_2 = 99999999.99
+
+COLUMNAS_TEXTO = ['mes', 'maquina', 'operario', 'referencia']
+COLUMNAS_NUMERICAS = ['pacas_producidas', 'horas_trabajadas', 'horas_no_trabajadas', 'tiempo_de_paro']
+COLUMNAS_ADICIONALES = [
+    'sub_codigo_de_paro_1', 'subcodigo_3', 'subcodigo_5',
+    'area_involucrada_en_subcodigo_5', 'personal_involucrado', 'observaciones'
+]
+
+
+def como_texto(serie):
+    """Representación de texto que MySQL usa al aplicar funciones de cadena"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Texto de cada categoría una sola vez (como objetos: sin reinterpretar números)
+        categorias = como_texto(pd.Series(serie.cat.categories, dtype=object)).to_numpy(dtype=object)
+        codigos = serie.cat.codes.to_numpy()
+        texto = np.where(codigos >= 0, categorias[codigos] if len(categorias) else None, None)
+        return pd.Series(texto, index=serie.index, dtype=object)
+    if pd.api.types.is_bool_dtype(serie):
+        return serie.map({True: '1', False: '0'})
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.strftime('%Y-%m-%d %H:%M:%S')
+    if pd.api.types.is_float_dtype(serie):
+        valores = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+        # NumPy da el repr más corto de cada DOUBLE, el mismo texto que repr(float)
+        texto = valores.astype(str)
+        # MySQL imprime DOUBLE sin '.0' final (8.0 -> '8')
+        texto = np.where(np.strings.endswith(texto, '.0'), np.strings.slice(texto, 0, -2), texto)
+        return pd.Series(np.where(np.isnan(valores), None, texto), index=serie.index, dtype=object)
+    if pd.api.types.is_integer_dtype(serie) and not serie.hasnans:
+        return pd.Series(serie.to_numpy().astype(str), index=serie.index, dtype=object)
+    if pd.api.types.infer_dtype(serie, skipna=True) in ('string', 'empty'):
+        # Ya es texto: solo se cambian los nulos por None
+        return serie.astype(object).where(serie.notna(), None)
+    return serie.map(lambda v: str(v) if pd.notna(v) else None)
+
+
+def numero_de_texto(texto):
+    """CAST(REGEXP_REPLACE(texto, '[^0-9.]', '') AS DECIMAL(10,2)) sobre texto ya formateado"""
+    # Las operaciones de texto corren sobre el dtype str de pandas (Arrow si está instalado)
+    texto = texto.astype('str').str.replace(r'[^0-9.]', '', regex=True)
+
+    # CAST toma el prefijo numérico válido: dígitos, un punto y decimales
+    partes = texto.str.extract(r'^(\d*)(?:\.(\d*))?')
+    entero = pd.to_numeric(partes[0].replace('', '0'), errors='coerce').fillna(0)
+    decimales = partes[1].fillna('').str.pad(3, side='right', fillchar='0')
+    centesimos = pd.to_numeric(decimales.str[:2], errors='coerce').fillna(0)
+    redondeo = (pd.to_numeric(decimales.str[2], errors='coerce').fillna(0) >= 5).astype(int)
+
+    # Redondeo decimal exacto (mitad hacia arriba) en centésimos enteros
+    centavos = entero * 100 + centesimos + redondeo
+    valor = np.minimum(centavos / 100, MAX_DECIMAL_10_2).round(2)
+    return valor.where(texto.notna())
+
+
+def extraer_numero(serie):
+    """CAST(REGEXP_REPLACE(col, '[^0-9.]', '') AS DECIMAL(10,2)) vectorizado"""
+    if pd.api.types.is_integer_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        # Sin decimales: el texto sin signo es el valor absoluto
+        return np.minimum(serie.abs().astype(np.float64), MAX_DECIMAL_10_2)
+    if not pd.api.types.is_float_dtype(serie):
+        return numero_de_texto(como_texto(serie))
+
+    # El signo no sobrevive a REGEXP_REPLACE: se trabaja con el valor absoluto
+    valores = np.abs(serie.to_numpy(dtype=np.float64, na_value=np.nan))
+    nulos = np.isnan(valores)
+    with np.errstate(invalid='ignore'):
+        milesimas = np.rint(valores * 1000)
+        # Con a lo sumo 3 decimales (y lejos de la notación exponencial) el texto de
+        # MySQL es milesimas/1000: el redondeo se calcula sin formatear
+        exactos = (valores < 1e12) & (milesimas / 1000 == valores)
+        centavos = milesimas // 10 + (milesimas % 10 >= 5)
+    valor = pd.Series(np.minimum(centavos / 100, MAX_DECIMAL_10_2).round(2), index=serie.index)
+    resto = ~exactos & ~nulos
+    if resto.any():
+        valor[resto] = numero_de_texto(como_texto(serie[resto]))
+    return valor.where(~nulos)
+
+
+def tiene_contenido(serie):
+    """col IS NOT NULL AND col != '' con la comparación de tipos de MySQL"""
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        # En columnas numéricas '' se convierte a 0
+        return serie.notna() & (serie != 0)
+    if pd.api.types.is_bool_dtype(serie):
+        return serie.notna() & serie.astype(bool)
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.notna()
+    texto = como_texto(serie)
+    return texto.notna() & (texto != '')
+
+
+def por_valor(texto, funcion):
+    """Aplica funcion una sola vez por valor distinto del texto (los nulos quedan en None)"""
+    codigos, unicos = pd.factorize(texto)
+    resultados = np.array([funcion(v) for v in unicos] + [None], dtype=object)
+    # El código -1 (nulo) toma el último elemento: None
+    return pd.Series(resultados[codigos], index=texto.index, dtype=object)
+
+
+def separar_turno(serie):
+    """SUBSTRING_INDEX(turno, '-', 1) y SUBSTRING_INDEX(turno, '-', -1)"""
+    texto = como_texto(serie)
+    inicio = por_valor(texto, lambda v: v.split('-', 1)[0])
+    final = por_valor(texto, lambda v: v.rsplit('-', 1)[-1])
+    return inicio, final
+
+
+def columna(df, mapeo, nombre):
+    col_real = mapeo.get(nombre)
+    return df[col_real] if col_real else None
+
+
+def como_fecha(serie):
+    """DATE(col): fecha sin hora"""
+    return pd.to_datetime(serie, errors='coerce').dt.date
+
+
+def clave_lookup(valor):
+    """Clave de comparación de las tablas de lookup: sin espacios finales y en minúsculas.
+
+    Es la misma regla que backends.DialectoMySQL.clave_texto usa en los JOIN de SQL.
+    """
+    return str(valor).rstrip(' ').lower()
+
+
+def asignar_ids(serie, ids):
+    """Resuelve los ids de una tabla de lookup {nombre: id} para una columna"""
+    normalizados = {clave_lookup(nombre): id_ for nombre, id_ in (ids or {}).items()}
+    # Ids enteros (float64 si hay valores sin id), como el map por elemento
+    return por_valor(como_texto(serie), lambda v: normalizados.get(clave_lookup(v))).infer_objects()
+
+
+def codigo_paro(serie):
+    """NULLIF(col, 0) en columnas numéricas: el 0 equivale a celda vacía"""
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return serie.where(serie != 0)
+    return serie
+
+
+def slots_con_datos(df, slots):
+    """Slots con algún código o tiempo de paro con contenido (misma semántica que la limpieza SQL).
+
+    slots es {slot: {'codigo': col, 'horas': col, ...}}; cada columna se
+    evalúa una sola vez con operaciones vectorizadas (en las categóricas,
+    sobre sus categorías).
+    """
+    con_datos = []
+    for n, columnas in slots.items():
+        for col in (columnas['codigo'], columnas['horas']):
+            if col is not None and col in df.columns and tiene_contenido(df[col]).any():
+                con_datos.append(n)
+                break
+    return con_datos
+
+
+def limpiar(df, mapeo, slots=range(1, 19), claves=None):
+    """Construye la tabla datos_limpios_temperas_vinilos a partir del DataFrame crudo.
+
+    claves contiene los ids de las tablas de lookup: {'maquina': {...}, 'operario': {...}}.
+    """
+    vacio = pd.Series([None] * len(df), index=df.index, dtype=object)
+    claves = claves or {}
+    limpio = {}
+    if 'registro_id' in df.columns:
+        limpio['registro_id'] = df['registro_id']
+
+    fecha = columna(df, mapeo, 'fecha')
+    limpio['fecha'] = como_fecha(fecha) if fecha is not None else vacio
+    anio = columna(df, mapeo, 'año')
+    limpio['año'] = extraer_numero(anio) if anio is not None else vacio
+
+    for nombre in COLUMNAS_TEXTO:
+        serie = columna(df, mapeo, nombre)
+        limpio[nombre] = serie if serie is not None else vacio
+        if nombre in ('maquina', 'operario'):
+            limpio[f'{nombre}_id'] = asignar_ids(serie, claves.get(nombre)) if serie is not None else vacio
+
+    for nombre in COLUMNAS_NUMERICAS:
+        serie = columna(df, mapeo, nombre)
+        limpio[nombre] = extraer_numero(serie) if serie is not None else pd.Series(0.0, index=df.index)
+
+    turno = columna(df, mapeo, 'turno')
+    if turno is not None:
+        limpio['turno_inicio'], limpio['turno_final'] = separar_turno(turno)
+    else:
+        limpio['turno_inicio'] = limpio['turno_final'] = vacio
+
+    for i in slots:
+        for esperada, salida in ((f'codigo_{i}_en_horas', f'Codigo_{i}_en_horas'),
+                                 (f'codigo_de_paro_{i}', f'Codigo_de_paro_{i}')):
+            serie = columna(df, mapeo, esperada)
+            if serie is not None and salida.startswith('Codigo_de_paro'):
+                serie = codigo_paro(serie)
+            limpio[salida] = serie if serie is not None else vacio
+
+    for nombre in COLUMNAS_ADICIONALES:
+        serie = columna(df, mapeo, nombre)
+        limpio[nombre] = serie if serie is not None else vacio
+
+    return pd.DataFrame(limpio, index=df.index).reset_index(drop=True)
+
+
+def procesar_paros(df_limpio, slots=range(1, 19)):
+    """Construye datos_paros_procesados: separa código (número de slot) y minutos"""
+    base = [
+        'registro_id', 'fecha', 'mes', 'año', 'maquina', 'maquina_id', 'operario', 'operario_id', 'referencia',
+        'pacas_producidas', 'horas_trabajadas', 'horas_no_trabajadas', 'tiempo_de_paro',
+        'turno_inicio', 'turno_final'
+    ]
+    paros = {col: df_limpio[col] for col in base if col in df_limpio.columns}
+
+    for i in slots:
+        horas = df_limpio[f'Codigo_{i}_en_horas']
+        codigo = df_limpio[f'Codigo_de_paro_{i}']
+        paros[f'codigo_paro_{i}'] = pd.Series(i, index=df_limpio.index).where(tiene_contenido(codigo))
+        paros[f'minutos_paro_{i}'] = extraer_numero(horas).where(tiene_contenido(horas), 0.0).fillna(0.0)
+
+    for col in COLUMNAS_ADICIONALES:
+        paros[col] = df_limpio[col]
+
+    return pd.DataFrame(paros, index=df_limpio.index)
+
+
+def fact_paros(df, mapeo, slots, claves=None):
+    """Construye fact_paros en formato largo: una fila por (registro, slot) con paro"""
+    vacio = pd.Series([None] * len(df), index=df.index, dtype=object)
+    claves = claves or {}
+    base = {
+        'registro_id': df['registro_id'] if 'registro_id' in df.columns else pd.Series(np.arange(1, len(df) + 1), index=df.index),
+        'fecha': como_fecha(columna(df, mapeo, 'fecha')) if mapeo.get('fecha') else vacio,
+    }
+    for nombre in ('maquina', 'operario'):
+        serie = columna(df, mapeo, nombre)
+        base[nombre] = serie if serie is not None else vacio
+        base[f'{nombre}_id'] = asignar_ids(serie, claves.get(nombre)) if serie is not None else vacio
+
+    partes = []
+    for n, columnas in slots.items():
+        # Como Codigo_de_paro_N en la tabla limpia: el 0 numérico equivale a celda vacía
+        codigo = codigo_paro(df[columnas['codigo']]) if columnas['codigo'] else vacio
+        subcodigo = df[columnas['subcodigo']] if columnas['subcodigo'] else vacio
+        if columnas['horas']:
+            horas = df[columnas['horas']]
+            minutos = extraer_numero(horas).where(tiene_contenido(horas), 0.0).fillna(0.0)
+        else:
+            minutos = pd.Series(0.0, index=df.index)
+
+        con_paro = tiene_contenido(codigo) | (minutos > 0)
+        if not con_paro.any():
+            continue
+        parte = pd.DataFrame(base).loc[con_paro]
+        parte['slot'] = n
+        parte['codigo'] = como_texto(codigo)[con_paro]
+        parte['subcodigo'] = como_texto(subcodigo)[con_paro]
+        parte['minutos'] = minutos[con_paro]
+        partes.append(parte)
+
+    if not partes:
+        return pd.DataFrame(columns=list(base) + ['slot', 'codigo', 'subcodigo', 'minutos'])
+    return pd.concat(partes, ignore_index=True)
+
+
+def comparar_motores(df_sql, df_python, tolerancia=0.005):
+    """Compara las tablas producidas por el motor SQL y el vectorizado.
+
+    Devuelve una lista de (columna, filas_distintas); vacía si son idénticas.
+    """
+    diferencias = []
+    if len(df_sql) != len(df_python):
+        return [('__filas__', abs(len(df_sql) - len(df_python)))]
+
+    for col in df_python.columns:
+        if col not in df_sql.columns:
+            diferencias.append((col, len(df_python)))
+            continue
+        a = df_sql[col].reset_index(drop=True)
+        b = df_python[col].reset_index(drop=True)
+        if isinstance(b.dtype, pd.CategoricalDtype):
+            b = b.astype(object)
+        numero_a = pd.to_numeric(a, errors='coerce')
+        numero_b = pd.to_numeric(b, errors='coerce')
+        if numero_a.notna().equals(a.notna()) and numero_b.notna().equals(b.notna()):
+            distintas = ~(((numero_a - numero_b).abs() <= tolerancia) | (numero_a.isna() & numero_b.isna()))
+        else:
+            texto_a = a.map(lambda v: str(v) if pd.notna(v) else None)
+            texto_b = b.map(lambda v: str(v) if pd.notna(v) else None)
+            distintas = ~((texto_a == texto_b) | (texto_a.isna() & texto_b.isna()))
+        if distintas.any():
+            diferencias.append((col, int(distintas.sum())))
+    return diferencias
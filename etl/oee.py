@@ -0,0 +1,264 @@
+# oee.py
+"""Cálculo vectorizado de OEE (disponibilidad × rendimiento × calidad) con NumPy.
+
+Equivale a calcular_oee de analysis/oee_analisys.R, pero agregando con
+np.bincount sobre claves de grupo factorizadas en lugar de fila por fila:
+cada métrica de un grupo es el cociente de las sumas del grupo.
+"""
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONES = ('maquina', 'operario', 'referencia', 'turno')
+GRANOS = ('dia', 'semana', 'mes')
+
+CONFIG_POR_DEFECTO = {
+    # Pacas/hora ideales: número fijo, "p95" (tasa demostrada por máquina) o null
+    'tasa_ideal_por_defecto': 'p95',
+    'tasas_ideales': {
+        'maquina': {},
+        'referencia': {},
+        # "maquina|referencia": tasa
+        'maquina_referencia': {},
+    },
+    # El libro no registra defectos: calidad fija salvo que se configure otra
+    'calidad_por_defecto': 1.0,
+    # Agrupaciones que el ETL guarda en resultados_oee
+    'agrupaciones': [
+        ['maquina', 'dia'], ['maquina', 'semana'], ['maquina', 'mes'],
+        ['operario', 'mes'], ['maquina', 'turno', 'mes'], ['referencia', 'mes'],
+    ],
+}
+
+COLUMNAS_RESULTADO = [
+    'agrupacion', 'grano', 'periodo', 'maquina', 'operario', 'referencia', 'turno',
+    'registros', 'horas_planificadas', 'horas_paro', 'paros', 'horas_operativas',
+    'pacas', 'pacas_ideales', 'disponibilidad', 'rendimiento', 'calidad', 'oee',
+]
+
+
+def cargar_config(ruta=None):
+    """Lee la configuración JSON y la combina con los valores por defecto"""
+    config = json.loads(json.dumps(CONFIG_POR_DEFECTO))
+    if ruta and Path(ruta).exists():
+        with open(ruta, encoding='utf-8') as archivo:
+            propia = json.load(archivo)
+        tasas = propia.pop('tasas_ideales', {})
+        config.update(propia)
+        for nivel, valores in tasas.items():
+            config['tasas_ideales'].setdefault(nivel, {}).update(valores)
+    return config
+
+
+def unir_registros(df_maquina, df_paros=None, df_operario=None):
+    """Une produccion_maquina con analisis_paros y produccion_operario por registro_id"""
+    base = df_maquina.copy()
+    if df_paros is not None and len(df_paros):
+        codigos = [c for c in df_paros.columns if c.startswith('codigo_paro_')]
+        paros = pd.DataFrame({
+            'registro_id': df_paros['registro_id'],
+            'total_minutos_paro': df_paros['total_minutos_paro'],
+            # Número de paros del registro: slots con código
+            'paros': df_paros[codigos].notna().to_numpy().sum(axis=1),
+        })
+        base = base.merge(paros, on='registro_id', how='left')
+    if df_operario is not None and len(df_operario):
+        base = base.merge(df_operario[['registro_id', 'operario', 'referencia']],
+                          on='registro_id', how='left')
+    for columna in ('total_minutos_paro', 'paros'):
+        if columna not in base:
+            base[columna] = 0.0
+    for columna in ('operario', 'referencia'):
+        if columna not in base:
+            base[columna] = None
+    return base
+
+
+def inicio_periodo(dias, grano):
+    """Inicio del periodo (días desde 1970-01-01) de cada día; la semana empieza el lunes"""
+    if grano == 'mes' and len(dias):
+        # Tabla del rango de días (unos miles) e indexación, sin convertir cada fila
+        minimo = dias.min()
+        rango = np.arange(minimo, dias.max() + 1).astype('datetime64[D]')
+        return rango.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)[dias - minimo]
+    if grano == 'semana':
+        # 1970-01-01 fue jueves: (días + 3) % 7 da 0 para los lunes
+        return dias - (dias + 3) % 7
+    return dias
+
+
+def categoria(serie):
+    """Dimensión como categórica: los vacíos forman su propio grupo"""
+    return pd.Categorical(serie)
+
+
+def codigos(datos, dimension):
+    """Códigos enteros (0 = vacío) y niveles de una dimensión categórica"""
+    columna = datos[dimension].array
+    return columna.codes.astype(np.int64) + 1, np.array([None, *columna.categories], dtype=object)
+
+
+def por_nivel(niveles, tabla):
+    """Valor de la tabla {nombre: tasa} para cada nivel (NaN si no está)"""
+    tabla = {str(k): float(v) for k, v in tabla.items()}
+    return np.array([tabla.get(str(n), np.nan) if n is not None else np.nan for n in niveles])
+
+
+def tasas_ideales(datos, config):
+    """Pacas/hora ideales por registro: máquina+referencia > referencia > máquina > defecto"""
+    tasas = config['tasas_ideales']
+    cod_maquina, maquinas = codigos(datos, 'maquina')
+    cod_referencia, referencias = codigos(datos, 'referencia')
+    resultado = np.full(len(datos), np.nan)
+
+    combinadas = tasas.get('maquina_referencia', {})
+    if combinadas:
+        # Tabla densa máquina × referencia; los niveles son pocos
+        matriz = np.array([[m, r] for m in maquinas for r in referencias], dtype=object)
+        claves = [f"{m}|{r}" for m, r in matriz]
+        valores = por_nivel(claves, combinadas)
+        resultado = valores[cod_maquina * len(referencias) + cod_referencia]
+    for cod, niveles, tabla in ((cod_referencia, referencias, tasas.get('referencia', {})),
+                                (cod_maquina, maquinas, tasas.get('maquina', {}))):
+        if tabla:
+            resultado = np.where(np.isnan(resultado), por_nivel(niveles, tabla)[cod], resultado)
+
+    defecto = config.get('tasa_ideal_por_defecto')
+    faltantes = np.isnan(resultado)
+    if faltantes.any() and defecto == 'p95':
+        # Tasa demostrada: percentil 95 de pacas/hora operativa de cada máquina
+        operativas = datos['horas_operativas'].to_numpy()
+        pacas = datos['pacas'].to_numpy()
+        tasa_real = np.divide(pacas, operativas, out=np.full(len(datos), np.nan),
+                              where=(operativas > 0) & (pacas > 0))
+        demostrada = pd.Series(tasa_real).groupby(cod_maquina).quantile(0.95)
+        por_maquina = np.full(len(maquinas), np.nan)
+        por_maquina[demostrada.index.to_numpy()] = demostrada.to_numpy()
+        resultado = np.where(faltantes, por_maquina[cod_maquina], resultado)
+    elif faltantes.any() and defecto is not None:
+        resultado = np.where(faltantes, float(defecto), resultado)
+    return resultado
+
+
+def preparar(registros, config):
+    """Columnas por registro necesarias para agregar (dimensiones categóricas y días enteros)"""
+    fecha = pd.to_datetime(registros['fecha'], errors='coerce').to_numpy().astype('datetime64[D]')
+    datos = pd.DataFrame({
+        'tiene_fecha': ~np.isnat(fecha),
+        'dia': np.where(np.isnat(fecha), 0, fecha.astype(np.int64)),
+        'maquina': categoria(registros['maquina']),
+        'operario': categoria(registros['operario']),
+        'referencia': categoria(registros['referencia']),
+        'turno': categoria(registros['turno_inicio'] if 'turno_inicio' in registros
+                           else pd.Series(None, index=registros.index, dtype=object)),
+    })
+
+    def numero(columna):
+        return pd.to_numeric(registros[columna], errors='coerce').fillna(0).to_numpy(float)
+
+    planificadas = numero('horas_trabajadas')
+    paro = numero('tiempo_de_paro')
+    # Sin tiempo de paro total se usa el detalle por código (minutos)
+    detalle = numero('total_minutos_paro') / 60
+    paro = np.minimum(np.where(paro > 0, paro, detalle), planificadas)
+
+    datos['horas_planificadas'] = planificadas
+    datos['horas_paro'] = paro
+    datos['horas_operativas'] = planificadas - paro
+    datos['paros'] = numero('paros')
+    datos['pacas'] = numero('pacas_producidas')
+    tasa = tasas_ideales(datos, config)
+    datos['con_tasa'] = ~np.isnan(tasa)
+    datos['pacas_ideales'] = np.where(datos['con_tasa'], datos['horas_operativas'].to_numpy() * tasa, 0)
+    datos['pacas_con_tasa'] = np.where(datos['con_tasa'], datos['pacas'].to_numpy(), 0)
+    return datos
+
+
+def agrupar(datos, por, config):
+    """Agrega las métricas OEE por cualquier combinación de dimensiones y un grano opcional"""
+    dimensiones = [d for d in por if d in DIMENSIONES]
+    granos = [g for g in por if g in GRANOS]
+    if len(dimensiones) + len(granos) != len(por) or len(granos) > 1:
+        raise ValueError(f"Agrupación no válida: {por}")
+    if granos:
+        datos = datos[datos['tiene_fecha'].to_numpy()]
+
+    claves = {}
+    indices = []
+    for dimension in dimensiones:
+        codigo, niveles = codigos(datos, dimension)
+        indices.append(codigo)
+        claves[dimension] = niveles
+    if granos and len(datos):
+        periodo = inicio_periodo(datos['dia'].to_numpy(), granos[0])
+        minimo = periodo.min()
+        indices.append(periodo - minimo)
+        claves['periodo'] = (np.arange(periodo.max() - minimo + 1) + minimo).astype('datetime64[D]')
+
+    tamanos = [len(niveles) for niveles in claves.values()]
+    if not indices:
+        grupos, inverso = np.zeros(1, dtype=np.int64), np.zeros(len(datos), dtype=np.int64)
+    elif 0 in tamanos:
+        grupos, inverso = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    else:
+        combinado = np.ravel_multi_index(indices, tamanos)
+        total = int(np.prod(tamanos, dtype=np.int64))
+        if total <= max(4 * len(datos), 1 << 20):
+            # Espacio de claves pequeño: conteo directo, sin ordenar
+            grupos = np.flatnonzero(np.bincount(combinado, minlength=total))
+            posicion = np.zeros(total, dtype=np.int64)
+            posicion[grupos] = np.arange(len(grupos))
+            inverso = posicion[combinado]
+        else:
+            grupos, inverso = np.unique(combinado, return_inverse=True)
+
+    def suma(columna):
+        return np.bincount(inverso, weights=datos[columna].to_numpy(float), minlength=len(grupos))
+
+    planificadas = suma('horas_planificadas')
+    operativas = suma('horas_operativas')
+    ideales = suma('pacas_ideales')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        disponibilidad = np.where(planificadas > 0, operativas / planificadas, np.nan)
+        rendimiento = np.where(ideales > 0, np.minimum(suma('pacas_con_tasa') / ideales, 1.0), np.nan)
+    calidad = np.full(len(grupos), float(config.get('calidad_por_defecto', 1.0)))
+
+    componentes = np.unravel_index(grupos, tamanos) if indices else ()
+    resultado = pd.DataFrame({
+        nombre: niveles[componente] for (nombre, niveles), componente in zip(claves.items(), componentes)
+    })
+    resultado['registros'] = np.bincount(inverso, minlength=len(grupos))
+    resultado['horas_planificadas'] = planificadas
+    resultado['horas_paro'] = suma('horas_paro')
+    resultado['paros'] = suma('paros').astype(np.int64)
+    resultado['horas_operativas'] = operativas
+    resultado['pacas'] = suma('pacas')
+    resultado['pacas_ideales'] = ideales
+    resultado['disponibilidad'] = disponibilidad
+    resultado['rendimiento'] = rendimiento
+    resultado['calidad'] = calidad
+    resultado['oee'] = disponibilidad * rendimiento * calidad
+    return resultado
+
+
+def resultados_tabla(datos, config):
+    """Une todas las agrupaciones configuradas en el formato de la tabla resultados_oee"""
+    partes = []
+    for por in config['agrupaciones']:
+        parte = agrupar(datos, por, config)
+        grano = next((g for g in por if g in GRANOS), None)
+        parte.insert(0, 'grano', grano)
+        parte.insert(0, 'agrupacion', '+'.join(d for d in por if d in DIMENSIONES))
+        partes.append(parte)
+    tabla = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+    for columna in COLUMNAS_RESULTADO:
+        if columna not in tabla:
+            tabla[columna] = None
+    if 'periodo' in tabla and tabla['periodo'].notna().any():
+        tabla['periodo'] = pd.to_datetime(tabla['periodo']).dt.date
+    return tabla[COLUMNAS_RESULTADO]
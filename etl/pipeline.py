@@ -0,0 +1,117 @@
+# pipeline.py
+"""Ejecución por etapas concurrentes (lector -> limpiador -> cargador) con colas acotadas.
+
+Cada cola admite como máximo tamano_cola bloques, así que la memoria pico
+depende del tamaño de bloque y de la cola, no del tamaño del libro.
+"""
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Marca de fin de flujo entre etapas
+FIN = object()
+
+# Espera máxima de cada intento de put/get antes de revisar si otra etapa falló
+INTERVALO_ESPERA = 0.5
+
+
+class EtapaCancelada(Exception):
+    """Otra etapa falló y el pipeline se está deteniendo"""
+
+
+def poner(cola, elemento, detener):
+    """put bloqueante que se interrumpe si otra etapa falló"""
+    while True:
+        if detener.is_set() and elemento is not FIN:
+            raise EtapaCancelada()
+        try:
+            cola.put(elemento, timeout=INTERVALO_ESPERA)
+            return
+        except queue.Full:
+            if detener.is_set():
+                return
+
+
+def tomar(cola, detener):
+    """get bloqueante que se interrumpe si otra etapa falló"""
+    while True:
+        try:
+            return cola.get(timeout=INTERVALO_ESPERA)
+        except queue.Empty:
+            if detener.is_set():
+                raise EtapaCancelada()
+
+
+def ejecutar_etapas(fuente, transformar, consumir, tamano_cola=4):
+    """Ejecuta fuente -> transformar -> consumir en paralelo.
+
+    fuente es un iterable de bloques (se recorre en un hilo lector),
+    transformar(bloque) corre en un hilo limpiador y consumir(resultado)
+    en el hilo que llama. Devuelve {'bloques', 'espera_lector', 'espera_cargador'}
+    y relanza la primera excepción de cualquier etapa.
+    """
+    cola_crudos = queue.Queue(maxsize=tamano_cola)
+    cola_limpios = queue.Queue(maxsize=tamano_cola)
+    detener = threading.Event()
+    errores = []
+    esperas = {'espera_lector': 0.0, 'espera_cargador': 0.0}
+
+    def lector():
+        try:
+            for bloque in fuente:
+                inicio = time.perf_counter()
+                poner(cola_crudos, bloque, detener)
+                esperas['espera_lector'] += time.perf_counter() - inicio
+        except EtapaCancelada:
+            pass
+        except Exception as e:
+            errores.append(e)
+            detener.set()
+        finally:
+            poner(cola_crudos, FIN, detener)
+
+    def limpiador():
+        try:
+            while True:
+                bloque = tomar(cola_crudos, detener)
+                if bloque is FIN:
+                    break
+                poner(cola_limpios, transformar(bloque), detener)
+        except EtapaCancelada:
+            pass
+        except Exception as e:
+            errores.append(e)
+            detener.set()
+        finally:
+            poner(cola_limpios, FIN, detener)
+
+    hilos = [threading.Thread(target=lector, name='etl-lector', daemon=True),
+             threading.Thread(target=limpiador, name='etl-limpiador', daemon=True)]
+    for hilo in hilos:
+        hilo.start()
+
+    bloques = 0
+    try:
+        while True:
+            inicio = time.perf_counter()
+            resultado = tomar(cola_limpios, detener)
+            esperas['espera_cargador'] += time.perf_counter() - inicio
+            if resultado is FIN:
+                break
+            consumir(resultado)
+            bloques += 1
+    except EtapaCancelada:
+        pass
+    except Exception as e:
+        errores.append(e)
+        detener.set()
+    finally:
+        for hilo in hilos:
+            hilo.join()
+
+    if errores:
+        raise errores[0]
+    return {'bloques': bloques, **esperas}
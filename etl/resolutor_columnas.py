@@ -0,0 +1,188 @@
+# resolutor_columnas.py
+"""Resolución de las columnas esperadas contra los encabezados del libro.
+
+Los encabezados se normalizan una sola vez (minúsculas, sin tildes, un
+guion bajo entre palabras) y se indexan por nombre completo y por token.
+Cada columna esperada se resuelve primero por nombre exacto y después por
+tokens: todos sus tokens deben estar en el encabezado como palabras
+completas, así 'codigo_1_en_horas' nunca cae en 'codigo_10_en_horas'. Un
+encabezado cuyas palabras de más cambian el significado ('sub', 'area',
+'horas', 'no') no es candidato: 'codigo_de_paro_1' no cae en
+'sub_codigo_de_paro_1' ni 'horas_trabajadas' en 'horas_no_trabajadas'. Entre
+varios candidatos gana el que tiene menos palabras de más y luego el
+primero del libro; cada encabezado se asigna a una sola columna esperada.
+El mapeo se guarda por firma de encabezados: otra hoja, otro ciclo o la
+siguiente ejecución con los mismos encabezados no vuelven a resolverlo.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import unicodedata
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Columnas que consumen la limpieza SQL y la vectorizada, en orden de resolución
+COLUMNAS_BASE = [
+    'fecha', 'mes', 'año', 'maquina', 'operario', 'referencia',
+    'pacas_producidas', 'horas_trabajadas', 'horas_no_trabajadas', 'tiempo_de_paro',
+    'turno',
+]
+
+COLUMNAS_ADICIONALES = [
+    'sub_codigo_de_paro_1', 'subcodigo_3', 'subcodigo_5',
+    'area_involucrada_en_subcodigo_5', 'personal_involucrado', 'observaciones',
+]
+
+
+def columnas_esperadas(slots=range(1, 19)):
+    """Columnas esperadas con las de cada slot de código de paro"""
+    return (COLUMNAS_BASE
+            + [col for i in slots for col in (f'codigo_{i}_en_horas', f'codigo_de_paro_{i}')]
+            + COLUMNAS_ADICIONALES)
+
+
+COLUMNAS_ESPERADAS = columnas_esperadas()
+
+# Palabras que, de más en un encabezado, lo convierten en otra columna del libro
+DISCRIMINANTES = frozenset({'sub', 'subcodigo', 'area', 'horas', 'no'})
+
+# Firmas de encabezados que se conservan en el índice persistente
+MAX_FIRMAS = 64
+
+
+def normalizar_nombre(nombre):
+    """'Área involucrada en Subcodigo 5' -> 'area_involucrada_en_subcodigo_5'"""
+    sin_tildes = unicodedata.normalize('NFKD', str(nombre)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '_', sin_tildes.lower()).strip('_')
+
+
+def compacto(nombre):
+    """Nombre normalizado sin separadores: 'sub_codigo_3' y 'subcodigo_3' coinciden"""
+    return nombre.replace('_', '')
+
+
+class IndiceEncabezados:
+    """Encabezados normalizados de una hoja, indexados por nombre y por token"""
+
+    def __init__(self, columnas):
+        self.columnas = list(columnas)
+        self.normalizados = [normalizar_nombre(col) for col in self.columnas]
+        self.tokens = [frozenset(n.split('_')) for n in self.normalizados]
+        self.exactos = {}
+        self.por_token = {}
+        for posicion, nombre in enumerate(self.normalizados):
+            self.exactos.setdefault(nombre, posicion)
+            self.exactos.setdefault(compacto(nombre), posicion)
+            for token in self.tokens[posicion]:
+                self.por_token.setdefault(token, []).append(posicion)
+
+    def exacto(self, esperada):
+        nombre = normalizar_nombre(esperada)
+        posicion = self.exactos.get(nombre)
+        return posicion if posicion is not None else self.exactos.get(compacto(nombre))
+
+    def candidatos(self, esperada):
+        """[(palabras de más, posición)] de los encabezados que contienen todos los tokens.
+
+        Se descartan los que tienen de más alguna palabra de DISCRIMINANTES.
+        """
+        tokens = set(normalizar_nombre(esperada).split('_'))
+        listas = [self.por_token.get(token, []) for token in tokens]
+        if not listas or not all(listas):
+            return []
+        comunes = set(min(listas, key=len)).intersection(*listas)
+        return sorted((len(self.tokens[p]) - len(tokens), p) for p in comunes
+                      if not (self.tokens[p] - tokens) & DISCRIMINANTES)
+
+
+def resolver(columnas, esperadas=COLUMNAS_ESPERADAS):
+    """{esperada: encabezado real o None} en una pasada exacta y otra por tokens"""
+    indice = IndiceEncabezados(columnas)
+    posiciones = {}
+    usadas = set()
+    for esperada in esperadas:
+        posicion = indice.exacto(esperada)
+        if posicion is not None and posicion not in usadas:
+            posiciones[esperada] = posicion
+            usadas.add(posicion)
+    for esperada in esperadas:
+        if esperada in posiciones:
+            continue
+        for _extra, posicion in indice.candidatos(esperada):
+            if posicion not in usadas:
+                posiciones[esperada] = posicion
+                usadas.add(posicion)
+                break
+    return {esperada: indice.columnas[posiciones[esperada]] if esperada in posiciones else None
+            for esperada in esperadas}
+
+
+class ResolutorColumnas:
+    """Resuelve el mapeo de columnas con caché por firma de encabezados (memoria y disco)"""
+
+    ARCHIVO_INDICE = "columnas.json"
+
+    def __init__(self, directorio_indice=None, esperadas=COLUMNAS_ESPERADAS):
+        self.directorio_indice = Path(directorio_indice) if directorio_indice else None
+        self.esperadas = list(esperadas)
+        self.mapeos = {}
+        self.indice = None
+
+    def firma(self, columnas, esperadas):
+        """Hash de los encabezados (en orden) y de las columnas esperadas"""
+        base = '\x1f'.join(list(columnas) + ['\x1e'] + list(esperadas))
+        return hashlib.sha256(base.encode('utf-8')).hexdigest()[:32]
+
+    def leer_indice(self):
+        if self.indice is not None:
+            return self.indice
+        self.indice = {}
+        if self.directorio_indice is None:
+            return self.indice
+        archivo = self.directorio_indice / self.ARCHIVO_INDICE
+        if archivo.exists():
+            try:
+                with open(archivo, encoding='utf-8') as f:
+                    self.indice = json.load(f)
+            except (OSError, ValueError):
+                logger.warning("⚠️  Índice de columnas ilegible, se reconstruye")
+        return self.indice
+
+    def guardar_indice(self):
+        if self.directorio_indice is None:
+            return
+        # Conserva las firmas más recientes (los dict mantienen el orden de inserción)
+        while len(self.indice) > MAX_FIRMAS:
+            del self.indice[next(iter(self.indice))]
+        try:
+            self.directorio_indice.mkdir(parents=True, exist_ok=True)
+            archivo = self.directorio_indice / self.ARCHIVO_INDICE
+            temporal = archivo.with_suffix('.tmp')
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(self.indice, f, indent=2, ensure_ascii=False)
+            os.replace(temporal, archivo)
+        except OSError as e:
+            logger.warning(f"⚠️  No se pudo guardar el índice de columnas: {e}")
+
+    def mapear(self, columnas, esperadas=None):
+        """(mapeo, desde_cache) para los encabezados dados (esperadas: las del constructor)"""
+        columnas = [str(col) for col in columnas]
+        esperadas = list(esperadas) if esperadas is not None else self.esperadas
+        clave = self.firma(columnas, esperadas)
+        if clave in self.mapeos:
+            return dict(self.mapeos[clave]), True
+
+        indice = self.leer_indice()
+        mapeo = indice.get(clave)
+        desde_cache = (isinstance(mapeo, dict) and set(mapeo) == set(esperadas)
+                       and all(real is None or real in columnas for real in mapeo.values()))
+        if not desde_cache:
+            mapeo = resolver(columnas, esperadas)
+            indice.pop(clave, None)
+            indice[clave] = mapeo
+            self.guardar_indice()
+        self.mapeos[clave] = mapeo
+        return dict(mapeo), desde_cache
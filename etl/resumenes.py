@@ -0,0 +1,114 @@
+# resumenes.py
+"""Tablas de resumen OEE pre-agregadas (día / semana ISO / mes × máquina / operario)"""
+from datetime import timedelta
+
+import pandas as pd
+
+import backends
+
+ORIGEN = 'datos_limpios_temperas_vinilos'
+
+# Tabla de resumen -> columna de dimensión
+TABLAS_RESUMEN = {
+    'resumen_oee_maquina': 'maquina',
+    'resumen_oee_operario': 'operario',
+}
+
+# Granos de agregación (la semana ISO empieza el lunes); el SQL de cada uno lo da el dialecto
+GRANOS = ('dia', 'semana', 'mes')
+
+INDICES_RESUMEN = {tabla: [('grano', dimension, 'periodo'), ('grano', 'periodo')]
+                   for tabla, dimension in TABLAS_RESUMEN.items()}
+
+
+def inicio_periodo(grano, fecha):
+    """Inicio del periodo que contiene la fecha, calculado en Python"""
+    dia = pd.Timestamp(fecha).date()
+    if grano == 'semana':
+        return dia - timedelta(days=dia.weekday())
+    if grano == 'mes':
+        return dia.replace(day=1)
+    return dia
+
+
+def select_resumen_grano(dimension, grano, origen=ORIGEN, condicion=None, dialecto=backends.MYSQL):
+    """SELECT agregado de un grano para una dimensión"""
+    periodo = dialecto.inicio_periodo(grano, 'fecha')
+    where = "fecha IS NOT NULL"
+    if condicion:
+        where += f" AND {condicion}"
+    return f"""
+                SELECT
+                    '{grano}' AS grano,
+                    {periodo} AS periodo,
+                    {dimension},
+                    COUNT(*) AS registros,
+                    SUM(COALESCE(pacas_producidas, 0)) AS pacas,
+                    SUM(COALESCE(horas_trabajadas, 0)) AS horas_trabajadas,
+                    SUM(COALESCE(tiempo_de_paro, 0)) AS horas_paro,
+                    CASE WHEN SUM(COALESCE(horas_trabajadas, 0)) > 0
+                         THEN (SUM(COALESCE(horas_trabajadas, 0)) - SUM(COALESCE(tiempo_de_paro, 0)))
+                              / SUM(COALESCE(horas_trabajadas, 0))
+                    END AS disponibilidad,
+                    CASE WHEN SUM(COALESCE(horas_trabajadas, 0)) - SUM(COALESCE(tiempo_de_paro, 0)) > 0
+                         THEN SUM(COALESCE(pacas_producidas, 0))
+                              / (SUM(COALESCE(horas_trabajadas, 0)) - SUM(COALESCE(tiempo_de_paro, 0)))
+                    END AS rendimiento_pacas_hora
+                FROM {origen}
+                WHERE {where}
+                GROUP BY {periodo}, {dimension}"""
+
+
+def select_resumen(dimension, origen=ORIGEN, dialecto=backends.MYSQL):
+    """SELECT completo de los tres granos para una dimensión"""
+    return "\n                UNION ALL".join(
+        select_resumen_grano(dimension, grano, origen, dialecto=dialecto) for grano in GRANOS
+    )
+
+
+def rangos_afectados(afectadas):
+    """Fecha mínima afectada por la carga incremental (None = recalcular todo)"""
+    if not afectadas or any(desde is None for desde in afectadas.values()):
+        return None
+    return min(afectadas.values())
+
+
+def sentencias_incrementales(tabla, dimension, afectadas, dialecto=backends.MYSQL):
+    """Sentencias (sql, params) que recalculan solo los periodos afectados.
+
+    Para la dimensión máquina se acota por máquina y periodo; para el resto
+    se recalculan los periodos desde la fecha mínima afectada.
+    """
+    sentencias = []
+    if dimension == 'maquina':
+        rangos = afectadas.items()
+    else:
+        rangos = [(None, rangos_afectados(afectadas))]
+
+    for maquina, desde in rangos:
+        for grano in GRANOS:
+            condicion_resumen = "grano = :grano"
+            condicion_origen = []
+            params = {'grano': grano}
+            # La clave viene de incremental.clave_maquina (sin espacios a los lados) y la
+            # máquina se guarda sin recortar: se compara con TRIM en el resumen y en el origen
+            if maquina == '':
+                condicion_resumen += " AND (maquina IS NULL OR TRIM(maquina) = '')"
+                condicion_origen.append("(maquina IS NULL OR TRIM(maquina) = '')")
+            elif maquina is not None:
+                condicion_resumen += " AND TRIM(maquina) = :maquina"
+                condicion_origen.append("TRIM(maquina) = :maquina")
+                params['maquina'] = maquina
+            if desde is not None:
+                params['inicio'] = inicio_periodo(grano, desde)
+                condicion_resumen += " AND periodo >= :inicio"
+                # fecha >= inicio equivale a periodo >= inicio y acota las filas del origen
+                condicion_origen.append("fecha >= :inicio")
+
+            sentencias.append((f"DELETE FROM {tabla} WHERE {condicion_resumen}", params))
+            sentencias.append((
+                f"INSERT INTO {tabla}"
+                f"{select_resumen_grano(dimension, grano, condicion=' AND '.join(condicion_origen) or None, dialecto=dialecto)}",
+                params
+            ))
+    return sentencias
@@ -0,0 +1,40 @@
+-- ============================================================
+-- Consultas de los paneles de Grafana (leen los resúmenes materializados)
+-- ============================================================
+
+-- Pacas y disponibilidad diaria por máquina
+SELECT periodo AS time, maquina AS metric, pacas
+FROM resumen_oee_maquina
+WHERE grano = 'dia' AND $__timeFilter(periodo)
+ORDER BY periodo;
+
+SELECT periodo AS time, maquina AS metric, disponibilidad
+FROM resumen_oee_maquina
+WHERE grano = 'dia' AND $__timeFilter(periodo)
+ORDER BY periodo;
+
+-- Rendimiento (pacas por hora operativa) semanal por máquina
+SELECT periodo AS time, maquina AS metric, rendimiento_pacas_hora
+FROM resumen_oee_maquina
+WHERE grano = 'semana' AND $__timeFilter(periodo)
+ORDER BY periodo;
+
+-- Horas trabajadas y horas de paro mensuales por máquina
+SELECT periodo AS time, maquina, horas_trabajadas, horas_paro
+FROM resumen_oee_maquina
+WHERE grano = 'mes' AND $__timeFilter(periodo)
+ORDER BY periodo, maquina;
+
+-- Producción mensual por operario
+SELECT periodo AS time, operario AS metric, pacas
+FROM resumen_oee_operario
+WHERE grano = 'mes' AND operario IS NOT NULL AND operario != '' AND operario NOT LIKE 'No%'
+  AND $__timeFilter(periodo)
+ORDER BY periodo;
+
+-- Minutos de paro por código, máquina y mes (fact_paros, índice maquina+fecha)
+SELECT maquina, codigo, DATE_SUB(DATE(fecha), INTERVAL DAYOFMONTH(fecha) - 1 DAY) AS mes, SUM(minutos) AS minutos
+FROM fact_paros
+WHERE $__timeFilter(fecha)
+GROUP BY maquina, codigo, mes
+ORDER BY mes, minutos DESC;
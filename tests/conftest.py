@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Los módulos del ETL se importan por nombre desde etl/ (como al ejecutar etl/etl_structured.py)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'etl'))
@@ -0,0 +1,22 @@
+# test_compactacion.py
+"""Parseo de la columna fecha al compactar el DataFrame crudo."""
+import pandas as pd
+
+import compactacion
+
+
+def test_fecha_ambigua_se_lee_con_el_dia_primero():
+    serie = pd.Series(['03/04/2024', '13/04/2024', None], dtype=object)
+
+    fechas = compactacion.como_fecha(serie)
+
+    assert fechas.tolist()[:2] == [pd.Timestamp('2024-04-03'), pd.Timestamp('2024-04-13')]
+    assert pd.isna(fechas.iloc[2])
+
+
+def test_fecha_iso_conserva_el_mes():
+    serie = pd.Series(['2023-02-03 00:00:00.000', '03/04/2024'], dtype=object)
+
+    fechas = compactacion.como_fecha(serie)
+
+    assert fechas.tolist() == [pd.Timestamp('2023-02-03'), pd.Timestamp('2024-04-03')]
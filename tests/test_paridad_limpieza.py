@@ -0,0 +1,45 @@
+# test_paridad_limpieza.py
+"""Paridad de la limpieza SQL y la vectorizada sobre los CSV de database/ (SQLite).
+
+Cada CSV se carga con el motor SQL y las tablas resultantes se comparan con
+limpiar / procesar_paros / fact_paros del motor vectorizado.
+"""
+import importlib
+from pathlib import Path
+
+import pytest
+
+CSVS = sorted((Path(__file__).resolve().parents[1] / 'database').glob('*.csv'))
+
+
+@pytest.fixture(scope='module')
+def etl_structured(tmp_path_factory):
+    # El módulo abre etl_process.log en el directorio actual al importarse
+    directorio = tmp_path_factory.mktemp('logs')
+    with pytest.MonkeyPatch.context() as parche:
+        parche.chdir(directorio)
+        return importlib.import_module('etl_structured')
+
+
+@pytest.mark.parametrize('csv', CSVS, ids=lambda ruta: ruta.name)
+def test_limpieza_sql_igual_a_vectorizada(etl_structured, csv, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    etl = etl_structured.TemperasVinilosETL(
+        excel_file_path=str(csv),
+        db_config={'path': str(tmp_path / 'paridad.db')},
+        backend='sqlite',
+        motor_limpieza='sql',
+        verbosidad='silencioso',
+    )
+    assert etl.run_etl()
+
+    with etl.consola():
+        resultado = etl.diferencias_paridad()
+    etl.engine.dispose()
+
+    tablas = {'datos_limpios_temperas_vinilos', 'datos_paros_procesados'}
+    if etl.slots:
+        tablas.add('fact_paros')
+    assert tablas <= set(resultado)
+    distintas = {tabla: diferencias for tabla, (_filas, diferencias) in resultado.items() if diferencias}
+    assert distintas == {}